@@ -8,6 +8,7 @@ from django.contrib.auth.models import User
 from django.contrib.auth.hashers import make_password
 
 from auth_app.models import UserProfile
+from core.metrics import AUTH_ATTEMPTS
 from .serializers import RegistrationSerializer
 
 
@@ -76,11 +77,14 @@ class LoginView(APIView):
 
         if not user:
             # Authentication failed
+            AUTH_ATTEMPTS.inc('login', 'failure')
             return Response(
                 {"error": "Invalid email or password."},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        AUTH_ATTEMPTS.inc('login', 'success')
+
         # Retrieve or create an auth token for the authenticated user
         token, _ = Token.objects.get_or_create(user=user)
 
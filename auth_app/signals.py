@@ -0,0 +1,41 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from auth_app.models import UserProfile
+from auth_app.user_summaries import invalidate
+
+
+# Sent with `user_id` after the commit of a change to the user's summary
+# ({id, email, fullname}), once the cached summary was dropped; receivers
+# refresh whatever else renders the user (e.g. the task fragments of kanban_app)
+user_summary_changed = Signal()
+
+
+def invalidate_on_commit(user_id):
+    # After the commit, so no concurrent request can cache the old row again
+    transaction.on_commit(lambda: summary_changed(user_id))
+
+
+def summary_changed(user_id):
+    invalidate([user_id])
+    user_summary_changed.send(sender=User, user_id=user_id)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Only the email is part of the summary (e.g. last_login updates are not)
+    if created or (update_fields is not None and 'email' not in update_fields):
+        return
+    invalidate_on_commit(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    invalidate_on_commit(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=UserProfile)
+def profile_changed(sender, instance, **kwargs):
+    invalidate_on_commit(instance.user_id)
@@ -1,3 +1,204 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from auth_app import user_summaries
+from auth_app.models import UserProfile
+from kanban_app.models import Board, Task
+
+
+# Both caches in memory, so tests neither share state with nor write to the
+# file-based cache of a running development server
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'auth-tests'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'auth-tests-shared'},
+}
+
+
+def create_user(email, fullname):
+    user = User.objects.create_user(username=email, email=email, password='secret-password')
+    UserProfile.objects.create(user=user, fullname=fullname)
+    return user
+
+
+@override_settings(CACHES=TEST_CACHES, PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class AuthTestCase(TestCase):
+
+    def setUp(self):
+        for alias in TEST_CACHES:
+            caches[alias].clear()
+        # Ids are reused after the rollback of a test; local entries must not survive it
+        user_summaries._cache.clear()
+        self.client = APIClient()
+
+
+class RegistrationLoginTests(AuthTestCase):
+
+    def test_registration_returns_token_and_creates_profile(self):
+        response = self.client.post('/api/registration/', {
+            'fullname': 'Anna Example', 'email': 'anna@example.com',
+            'password': 'secret-password', 'repeated_password': 'secret-password',
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['fullname'], 'Anna Example')
+        self.assertTrue(response.data['token'])
+        self.assertEqual(UserProfile.objects.get(user_id=response.data['user_id']).fullname, 'Anna Example')
+
+    def test_registration_rejects_taken_email_and_password_mismatch(self):
+        create_user('anna@example.com', 'Anna')
+        taken = self.client.post('/api/registration/', {
+            'fullname': 'Anna', 'email': 'anna@example.com',
+            'password': 'secret-password', 'repeated_password': 'secret-password',
+        }, format='json')
+        mismatch = self.client.post('/api/registration/', {
+            'fullname': 'Ben', 'email': 'ben@example.com',
+            'password': 'secret-password', 'repeated_password': 'other-password',
+        }, format='json')
+
+        self.assertEqual(taken.status_code, 400)
+        self.assertEqual(mismatch.status_code, 400)
+
+    def test_login(self):
+        user = create_user('anna@example.com', 'Anna')
+
+        response = self.client.post('/api/login/', {'email': 'anna@example.com', 'password': 'secret-password'}, format='json')
+        failed = self.client.post('/api/login/', {'email': 'anna@example.com', 'password': 'wrong'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user_id'], user.pk)
+        self.assertEqual(response.data['fullname'], 'Anna')
+        self.assertEqual(failed.status_code, 400)
+
+    def test_token_authenticates_api_requests(self):
+        create_user('anna@example.com', 'Anna')
+        token = self.client.post(
+            '/api/login/', {'email': 'anna@example.com', 'password': 'secret-password'}, format='json'
+        ).data['token']
+
+        self.assertEqual(self.client.get('/api/boards/').status_code, 401)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+        self.assertEqual(self.client.get('/api/boards/').status_code, 200)
+
+
+class UserSummaryCacheTests(AuthTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.anna = create_user('anna@example.com', 'Anna')
+        self.ben = User.objects.create_user(username='ben@example.com', email='ben@example.com')
+
+    def test_summaries_are_loaded_with_one_query_and_then_cached(self):
+        with self.assertNumQueries(1):
+            summaries = user_summaries.get_summaries([self.anna.pk, self.ben.pk, None, 999999])
+        with self.assertNumQueries(0):
+            again = user_summaries.get_summaries([self.anna.pk, self.ben.pk])
+
+        self.assertEqual(summaries, {
+            self.anna.pk: {'id': self.anna.pk, 'email': 'anna@example.com', 'fullname': 'Anna'},
+            # Users without a profile have an empty fullname
+            self.ben.pk: {'id': self.ben.pk, 'email': 'ben@example.com', 'fullname': ''},
+        })
+        self.assertEqual(again, summaries)
+
+    def test_other_processes_are_served_from_the_shared_tier(self):
+        user_summaries.get_summaries([self.anna.pk])
+        caches['default'].clear()
+
+        with self.assertNumQueries(0):
+            summary = user_summaries.UserSummaryCache().get_many([self.anna.pk])
+        self.assertEqual(summary[self.anna.pk]['fullname'], 'Anna')
+
+    def test_profile_change_invalidates_after_commit(self):
+        user_summaries.get_summary(self.anna.pk)
+        profile = self.anna.userprofile
+        profile.fullname = 'Anna Changed'
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+
+        self.assertEqual(user_summaries.get_summary(self.anna.pk)['fullname'], 'Anna Changed')
+
+    def test_change_is_invalidated_once_after_the_commit(self):
+        board = Board.objects.create(title='Board', owner=self.anna)
+        task = Task.objects.create(board=board, title='Task', status='to-do', priority='low', assignee=self.anna)
+        board_version = Board.objects.get(pk=board.pk).version
+        profile = self.anna.userprofile
+        profile.fullname = 'Anna Changed'
+
+        with mock.patch('auth_app.signals.invalidate', wraps=user_summaries.invalidate) as invalidate:
+            with self.captureOnCommitCallbacks() as callbacks:
+                profile.save()
+            self.assertEqual(Task.objects.get(pk=task.pk).version, task.version)
+            for callback in callbacks:
+                callback()
+
+        invalidate.assert_called_once_with([self.anna.pk])
+        self.assertEqual(Task.objects.get(pk=task.pk).version, task.version + 1)
+        self.assertEqual(Board.objects.get(pk=board.pk).version, board_version + 1)
+
+    def test_email_change_invalidates_but_other_user_saves_do_not(self):
+        user_summaries.get_summary(self.anna.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.anna.save(update_fields=['last_login'])
+        self.assertEqual(callbacks, [])
+
+        self.anna.email = 'anna@new.example.com'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.anna.save()
+        self.assertEqual(user_summaries.get_summary(self.anna.pk)['email'], 'anna@new.example.com')
+
+    def test_invalidation_reaches_other_processes_for_that_user_only(self):
+        other_process = user_summaries.UserSummaryCache()
+        config = {**user_summaries.get_config(), 'sync_interval': 0}
+        with self.settings(USER_SUMMARY_CACHE=config):
+            other_process.get_many([self.anna.pk, self.ben.pk])
+
+            UserProfile.objects.filter(user=self.anna).update(fullname='Anna Changed')
+            user_summaries.invalidate([self.anna.pk])
+
+            # Ben is still served locally, Anna is loaded again
+            with self.assertNumQueries(1):
+                summaries = other_process.get_many([self.anna.pk, self.ben.pk])
+        self.assertEqual(summaries[self.anna.pk]['fullname'], 'Anna Changed')
+
+    def test_registration_keeps_the_summaries_of_other_users(self):
+        user_summaries.get_summaries([self.anna.pk, self.ben.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            create_user('carla@example.com', 'Carla')
+
+        with self.assertNumQueries(0):
+            user_summaries.UserSummaryCache().get_many([self.anna.pk, self.ben.pk])
+
+    def test_summary_loaded_before_an_invalidation_is_not_used(self):
+        generation = caches['shared'].get(user_summaries.generation_key(self.anna.pk), '0')
+        user_summaries.invalidate([self.anna.pk])
+        # A render that read the old row before the change was committed stores it late
+        caches['shared'].set(user_summaries.summary_key(self.anna.pk), (generation, {
+            'id': self.anna.pk, 'email': 'anna@example.com', 'fullname': 'Old Anna',
+        }))
+        UserProfile.objects.filter(user=self.anna).update(fullname='Anna Changed')
+
+        summary = user_summaries.UserSummaryCache().get_many([self.anna.pk])[self.anna.pk]
+        self.assertEqual(summary['fullname'], 'Anna Changed')
+
+    def test_rename_is_shown_in_nested_task_and_board_output(self):
+        board = Board.objects.create(title='Board', owner=self.anna)
+        Task.objects.create(board=board, title='Task', status='to-do', priority='low', assignee=self.anna)
+        self.client.force_authenticate(self.anna)
+        self.assertEqual(self.client.get('/api/tasks/assigned-to-me/').json()[0]['assignee']['fullname'], 'Anna')
+        self.assertEqual(self.client.get(f'/api/boards/{board.pk}/').json()['tasks'][0]['assignee']['fullname'], 'Anna')
+
+        profile = self.anna.userprofile
+        profile.fullname = 'Anna Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+
+        self.assertEqual(
+            self.client.get('/api/tasks/assigned-to-me/').json()[0]['assignee']['fullname'], 'Anna Renamed'
+        )
+        self.assertEqual(
+            self.client.get(f'/api/boards/{board.pk}/').json()['tasks'][0]['assignee']['fullname'], 'Anna Renamed'
+        )
@@ -0,0 +1,246 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+
+from core.metrics import CACHE_REQUESTS
+
+
+# Prefix for all cache keys written by this module
+KEY_PREFIX = 'user-summary'
+
+# Number of the latest invalidation; `change_key(n)` holds the user ids of the
+# n-th one, so other processes drop the local entries of exactly those users
+CHANGES_KEY = f'{KEY_PREFIX}:changes'
+
+# Processes that missed more invalidations than this drop all local entries
+# instead of reading the ids of every one of them
+MAX_SYNC_CHANGES = 1000
+
+DEFAULTS = {
+    # Entries of the process-local LRU
+    'max_entries': 5000,
+    # Lifetime (seconds) of the entries in the cache tier
+    'timeout': 600,
+    # Lifetime (seconds) of the entries in the process-local LRU
+    'local_timeout': 60,
+    # How often (seconds) a process checks for invalidations; this bounds
+    # how long another process may serve a summary after it was invalidated
+    'sync_interval': 1.0,
+    # Cache alias of the second tier and the invalidation log. It has to be
+    # shared by all processes (a LocMemCache is not); otherwise the tier is just
+    # another per-process copy, and other processes only notice an invalidation
+    # once their entries reach `local_timeout`
+    'cache': 'shared',
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'USER_SUMMARY_CACHE', {})}
+
+
+def summary_key(user_id):
+    return f'{KEY_PREFIX}:{user_id}'
+
+
+def generation_key(user_id):
+    """
+    Key of the user's generation: a new random value on every invalidation
+    of the user, stored with each summary of the cache tier.
+    """
+    return f'{KEY_PREFIX}:generation:{user_id}'
+
+
+def change_key(number):
+    return f'{KEY_PREFIX}:change:{number}'
+
+
+class UserSummaryCache:
+    """
+    Two-tier cache of {id, email, fullname} per user id:
+
+    - a bounded LRU in the process (no I/O at all on hits),
+    - the shared Django cache, where a summary is only used while it was
+      stored under the user's current generation.
+
+    Lookups are always done for many ids at once: one `get_many` for the
+    cache tier and one query for the users that are in neither tier.
+    Invalidations are per user, so changing one user keeps all other
+    summaries cached in both tiers.
+    """
+
+    def __init__(self):
+        self.entries = OrderedDict()  # user id -> (summary, expiry)
+        self.lock = threading.Lock()
+        self.last_change = None  # number of the latest invalidation seen
+        self.last_sync = 0.0
+        # Incremented whenever local entries are dropped; summaries loaded
+        # before that are not stored locally
+        self.epoch = 0
+
+    def sync(self, config):
+        """
+        Drops the local entries of the users other processes invalidated since
+        the last check (at most once per `sync_interval`).
+        """
+        now = time.monotonic()
+        if now - self.last_sync < config['sync_interval']:
+            return
+        shared = caches[config['cache']]
+        last_change = self.last_change
+        current = shared.get(CHANGES_KEY, 0)
+
+        changed = None
+        if last_change is not None and 0 < current - last_change <= MAX_SYNC_CHANGES:
+            numbers = range(last_change + 1, current + 1)
+            logged = shared.get_many([change_key(number) for number in numbers])
+            # Entries of the log may have expired; then it is unknown who changed
+            if len(logged) == len(numbers):
+                changed = {user_id for user_ids in logged.values() for user_id in user_ids}
+
+        with self.lock:
+            if self.last_change == last_change and current != last_change:
+                if changed is not None:
+                    for user_id in changed:
+                        self.entries.pop(user_id, None)
+                else:
+                    self.entries.clear()
+                self.last_change = current
+                self.epoch += 1
+            self.last_sync = now
+
+    def get_many(self, user_ids):
+        """
+        Returns {user id: summary} for all existing users in `user_ids`.
+        """
+        config = get_config()
+        self.sync(config)
+        user_ids = {user_id for user_id in user_ids if user_id is not None}
+
+        found = {}
+        now = time.monotonic()
+        with self.lock:
+            epoch = self.epoch
+            for user_id in user_ids:
+                entry = self.entries.get(user_id)
+                if entry is not None and entry[1] > now:
+                    self.entries.move_to_end(user_id)
+                    found[user_id] = entry[0]
+        if found:
+            CACHE_REQUESTS.inc('user-summary-local', 'hit', amount=len(found))
+
+        missing = user_ids - set(found)
+        if missing:
+            shared = caches[config['cache']]
+            stored = shared.get_many(
+                [summary_key(user_id) for user_id in missing] + [generation_key(user_id) for user_id in missing]
+            )
+            generations = {user_id: stored.get(generation_key(user_id), '0') for user_id in missing}
+            loaded = {}
+            for user_id in missing:
+                entry = stored.get(summary_key(user_id))
+                # Stored before the user's last invalidation (or by a render that
+                # read the user before it was committed)
+                if entry is not None and entry[0] == generations[user_id]:
+                    loaded[user_id] = entry[1]
+            CACHE_REQUESTS.inc('user-summary', 'hit', amount=len(loaded))
+
+            unknown = missing - set(loaded)
+            if unknown:
+                CACHE_REQUESTS.inc('user-summary', 'miss', amount=len(unknown))
+                fresh = {
+                    user_id: {'id': user_id, 'email': email, 'fullname': fullname if fullname is not None else ""}
+                    for user_id, email, fullname in User.objects.filter(pk__in=unknown).values_list(
+                        'id', 'email', 'userprofile__fullname'
+                    )
+                }
+                # Under the generations read before the query: if a user was
+                # invalidated in the meantime, this entry is never used
+                shared.set_many(
+                    {summary_key(user_id): (generations[user_id], summary) for user_id, summary in fresh.items()},
+                    config['timeout'],
+                )
+                loaded.update(fresh)
+
+            self.store(loaded, epoch, config)
+            found.update(loaded)
+        return found
+
+    def store(self, summaries, epoch, config):
+        expiry = time.monotonic() + config['local_timeout']
+        with self.lock:
+            # Loaded before local entries were invalidated in the meantime
+            if epoch != self.epoch:
+                return
+            for user_id, summary in summaries.items():
+                self.entries[user_id] = (summary, expiry)
+                self.entries.move_to_end(user_id)
+            while len(self.entries) > config['max_entries']:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, user_ids):
+        """
+        Drops the summaries of `user_ids` here and in the cache tier, and logs
+        the invalidation for the other processes to drop their local entries.
+        """
+        config = get_config()
+        user_ids = sorted({user_id for user_id in user_ids if user_id is not None})
+        if not user_ids:
+            return
+        shared = caches[config['cache']]
+        shared.set_many({generation_key(user_id): uuid.uuid4().hex for user_id in user_ids}, None)
+        shared.delete_many([summary_key(user_id) for user_id in user_ids])
+        number = _increment(shared, CHANGES_KEY)
+        # Processes that sync later than this have no older local entries left
+        shared.set(change_key(number), user_ids, config['local_timeout'] + config['sync_interval'])
+        with self.lock:
+            for user_id in user_ids:
+                self.entries.pop(user_id, None)
+            self.epoch += 1
+
+    def clear(self):
+        """
+        Drops all local entries; invalidations are read again on the next lookup.
+        """
+        with self.lock:
+            self.entries.clear()
+            self.last_change = None
+            self.last_sync = 0.0
+            self.epoch += 1
+
+
+def _increment(shared, key):
+    try:
+        return shared.incr(key)
+    except ValueError:
+        # Not set yet
+        if shared.add(key, 1, None):
+            return 1
+        return shared.incr(key)
+
+
+_cache = UserSummaryCache()
+
+
+def get_summaries(user_ids):
+    """
+    Returns {user id: {'id', 'email', 'fullname'}} for the given ids;
+    ids of users that do not exist are left out. Users without a profile
+    have an empty fullname (same as UserSummarySerializer).
+    """
+    return _cache.get_many(user_ids)
+
+
+def get_summary(user_id):
+    """
+    Returns the summary of one user, or None if there is no such user.
+    """
+    return get_summaries([user_id]).get(user_id)
+
+
+def invalidate(user_ids):
+    _cache.invalidate(user_ids)
@@ -0,0 +1,264 @@
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import RequestDataTooBig
+from django.http import JsonResponse
+from django.urls import NoReverseMatch, reverse
+
+
+# HTTP methods that only read data; everything else counts as a write
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+DEFAULTS = {
+    # Requests executing at the same time per process, by pool
+    'read': {'concurrency': 16, 'queue': 64, 'timeout': 2.0},
+    'write': {'concurrency': 2, 'queue': 32, 'timeout': 5.0},
+    # Token bucket per valid auth token (or client address): sustained rate and burst size
+    'rate': 20.0,
+    'burst': 40,
+    # Seconds suggested to shed clients in the Retry-After header
+    'retry_after': 1,
+}
+
+_counters_lock = threading.Lock()
+_counters = {'queue_full': 0, 'queue_timeout': 0, 'rate_limited': 0}
+
+
+def get_counters():
+    """
+    Returns how many requests were shed so far, by reason.
+    """
+    with _counters_lock:
+        return dict(_counters)
+
+
+def _count(reason):
+    with _counters_lock:
+        _counters[reason] += 1
+
+
+def get_config():
+    """
+    Returns the admission settings: DEFAULTS updated with settings.ADMISSION_CONTROL.
+    """
+    config = {**DEFAULTS, **getattr(settings, 'ADMISSION_CONTROL', {})}
+    for pool in ('read', 'write'):
+        config[pool] = {**DEFAULTS[pool], **config[pool]}
+    return config
+
+
+class Pool:
+    """
+    A concurrency limit with a bounded wait queue.
+
+    At most `concurrency` requests run at the same time; up to `queue`
+    more wait for at most `timeout` seconds. Anything beyond is rejected
+    immediately instead of piling up.
+    """
+
+    def __init__(self, concurrency, queue, timeout):
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.queue = queue
+        self.timeout = timeout
+        self.waiting = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Returns None on success, otherwise the reason for rejecting the request.
+        """
+        if self.slots.acquire(blocking=False):
+            return None
+
+        with self.lock:
+            if self.waiting >= self.queue:
+                return 'queue_full'
+            self.waiting += 1
+        try:
+            if self.slots.acquire(timeout=self.timeout):
+                return None
+            return 'queue_timeout'
+        finally:
+            with self.lock:
+                self.waiting -= 1
+
+    def release(self):
+        self.slots.release()
+
+
+class TokenBuckets:
+    """
+    In-memory token buckets keyed by client (no database access).
+
+    Each bucket holds up to `burst` tokens and refills at `rate` tokens per second.
+    """
+
+    # At most this many buckets are kept; the least recently used are dropped first
+    MAX_BUCKETS = 10000
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def take(self, key, amount=1):
+        """
+        Takes `amount` tokens (at most `burst`) for `key`. Returns 0 if the
+        request may pass, otherwise the seconds until enough tokens are available.
+        """
+        amount = min(amount, self.burst)
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated = self.buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            wait = 0 if tokens >= amount else (amount - tokens) / self.rate
+            self.buckets[key] = (tokens - amount if not wait else tokens, now)
+            self.buckets.move_to_end(key)
+            if len(self.buckets) > self.MAX_BUCKETS:
+                self._prune(now)
+            return wait
+
+    def _prune(self, now):
+        # Buckets that are full again carry no state worth keeping
+        full_after = self.burst / self.rate
+        for key, (_, updated) in list(self.buckets.items()):
+            if now - updated < full_after:
+                break  # Ordered by last use, so all following ones are more recent
+            del self.buckets[key]
+        while len(self.buckets) > self.MAX_BUCKETS:
+            self.buckets.popitem(last=False)
+
+
+class KnownTokens:
+    """
+    Bounded LRU of Authorization header values that authenticated successfully.
+
+    The middleware runs before authentication, so a header value is only used
+    as rate limit key once a request with it has passed token authentication;
+    until then (and for invalid tokens) the client address is used. Rotating
+    made-up tokens therefore does not get a client a fresh burst.
+    """
+
+    MAX_ENTRIES = 10000
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __contains__(self, auth):
+        with self.lock:
+            if auth not in self.entries:
+                return False
+            self.entries.move_to_end(auth)
+            return True
+
+    def add(self, auth):
+        with self.lock:
+            self.entries[auth] = True
+            self.entries.move_to_end(auth)
+            while len(self.entries) > self.MAX_ENTRIES:
+                self.entries.popitem(last=False)
+
+
+def _batch_methods(request):
+    """
+    Returns the methods of the sub-requests of a POST /api/batch/ request,
+    or None if the body is not a batch (the view rejects it then).
+    """
+    try:
+        specs = json.loads(request.body)['requests']
+        methods = [str(spec['method']).upper() for spec in specs]
+    except (RequestDataTooBig, ValueError, KeyError, TypeError):
+        return None
+    return methods or None
+
+
+def _shed(status, message, retry_after):
+    response = JsonResponse({'detail': message}, status=status)
+    response['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+class AdmissionControlMiddleware:
+    """
+    Keeps latency bounded under load spikes instead of letting requests queue
+    up behind SQLite's write lock:
+
+    - per-client token bucket rate limit (429 with Retry-After),
+    - separate concurrency limits for read (GET/HEAD/OPTIONS) and write requests,
+      each with a bounded wait queue and a wait timeout (503 with Retry-After).
+
+    A batch request (POST /api/batch/) costs one token per sub-request and
+    counts as a read if all of its sub-requests are reads.
+
+    Only requests to the API (`/api/`) are subject to admission control.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = get_config()
+        self.retry_after = config['retry_after']
+        self.buckets = TokenBuckets(config['rate'], config['burst'])
+        self.known_tokens = KnownTokens()
+        self.pools = {
+            'read': Pool(**config['read']),
+            'write': Pool(**config['write']),
+        }
+        self._batch_path = None
+
+    def _client_key(self, request):
+        # Rate limits apply per valid auth token, everything else per client address
+        auth = request.META.get('HTTP_AUTHORIZATION', '')
+        if auth and auth in self.known_tokens:
+            return auth
+        return request.META.get('REMOTE_ADDR', '')
+
+    def _remember_token(self, request):
+        # DRF stores the result of token authentication on the Django request
+        auth = request.META.get('HTTP_AUTHORIZATION', '')
+        if auth and getattr(request, 'auth', None) is not None:
+            self.known_tokens.add(auth)
+
+    def _methods(self, request):
+        """
+        Returns the methods the request runs: those of the sub-requests
+        for a batch, otherwise just the request's own.
+        """
+        if request.method == 'POST':
+            if self._batch_path is None:
+                try:
+                    self._batch_path = reverse('batch')
+                except NoReverseMatch:
+                    self._batch_path = ''
+            if request.path_info == self._batch_path:
+                return _batch_methods(request) or [request.method]
+        return [request.method]
+
+    def __call__(self, request):
+        if not request.path.startswith('/api/'):
+            return self.get_response(request)
+
+        methods = self._methods(request)
+        wait = self.buckets.take(self._client_key(request), len(methods))
+        if wait:
+            _count('rate_limited')
+            return _shed(429, "Request was throttled.", wait)
+
+        is_read = all(method in SAFE_METHODS for method in methods)
+        pool = self.pools['read' if is_read else 'write']
+        rejected = pool.acquire()
+        if rejected:
+            _count(rejected)
+            return _shed(503, "Server is busy, please retry.", self.retry_after)
+
+        try:
+            response = self.get_response(request)
+        finally:
+            pool.release()
+        self._remember_token(request)
+        return response
@@ -0,0 +1,98 @@
+import threading
+import time
+from concurrent.futures import CancelledError, Future, TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+
+from core.metrics import COALESCED_REQUESTS
+
+
+DEFAULTS = {
+    # Set to False to compute every request on its own
+    'enabled': True,
+    # Seconds a follower waits for the leader before computing the result itself;
+    # calls running longer than this are no longer joined by new requests
+    'timeout': 5.0,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'COALESCING', {})}
+
+
+class _Call:
+    def __init__(self):
+        self.future = Future()
+        self.started = time.monotonic()
+
+
+class SingleFlight:
+    """
+    Runs concurrent calls with the same key only once (per process): the first
+    caller (leader) computes the result, callers arriving while it runs
+    (followers) wait for it and get the same object back.
+
+    Keys must identify the result completely (e.g. board id and version), so
+    sharing it is safe; anything that depends on the requesting user, like a
+    permission check, has to happen before. Results are shared, not copied,
+    and must not be modified.
+
+    The views are synchronous; under ASGI, Django runs them in a thread pool,
+    so they coalesce through `run` as well.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def _join(self, key, timeout):
+        """
+        Returns (call, is_leader). Calls older than `timeout` are treated as stuck
+        and replaced, so new requests do not queue up behind them.
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            if call is not None and time.monotonic() - call.started < timeout:
+                return call, False
+            call = self.calls[key] = _Call()
+            return call, True
+
+    def _done(self, key, call):
+        with self.lock:
+            # A newer leader may have replaced a stuck call
+            if self.calls.get(key) is call:
+                del self.calls[key]
+
+    def run(self, key, func):
+        """
+        Returns func() or, if a call with the same key is in flight, its result.
+        """
+        config = get_config()
+        if not config['enabled']:
+            return func()
+
+        call, leader = self._join(key, config['timeout'])
+        if not leader:
+            try:
+                result = call.future.result(timeout=config['timeout'])
+            except (FutureTimeoutError, CancelledError):
+                COALESCED_REQUESTS.inc(self.name, 'fallback')
+                return func()
+            COALESCED_REQUESTS.inc(self.name, 'follower')
+            return result
+
+        COALESCED_REQUESTS.inc(self.name, 'leader')
+        try:
+            result = func()
+        except Exception as exc:
+            # Followers asked for the same thing and get the same error
+            call.future.set_exception(exc)
+            raise
+        else:
+            call.future.set_result(result)
+            return result
+        finally:
+            # Interrupted (e.g. cancelled) without result: followers compute it themselves
+            call.future.cancel()
+            self._done(key, call)
@@ -0,0 +1,112 @@
+import gzip
+import hashlib
+import re
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+
+from core.metrics import CACHE_REQUESTS, COMPRESSION_BYTES, COMPRESSION_TIME
+
+
+# Prefix for the cached compressed bodies
+KEY_PREFIX = 'gzip'
+
+DEFAULTS = {
+    # Bodies smaller than this (bytes) are sent uncompressed; gzip does not pay off for them
+    'min_size': 1024,
+    # zlib level: 6 is most of the size reduction of 9 at a fraction of the CPU time
+    'level': 6,
+    # Only these content types are compressed
+    'content_types': ['application/json', 'text/plain'],
+    # Lifetime (seconds) of cached compressed bodies of responses with an ETag
+    'cache_timeout': 300,
+}
+
+_gzip_accepted = re.compile(r'(?:^|,)\s*(?:gzip|\*)\s*(?:;\s*q\s*=\s*(?P<q>[0-9.]+))?\s*(?:,|$)', re.IGNORECASE)
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'COMPRESSION', {})}
+
+
+def accepts_gzip(request):
+    """
+    True if the Accept-Encoding header allows gzip (`q=0` refuses it).
+    """
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    for match in _gzip_accepted.finditer(header):
+        try:
+            if float(match.group('q') or 1) > 0:
+                return True
+        except ValueError:
+            continue
+    return False
+
+
+def compressed_key(request, etag):
+    # The ETag identifies the body of one URL, so the path is part of the key
+    digest = hashlib.md5(f'{request.path}|{etag}'.encode()).hexdigest()
+    return f'{KEY_PREFIX}:{digest}'
+
+
+class CompressionMiddleware:
+    """
+    Gzip-encodes responses when the client accepts it and the body is large
+    enough to be worth it.
+
+    Responses with an ETag (e.g. the board detail, versioned by Board.version)
+    always have the same body for the same ETag, so their compressed bytes are
+    cached and repeated polls of an unchanged board are not compressed again.
+
+    Input/output bytes and CPU time are recorded per URL name in core.metrics;
+    the ratio is kanmind_compression_bytes_total{direction="out"} / {direction="in"}.
+    Should come right after MetricsMiddleware, so it sees the final body.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        config = get_config()
+
+        if response.streaming or response.has_header('Content-Encoding') or response.status_code != 200:
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip()
+        if content_type not in config['content_types'] or len(response.content) < config['min_size']:
+            return response
+
+        # Compressible: caches must keep the plain and gzip variants apart
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if not accepts_gzip(request):
+            return response
+
+        match = getattr(request, 'resolver_match', None)
+        url_name = (match.url_name if match else None) or 'unresolved'
+        etag = response.get('ETag')
+
+        compressed = None
+        if etag:
+            key = compressed_key(request, etag)
+            compressed = cache.get(key)
+            CACHE_REQUESTS.inc('compressed-response', 'miss' if compressed is None else 'hit')
+        if compressed is None:
+            started = time.thread_time()
+            # mtime=0 keeps the output deterministic for the same body
+            compressed = gzip.compress(response.content, compresslevel=config['level'], mtime=0)
+            COMPRESSION_TIME.inc(url_name, amount=time.thread_time() - started)
+            if etag:
+                cache.set(key, compressed, config['cache_timeout'])
+
+        COMPRESSION_BYTES.inc(url_name, 'in', amount=len(response.content))
+        COMPRESSION_BYTES.inc(url_name, 'out', amount=len(compressed))
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = 'gzip'
+        # The encoded body is no longer byte-identical to the plain one
+        if etag and not etag.startswith('W/'):
+            response['ETag'] = f'W/{etag}'
+        return response
@@ -0,0 +1,423 @@
+import bisect
+import hmac
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse, HttpResponseForbidden
+
+
+# Default latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{_escape(value)}"' for name, value in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """
+    Base class of all metrics: a name, help text, label names and
+    one value per combination of label values.
+
+    Recording only takes a lock and a dict update, i.e. a few microseconds.
+    """
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def snapshot(self):
+        with self.lock:
+            return {json.dumps(key): value for key, value in self.values.items()}
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, *labelvalues, amount=1):
+        with self.lock:
+            self.values[labelvalues] = self.values.get(labelvalues, 0) + amount
+
+    def set_total(self, value, *labelvalues):
+        # For counts that are kept elsewhere and copied over on export
+        with self.lock:
+            self.values[labelvalues] = value
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def inc(self, *labelvalues, amount=1):
+        with self.lock:
+            self.values[labelvalues] = self.values.get(labelvalues, 0) + amount
+
+    def dec(self, *labelvalues, amount=1):
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, value, *labelvalues):
+        with self.lock:
+            self.values[labelvalues] = value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            entry = self.values.get(labelvalues)
+            if entry is None:
+                # Per-bucket counts (non-cumulative) + overflow, then sum
+                entry = self.values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def snapshot(self):
+        with self.lock:
+            return {json.dumps(key): [list(counts), total] for key, (counts, total) in self.values.items()}
+
+
+class Registry:
+    """
+    In-process metrics registry with Prometheus text exposition.
+
+    With `METRICS['directory']` set, every process periodically writes its
+    values to `<directory>/metrics-<pid>.json`, and /metrics adds up the
+    files of all processes (gauges only for processes that are still alive).
+    Files of processes that have exited are folded into `archive.json` and
+    removed, so counters keep their totals without the files piling up.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.collectors = []
+        self.last_flush = 0.0
+        self.flush_lock = threading.Lock()
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector):
+        """
+        Registers a callable that updates metrics right before they are exported
+        (for values that are already counted elsewhere).
+        """
+        self.collectors.append(collector)
+
+    def collect(self):
+        for collector in self.collectors:
+            collector()
+        return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+    # Multi-process support
+
+    def directory(self):
+        directory = getattr(settings, 'METRICS', {}).get('directory')
+        return Path(directory) if directory else None
+
+    def maybe_flush(self):
+        """
+        Writes this process' values to the shared directory, at most once per
+        `METRICS['flush_interval']` seconds. Cheap no-op when not configured.
+        """
+        directory = self.directory()
+        if directory is None:
+            return
+        interval = getattr(settings, 'METRICS', {}).get('flush_interval', 1.0)
+        now = time.monotonic()
+        if now - self.last_flush < interval or not self.flush_lock.acquire(blocking=False):
+            return
+        try:
+            self.last_flush = now
+            self.flush(directory)
+        finally:
+            self.flush_lock.release()
+
+    def flush(self, directory):
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f'metrics-{os.getpid()}.json'
+        temporary = path.with_suffix('.tmp')
+        temporary.write_text(json.dumps({'pid': os.getpid(), 'metrics': self.collect()}))
+        os.replace(temporary, path)
+
+    def _process_snapshots(self):
+        directory = self.directory()
+        if directory is None:
+            return [(os.getpid(), self.collect())]
+
+        self.flush(directory)
+        snapshots = []
+        for path in directory.glob('metrics-*.json'):
+            try:
+                data = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            snapshots.append((data['pid'], data['metrics']))
+        return self._compact(directory, snapshots)
+
+    def _compact(self, directory, snapshots):
+        """
+        Folds the counters and histograms of exited processes into the archive
+        file and deletes their files. Returns the snapshots to add up: the
+        archive (with pid None) and those of the processes still running.
+        """
+        archive_path = directory / 'archive.json'
+        dead = [
+            (pid, snapshot) for pid, snapshot in snapshots
+            if pid != os.getpid() and not self._alive(pid)
+        ]
+
+        # Only one process compacts at a time; a lock left behind by a crash expires
+        lock = directory / 'compact.lock'
+        if dead:
+            try:
+                lock.mkdir()
+            except FileExistsError:
+                dead = []
+                try:
+                    if time.time() - lock.stat().st_mtime > 60:
+                        lock.rmdir()
+                except OSError:
+                    pass
+
+        try:
+            archive = json.loads(archive_path.read_text())
+        except (OSError, ValueError):
+            archive = {}
+        if dead:
+            try:
+                for _, snapshot in dead:
+                    self._add(archive, snapshot, kinds=('counter', 'histogram'))
+                temporary = archive_path.with_suffix('.tmp')
+                temporary.write_text(json.dumps(archive))
+                os.replace(temporary, archive_path)
+                for pid, _ in dead:
+                    (directory / f'metrics-{pid}.json').unlink(missing_ok=True)
+            finally:
+                lock.rmdir()
+
+        folded = {pid for pid, _ in dead}
+        return [(None, archive)] + [(pid, snapshot) for pid, snapshot in snapshots if pid not in folded]
+
+    @staticmethod
+    def _alive(pid):
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def _add(self, merged, snapshot, kinds=('counter', 'gauge', 'histogram')):
+        """
+        Adds the values of `snapshot` ({metric name: {label key: value}}) to `merged`.
+        """
+        for name, values in snapshot.items():
+            metric = self.metrics.get(name)
+            if metric is None or metric.kind not in kinds:
+                continue
+            target = merged.setdefault(name, {})
+            for key, value in values.items():
+                if metric.kind == 'histogram':
+                    if key not in target:
+                        target[key] = [[0] * len(value[0]), 0.0]
+                    target[key][0] = [a + b for a, b in zip(target[key][0], value[0])]
+                    target[key][1] += value[1]
+                else:
+                    target[key] = target.get(key, 0) + value
+
+    def merged(self):
+        """
+        Returns {metric name: {label key: value}} added up over all processes.
+        """
+        merged = {name: {} for name in self.metrics}
+        for pid, snapshot in self._process_snapshots():
+            # Gauges only count for running processes (the archive has none)
+            alive = pid == os.getpid() or (pid is not None and self._alive(pid))
+            self._add(merged, snapshot, kinds=('counter', 'gauge', 'histogram') if alive else ('counter', 'histogram'))
+        return merged
+
+    def render(self):
+        """
+        Returns all metrics in the Prometheus text exposition format (0.0.4).
+        """
+        lines = []
+        for name, values in self.merged().items():
+            metric = self.metrics[name]
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            for key, value in sorted(values.items()):
+                labelvalues = json.loads(key)
+                if metric.kind != 'histogram':
+                    labels = _format_labels(metric.labelnames, labelvalues)
+                    lines.append(f'{name}{labels} {_format_value(value)}')
+                    continue
+                counts, total = value
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (float('inf'),), counts):
+                    cumulative += count
+                    labels = _format_labels(metric.labelnames, labelvalues, [('le', _format_value(bound))])
+                    lines.append(f'{name}_bucket{labels} {cumulative}')
+                labels = _format_labels(metric.labelnames, labelvalues)
+                lines.append(f'{name}_sum{labels} {_format_value(total)}')
+                lines.append(f'{name}_count{labels} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.register(Histogram(
+    'kanmind_http_request_duration_seconds', 'Request latency by URL name.', ['url_name', 'method'],
+))
+REQUESTS = REGISTRY.register(Counter(
+    'kanmind_http_requests_total', 'Requests by URL name and status code.', ['url_name', 'method', 'status'],
+))
+IN_FLIGHT = REGISTRY.register(Gauge(
+    'kanmind_http_requests_in_flight', 'Requests currently being processed.',
+))
+DB_QUERIES = REGISTRY.register(Counter(
+    'kanmind_db_queries_total', 'SQL statements executed by URL name.', ['url_name'],
+))
+DB_TIME = REGISTRY.register(Counter(
+    'kanmind_db_query_seconds_total', 'Time spent executing SQL by URL name.', ['url_name'],
+))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    'kanmind_cache_requests_total', 'Cache lookups by cache and result (hit/miss).', ['cache', 'result'],
+))
+AUTH_ATTEMPTS = REGISTRY.register(Counter(
+    'kanmind_auth_attempts_total', 'Authentication attempts by method and result.', ['method', 'result'],
+))
+SHED_REQUESTS = REGISTRY.register(Counter(
+    'kanmind_admission_shed_total', 'Requests rejected by admission control, by reason.', ['reason'],
+))
+COMPRESSION_BYTES = REGISTRY.register(Counter(
+    'kanmind_compression_bytes_total', 'Body bytes before (in) and after (out) gzip, by URL name.', ['url_name', 'direction'],
+))
+COMPRESSION_TIME = REGISTRY.register(Counter(
+    'kanmind_compression_cpu_seconds_total', 'CPU time spent compressing responses, by URL name.', ['url_name'],
+))
+COALESCED_REQUESTS = REGISTRY.register(Counter(
+    'kanmind_coalesced_requests_total',
+    'Coalesced computations by name and role (leader/follower; fallback = follower computed itself).',
+    ['name', 'role'],
+))
+
+
+def _collect_admission():
+    # Counted by core.admission already; copied over on export
+    from core.admission import get_counters
+
+    for reason, count in get_counters().items():
+        SHED_REQUESTS.set_total(count, reason)
+
+
+REGISTRY.add_collector(_collect_admission)
+
+
+class _QueryTimer:
+    """
+    Execute wrapper that counts the SQL statements of one request and their duration.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+class MetricsMiddleware:
+    """
+    Records latency, status, in-flight count, SQL statements and
+    token authentication results of every request.
+    Should be the first middleware, so shed requests are measured too.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        IN_FLIGHT.inc()
+        timer = _QueryTimer()
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(timer):
+                response = self.get_response(request)
+        finally:
+            IN_FLIGHT.dec()
+
+        elapsed = time.perf_counter() - started
+        match = getattr(request, 'resolver_match', None)
+        url_name = (match.url_name if match else None) or 'unresolved'
+
+        REQUEST_LATENCY.observe(elapsed, url_name, request.method)
+        REQUESTS.inc(url_name, request.method, str(response.status_code))
+        if timer.count:
+            DB_QUERIES.inc(url_name, amount=timer.count)
+            DB_TIME.inc(url_name, amount=timer.duration)
+
+        # DRF stores the authenticated token on the underlying request
+        if getattr(request, 'auth', None) is not None:
+            AUTH_ATTEMPTS.inc('token', 'success')
+        elif response.status_code == 401:
+            AUTH_ATTEMPTS.inc('token', 'failure')
+
+        REGISTRY.maybe_flush()
+        return response
+
+
+def _allowed(request):
+    config = getattr(settings, 'METRICS', {})
+    token = config.get('token')
+    # As bytes: compare_digest() rejects str with non-ASCII characters, which
+    # any client can send (WSGI headers are decoded as latin-1)
+    header = request.META.get('HTTP_AUTHORIZATION', '').encode('latin-1', 'replace')
+    if token and hmac.compare_digest(header, f'Bearer {token}'.encode()):
+        return True
+    return request.META.get('REMOTE_ADDR') in config.get('allowed_ips', ('127.0.0.1', '::1'))
+
+
+def metrics_view(request):
+    """
+    GET /metrics: Prometheus scrape endpoint.
+    Only answers requests from `METRICS['allowed_ips']` (default: localhost)
+    or with `Authorization: Bearer <METRICS['token']>`.
+    """
+    if not _allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,146 @@
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+
+
+DEFAULTS = {
+    # Directory the profiles are written to
+    'directory': None,  # defaults to BASE_DIR / 'profiles'
+    # Value of the X-Profile header that triggers profiling (None disables the header)
+    'token': None,
+    # Fraction of requests profiled at random (0.0 disables sampling)
+    'sample_rate': 0.0,
+    # Interval of the stack sampler that produces the collapsed stacks, in seconds
+    'sample_interval': 0.005,
+}
+
+
+def get_config():
+    config = {**DEFAULTS, **getattr(settings, 'PROFILING', {})}
+    if config['directory'] is None:
+        config['directory'] = settings.BASE_DIR / 'profiles'
+    config['directory'] = Path(config['directory'])
+    return config
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler(threading.Thread):
+    """
+    Samples the call stack of one thread at a fixed interval and counts
+    identical stacks, which gives the collapsed-stack (flamegraph) format.
+    """
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+    def collapsed(self):
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def view_name(request):
+    """
+    Returns the name of the view class/function that handled the request.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    func = match.func
+    name = getattr(getattr(func, 'view_class', None), '__name__', None) or getattr(func, '__name__', 'view')
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', name)
+
+
+class ProfilingMiddleware:
+    """
+    Opt-in profiler for single requests.
+
+    A request is profiled if it carries `X-Profile: <PROFILING['token']>` or is
+    picked by the random `PROFILING['sample_rate']`. For each profiled request
+    two files are written to `PROFILING['directory']`, named after the view:
+
+    - `<time>-<View>-<id>.pstats`: cProfile data (`python -m pstats`, snakeviz, ...)
+    - `<time>-<View>-<id>.collapsed`: sampled stacks for flamegraph.pl / speedscope
+
+    Only one cProfile profiler can be active at a time on Python 3.12+; a request
+    profiled while another one is running only gets the sampled stacks.
+
+    `python manage.py profile_hotspots` aggregates the captured profiles.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = get_config()
+
+    def should_profile(self, request):
+        token = self.config['token']
+        if token and request.META.get('HTTP_X_PROFILE') == token:
+            return True
+        rate = self.config['sample_rate']
+        return rate > 0 and random.random() < rate
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        # Imported here, so the profiler costs nothing unless it is used
+        import cProfile
+
+        profiler = cProfile.Profile()
+        sampler = StackSampler(threading.get_ident(), self.config['sample_interval'])
+        sampler.start()
+        started = time.perf_counter()
+        try:
+            profiler.enable()
+        except ValueError:
+            # "Another profiling tool is already active" (concurrent profiled request)
+            profiler = None
+        try:
+            response = self.get_response(request)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            sampler.stop()
+
+        elapsed = time.perf_counter() - started
+        name = self.write(request, profiler, sampler)
+        response['X-Profile-Id'] = name
+        response['X-Profile-Duration'] = f"{elapsed * 1000:.1f}ms"
+        return response
+
+    def write(self, request, profiler, sampler):
+        directory = self.config['directory']
+        directory.mkdir(parents=True, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{view_name(request)}-{uuid.uuid4().hex[:8]}"
+        if profiler is not None:
+            profiler.dump_stats(directory / f"{name}.pstats")
+        (directory / f"{name}.collapsed").write_text(sampler.collapsed())
+        return name
@@ -0,0 +1,148 @@
+import json
+import logging
+import re
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+
+from core.profiling import view_name
+
+
+DEFAULTS = {
+    # Statements running at least this long are logged (milliseconds)
+    'threshold_ms': 100,
+    # Replace parameter values by "?" in the log (they may contain personal data)
+    'redact_params': True,
+    # Run EXPLAIN QUERY PLAN for logged SELECT statements
+    'explain': True,
+    # Rotating JSON-lines log file
+    'path': None,  # defaults to BASE_DIR / 'logs' / 'slow_queries.log'
+    'max_bytes': 10 * 1024 * 1024,
+    'backup_count': 5,
+}
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'IN \(\?(?:\s*,\s*\?)*\)', re.IGNORECASE)
+_SPACES = re.compile(r'\s+')
+
+_logger = None
+_logger_lock = threading.Lock()
+
+
+def get_config():
+    config = {**DEFAULTS, **getattr(settings, 'SLOW_QUERY_LOG', {})}
+    if config['path'] is None:
+        config['path'] = settings.BASE_DIR / 'logs' / 'slow_queries.log'
+    config['path'] = Path(config['path'])
+    return config
+
+
+def normalize_sql(sql):
+    """
+    Turns a statement into its shape: literals and placeholders become `?`
+    and IN lists collapse to `IN (...)`, so equal queries group together.
+    """
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+def get_logger(config):
+    """
+    Returns the slow-query logger, attaching the rotating file handler on first use.
+    """
+    global _logger
+    with _logger_lock:
+        if _logger is None:
+            config['path'].parent.mkdir(parents=True, exist_ok=True)
+            handler = RotatingFileHandler(
+                config['path'], maxBytes=config['max_bytes'], backupCount=config['backup_count']
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger = logging.getLogger('kanmind.slow_queries')
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(handler)
+            _logger = logger
+    return _logger
+
+
+class SlowQueryRecorder:
+    """
+    Execute wrapper that logs every statement above the threshold together
+    with its normalized form, parameters, duration, view and query plan.
+    """
+
+    def __init__(self, request, config):
+        self.request = request
+        self.config = config
+        self.threshold = config['threshold_ms'] / 1000
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            if duration >= self.threshold:
+                self.record(sql, params, many, duration, context)
+
+    def record(self, sql, params, many, duration, context):
+        entry = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'duration_ms': round(duration * 1000, 3),
+            'view': view_name(self.request),
+            'path': self.request.path,
+            'sql': normalize_sql(sql),
+            'params': self.format_params(params, many),
+            'plan': None,
+        }
+        if self.config['explain'] and not many and sql.lstrip()[:6].upper() == 'SELECT':
+            entry['plan'] = self.explain(sql, params, context['connection'])
+        get_logger(self.config).info(json.dumps(entry, default=str))
+
+    def format_params(self, params, many):
+        if params is None:
+            return None
+        if self.config['redact_params']:
+            return '?' if many else ['?'] * len(params)
+        if many:
+            return f'<{len(params)} parameter sets>'
+        return list(params)
+
+    def explain(self, sql, params, db):
+        prefix = db.ops.explain_query_prefix()
+        # A backend cursor bypasses the execute wrappers (no recursion,
+        # no extra entries in the query metrics)
+        cursor = db.create_cursor()
+        try:
+            cursor.execute(f'{prefix} {sql}', params)
+            # SQLite returns (id, parent, notused, detail); other backends one text column
+            return [str(row[-1]) for row in cursor.fetchall()]
+        except Exception as exc:
+            return [f'EXPLAIN failed: {exc}']
+        finally:
+            cursor.close()
+
+
+class SlowQueryLogMiddleware:
+    """
+    Installs SlowQueryRecorder through `connection.execute_wrapper`
+    for the duration of every request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = get_config()
+
+    def __call__(self, request):
+        with connection.execute_wrapper(SlowQueryRecorder(request, self.config)):
+            return self.get_response(request)
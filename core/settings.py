@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,7 +46,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.compression.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'core.admission.AdmissionControlMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -53,8 +57,99 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'kanban_app.activity.ActivityMiddleware',
+    'core.profiling.ProfilingMiddleware',
+    'core.querylog.SlowQueryLogMiddleware',
 ]
 
+# Load shedding for /api/ requests (core/admission.py):
+# concurrency limits with bounded wait queues for read and write endpoints,
+# plus a rate limit per valid auth token or client address (tokens per second, burst size)
+ADMISSION_CONTROL = {
+    'read': {'concurrency': 16, 'queue': 64, 'timeout': 2.0},
+    'write': {'concurrency': 2, 'queue': 32, 'timeout': 5.0},
+    'rate': 20.0,
+    'burst': 40,
+    'retry_after': 1,
+}
+
+# On-demand request profiling (core/profiling.py): requests sending
+# `X-Profile: <token>` or picked by `sample_rate` are profiled to `directory`
+PROFILING = {
+    'directory': BASE_DIR / 'profiles',
+    'token': os.environ.get('KANMIND_PROFILING_TOKEN'),
+    'sample_rate': 0.0,
+}
+
+# Prometheus metrics at /metrics (core/metrics.py). With `directory` set, all worker
+# processes share their values through files there. Only clients in `allowed_ips`
+# or sending `Authorization: Bearer <token>` may read the endpoint
+METRICS = {
+    'directory': os.environ.get('KANMIND_METRICS_DIR'),
+    'flush_interval': 1.0,
+    'token': os.environ.get('KANMIND_METRICS_TOKEN'),
+    'allowed_ips': ['127.0.0.1', '::1'],
+}
+
+# Slow-query log (core/querylog.py): statements above `threshold_ms` are written
+# with their query plan to a rotating JSON-lines file; see `manage.py slow_queries`
+SLOW_QUERY_LOG = {
+    'threshold_ms': 100,
+    'redact_params': True,
+    'explain': True,
+    'path': BASE_DIR / 'logs' / 'slow_queries.log',
+}
+
+# Activity log (kanban_app/activity.py): events are buffered and written with
+# bulk_create, either once per request or per process ('process' mode flushes
+# when `max_events` are buffered or the oldest is `flush_interval` seconds old)
+ACTIVITY_LOG = {
+    'buffer': 'request',
+    'max_events': 500,
+    'flush_interval': 5.0,
+}
+
+# Response compression (core/compression.py): bodies of at least `min_size` bytes
+# are gzipped for clients that accept it; compressed bodies of responses with
+# an ETag are cached for `cache_timeout` seconds
+COMPRESSION = {
+    'min_size': 1024,
+    'level': 6,
+    'cache_timeout': 300,
+}
+
+# Request coalescing (core/coalescing.py): concurrent board detail/list requests for
+# the same board versions share one computation; followers wait at most `timeout` seconds
+COALESCING = {
+    'enabled': True,
+    'timeout': 5.0,
+}
+
+# Daily due-date digests (kanban_app/digests.py, `manage.py send_digests`): tasks due
+# within `due_soon_days` (including today) or overdue, delivered by `backend` (console, or
+# 'kanban_app.digests.FileBackend' writing JSON lines to options['directory'])
+DIGESTS = {
+    'due_soon_days': 3,
+    'batch_size': 1000,
+    'backend': 'kanban_app.digests.ConsoleBackend',
+    'options': {'directory': BASE_DIR / 'digests'},
+}
+
+# Webhooks (kanban_app/webhooks.py): events are stored in an outbox and sent by
+# `manage.py deliver_webhooks` in batches of `batch_size`; failing endpoints are retried
+# after backoff_base * 2^(n-1) seconds (at most `backoff_max`) and disabled after `max_failures`.
+# Endpoints must be public unless `allow_private_hosts` (needed for `webhook_sink` on localhost)
+WEBHOOKS = {
+    'batch_size': 100,
+    'timeout': 5.0,
+    'backoff_base': 2.0,
+    'backoff_max': 600.0,
+    'max_failures': 20,
+    'settle': 2.0,
+    'retention_days': 7,
+    'allow_private_hosts': False,
+}
+
 CSRF_TRUSTED_ORIGINS = [
   'http://127.0.0.1:5500',
   'http://localhost:5500',
@@ -88,14 +183,71 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# KANMIND_DB_PATH points the project at another SQLite file (used by `manage.py loadtest`)
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('KANMIND_DB_PATH', BASE_DIR / 'db.sqlite3'),
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'kanmind',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    # Small values that all worker processes have to see (the default cache
+    # above is per process), e.g. the user summaries and the
+    # "board has webhooks" flags
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+    },
+}
+
+# Lifetime (seconds) of serialized task fragments (kanban_app/api/fragments.py)
+TASK_FRAGMENT_CACHE_TIMEOUT = 300
+
+# Lifetime (seconds) of the per-user dashboard summary (kanban_app/api/summary.py)
+DASHBOARD_SUMMARY_CACHE_TIMEOUT = 30
+
+# Nested user summaries {id, email, fullname} (auth_app/user_summaries.py):
+# process-local LRU of `max_entries` (`local_timeout` seconds) in front of the `cache`
+# shared by all processes (`timeout` seconds); invalidations are per user, and other
+# processes drop their local entries of the user within `sync_interval` seconds
+USER_SUMMARY_CACHE = {
+    'max_entries': 5000,
+    'timeout': 600,
+    'local_timeout': 60,
+    'sync_interval': 1.0,
+    'cache': 'shared',
+}
+
+# Delay (seconds) before a changed board's snapshot is rebuilt by the job worker;
+# further changes within the delay are covered by the same job (kanban_app/snapshots.py)
+BOARD_SNAPSHOT_DEBOUNCE = 2.0
+
+# Rows deleted per transaction when the job worker purges a deleted board
+BOARD_PURGE_CHUNK_SIZE = 500
+
+# Seconds after which a running job is considered abandoned by its (crashed)
+# worker and is picked up again by `process_jobs` (kanban_app/jobs.py)
+JOB_LEASE_TIMEOUT = 600
+
+# Maximum number of sub-requests accepted by POST /api/batch/
+BATCH_MAX_REQUESTS = 20
+
+# Maximum number of emails accepted by POST /api/boards/<id>/members/
+BOARD_INVITE_MAX_EMAILS = 100
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
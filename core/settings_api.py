@@ -0,0 +1,50 @@
+"""
+API-only settings profile.
+
+The token-authenticated JSON API in `kanban_app` and `auth_app` does not use
+the admin, sessions, messages, static files, CSRF or the template-based
+browsable API. This profile leaves them out, which makes worker startup and
+every request cheaper.
+
+Usage:
+    DJANGO_SETTINGS_MODULE=core.settings_api gunicorn core.wsgi
+    python manage.py runserver --settings=core.settings_api
+
+`python manage.py startup_benchmark` compares both profiles.
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import INSTALLED_APPS, MIDDLEWARE, REST_FRAMEWORK
+
+
+UNUSED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+]
+
+UNUSED_MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in UNUSED_APPS]
+
+MIDDLEWARE = [middleware for middleware in MIDDLEWARE if middleware not in UNUSED_MIDDLEWARE]
+
+# No template engine is needed without the admin and the browsable API
+TEMPLATES = []
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+    ],
+}
@@ -1,10 +1,9 @@
-from django.contrib import admin
+from django.apps import apps
 from django.urls import path, include
 
-urlpatterns = [
-    # Admin interface – accessible via /admin/
-    path('admin/', admin.site.urls),
+from core.metrics import metrics_view
 
+urlpatterns = [
     # Authentication-related API endpoints (registration, login, etc.)
     # These are defined in auth_app/api/urls.py
     path('api/', include('auth_app.api.urls')),
@@ -12,4 +11,14 @@ urlpatterns = [
     # Kanban board-related API endpoints (boards, tasks, comments, etc.)
     # These are defined in kanban_app/api/urls.py
     path('api/', include('kanban_app.api.urls')),
+
+    # Prometheus scrape endpoint – accessible via /metrics
+    path('metrics', metrics_view, name='metrics'),
 ]
+
+# Admin interface – accessible via /admin/
+# Only imported when installed (the API-only profile core.settings_api leaves it out)
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+
+    urlpatterns.append(path('admin/', admin.site.urls))
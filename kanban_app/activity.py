@@ -0,0 +1,150 @@
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from kanban_app.models import Activity, Board
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    # 'request': events are written once at the end of each request;
+    # 'process': events of many requests are collected per worker process
+    # and written when `max_events` or `flush_interval` is reached
+    'buffer': 'request',
+    # Upper bound of buffered events; a full buffer is flushed right away
+    'max_events': 500,
+    # Oldest buffered event age (seconds) that triggers a flush in 'process' mode
+    'flush_interval': 5.0,
+}
+
+_state = threading.local()
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'ACTIVITY_LOG', {})}
+
+
+class ActivityBuffer:
+    """
+    Bounded list of pending Activity rows, written with one `bulk_create`.
+    """
+
+    def __init__(self, max_events):
+        self.max_events = max_events
+        self.events = []
+        self.first_added = None
+        self.lock = threading.Lock()
+
+    def add(self, event):
+        with self.lock:
+            if not self.events:
+                self.first_added = time.monotonic()
+            self.events.append(event)
+            full = len(self.events) >= self.max_events
+        if full:
+            self.flush()
+
+    def is_due(self, interval):
+        first_added = self.first_added
+        return bool(self.events) and time.monotonic() - first_added >= interval
+
+    def flush(self):
+        with self.lock:
+            events, self.events = self.events, []
+        if not events:
+            return 0
+        try:
+            Activity.objects.bulk_create(events, batch_size=self.max_events)
+        except IntegrityError:
+            # A board was hard-deleted after its events were recorded;
+            # keep the events of the boards that still exist
+            existing = set(Board.all_objects.filter(
+                pk__in={event.board_id for event in events}
+            ).values_list('id', flat=True))
+            events = [event for event in events if event.board_id in existing]
+            Activity.objects.bulk_create(events, batch_size=self.max_events)
+        return len(events)
+
+
+# Shared by all threads of the process: events recorded outside of requests
+# and, in 'process' mode, the events of all requests
+_process_buffer = ActivityBuffer(get_config()['max_events'])
+
+
+def _flush_process_buffer():
+    try:
+        _process_buffer.flush()
+    except Exception:
+        logger.exception("Could not write buffered activity on shutdown")
+
+
+atexit.register(_flush_process_buffer)
+
+
+def current_buffer():
+    return getattr(_state, 'buffer', None) or _process_buffer
+
+
+def _current_actor_id():
+    request = getattr(_state, 'request', None)
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.pk
+    return None
+
+
+def record(board_id, verb, task_id=None, **data):
+    """
+    Buffers an activity entry for `board_id`. The entry is only kept if the
+    surrounding transaction commits (immediately in autocommit mode).
+    """
+    event = Activity(
+        board_id=board_id, actor_id=_current_actor_id(), verb=verb,
+        task_id=task_id, data=data, created_at=timezone.now(),
+    )
+    transaction.on_commit(lambda: current_buffer().add(event))
+
+
+def flush():
+    """
+    Writes all buffered events of the current request and of the process.
+    """
+    written = 0
+    request_buffer = getattr(_state, 'buffer', None)
+    if request_buffer is not None:
+        written += request_buffer.flush()
+    return written + _process_buffer.flush()
+
+
+class ActivityMiddleware:
+    """
+    Makes the request's user the actor of recorded activity and writes the
+    request's events with a single INSERT after the view has finished.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = get_config()
+
+    def __call__(self, request):
+        per_request = self.config['buffer'] == 'request'
+        _state.request = request
+        _state.buffer = ActivityBuffer(self.config['max_events']) if per_request else None
+        try:
+            return self.get_response(request)
+        finally:
+            buffer = _state.buffer or _process_buffer
+            _state.request = None
+            _state.buffer = None
+            if per_request or buffer.is_due(self.config['flush_interval']):
+                try:
+                    buffer.flush()
+                except Exception:
+                    # Losing audit entries must not fail the request itself
+                    logger.exception("Could not write buffered activity")
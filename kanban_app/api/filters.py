@@ -0,0 +1,178 @@
+import base64
+import binascii
+import json
+from datetime import date
+
+from django.db import models
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+
+# ?ordering= values and the expressions they sort by; `id` is the tie-breaker of
+# every ordering, so (value, id) identifies a position for the keyset cursor.
+# Tasks without a due date come last in both directions.
+ORDERINGS = {
+    'id': (None, 'id'),
+    '-id': (None, '-id'),
+    'due_date': ('due_date', 'id'),
+    '-due_date': ('due_date', '-id'),
+}
+
+# Query parameters that are handled elsewhere (sparse fieldsets)
+PASSTHROUGH_PARAMS = {'fields', 'expand'}
+
+
+class CommaListField(serializers.ListField):
+    """
+    List given as one comma-separated query parameter, e.g. ?status=to-do,review.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = [part.strip() for part in data.split(',') if part.strip()]
+        return super().to_internal_value(data)
+
+
+class UserFilterField(serializers.Field):
+    """
+    A user id, `me` (the current user) or `none` (no user set).
+    """
+    default_error_messages = {'invalid': "Expected a user id, 'me' or 'none'."}
+
+    def to_internal_value(self, data):
+        if data in ('me', 'none'):
+            return data
+        try:
+            return int(data)
+        except (TypeError, ValueError):
+            self.fail('invalid')
+
+
+class BoardTaskQuerySerializer(serializers.Serializer):
+    """
+    Validates the query parameters of GET /api/boards/<id>/tasks/.
+    """
+    status = CommaListField(child=serializers.CharField(max_length=50), required=False, max_length=10)
+    priority = CommaListField(child=serializers.CharField(max_length=50), required=False, max_length=10)
+    assignee = UserFilterField(required=False)
+    reviewer = UserFilterField(required=False)
+    creator = UserFilterField(required=False)
+    due_after = serializers.DateField(required=False)
+    due_before = serializers.DateField(required=False)
+    ordering = serializers.ChoiceField(choices=list(ORDERINGS), default='id')
+    cursor = serializers.CharField(required=False)
+    page_size = serializers.IntegerField(min_value=1, max_value=200, default=50)
+
+    def validate(self, data):
+        if 'due_after' in data and 'due_before' in data and data['due_after'] > data['due_before']:
+            raise serializers.ValidationError("`due_after` must not be later than `due_before`.")
+        if 'cursor' in data:
+            data['cursor'] = decode_cursor(data['cursor'], data['ordering'])
+        return data
+
+
+def parse_task_query(request):
+    """
+    Validates all query parameters up front; unknown parameters and invalid
+    values raise a ValidationError (HTTP 400) before any query is built.
+    """
+    params = request.query_params.dict()
+    unknown = set(params) - set(BoardTaskQuerySerializer().fields) - PASSTHROUGH_PARAMS
+    if unknown:
+        raise ValidationError({name: ["Unknown query parameter."] for name in sorted(unknown)})
+    serializer = BoardTaskQuerySerializer(data=params)
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data
+
+
+def filter_tasks(queryset, query, user):
+    """
+    Applies the validated filters of `parse_task_query` to a task queryset.
+    """
+    for name in ('status', 'priority'):
+        if query.get(name):
+            queryset = queryset.filter(**{f'{name}__in': query[name]})
+
+    for name in ('assignee', 'reviewer', 'creator'):
+        value = query.get(name)
+        if value == 'none':
+            queryset = queryset.filter(**{f'{name}__isnull': True})
+        elif value is not None:
+            queryset = queryset.filter(**{f'{name}_id': user.pk if value == 'me' else value})
+
+    if 'due_after' in query:
+        queryset = queryset.filter(due_date__gte=query['due_after'])
+    if 'due_before' in query:
+        queryset = queryset.filter(due_date__lte=query['due_before'])
+    return queryset
+
+
+def order_tasks(queryset, ordering):
+    field, tie_breaker = ORDERINGS[ordering]
+    if field is None:
+        return queryset.order_by(tie_breaker)
+    descending = ordering.startswith('-')
+    expression = models.F(field).desc(nulls_last=True) if descending else models.F(field).asc(nulls_last=True)
+    return queryset.order_by(expression, tie_breaker)
+
+
+# Keyset (cursor) pagination
+
+def encode_cursor(ordering, value, last_id):
+    raw = json.dumps([ordering, value, last_id], default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor, ordering):
+    try:
+        cursor_ordering, value, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError, TypeError):
+        raise serializers.ValidationError({'cursor': ["Invalid cursor."]})
+    if cursor_ordering != ordering or not isinstance(last_id, int):
+        raise serializers.ValidationError({'cursor': ["Cursor does not match the ordering."]})
+    if value is not None:
+        try:
+            value = date.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise serializers.ValidationError({'cursor': ["Invalid cursor."]})
+    return value, last_id
+
+
+def after_cursor(queryset, ordering, cursor):
+    """
+    Restricts `queryset` to the rows after the (value, id) position of `cursor`.
+    """
+    value, last_id = cursor
+    field, _ = ORDERINGS[ordering]
+    after = 'lt' if ordering.startswith('-') else 'gt'
+    if field is None:
+        return queryset.filter(**{f'id__{after}': last_id})
+    if value is None:
+        # Already inside the trailing rows without a value
+        return queryset.filter(**{f'{field}__isnull': True, f'id__{after}': last_id})
+    return queryset.filter(
+        models.Q(**{f'{field}__{after}': value})
+        | models.Q(**{field: value, f'id__{after}': last_id})
+        | models.Q(**{f'{field}__isnull': True})
+    )
+
+
+def paginate_tasks(queryset, query):
+    """
+    Returns the ids of the requested page and the cursor of the next page (or None).
+
+    Only `(id, ordering value)` pairs are read; one row more than the page size
+    tells whether there is a next page.
+    """
+    ordering, page_size = query['ordering'], query['page_size']
+    field, _ = ORDERINGS[ordering]
+    if 'cursor' in query:
+        queryset = after_cursor(queryset, ordering, query['cursor'])
+
+    rows = list(order_tasks(queryset, ordering).values_list('id', field or 'id')[:page_size + 1])
+    page, more = rows[:page_size], len(rows) > page_size
+    next_cursor = None
+    if more:
+        last_id, value = page[-1]
+        next_cursor = encode_cursor(ordering, None if field is None else value, last_id)
+    return [task_id for task_id, _ in page], next_cursor
@@ -0,0 +1,119 @@
+import json
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+
+from auth_app.user_summaries import get_summaries
+from core.metrics import CACHE_REQUESTS
+from kanban_app.models import Task
+
+from .readers import task_data, task_user_ids, task_values
+
+
+# Prefix for all cache keys written by this module
+KEY_PREFIX = 'task-fragment'
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'bytes_saved': 0}
+
+
+def fragment_key(task_id, version):
+    """
+    Builds the cache key for one serialized task.
+
+    The version is part of the key, so a changed task simply stops
+    matching its old fragment; stale entries expire on their own.
+    """
+    return f'{KEY_PREFIX}:{task_id}:{version}'
+
+
+def _record(hits, misses, bytes_saved):
+    with _stats_lock:
+        _stats['hits'] += hits
+        _stats['misses'] += misses
+        _stats['bytes_saved'] += bytes_saved
+    if hits:
+        CACHE_REQUESTS.inc('task-fragment', 'hit', amount=hits)
+    if misses:
+        CACHE_REQUESTS.inc('task-fragment', 'miss', amount=misses)
+
+
+def get_stats():
+    """
+    Returns a snapshot of the fragment cache counters for monitoring.
+
+    - `hits` / `misses`: number of fragments served from / missing in the cache.
+    - `hit_ratio`: hits divided by all lookups (0.0 when nothing was looked up yet).
+    - `bytes_saved`: size of the JSON served from the cache instead of being re-serialized.
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = stats['hits'] / lookups if lookups else 0.0
+    return stats
+
+
+def _dump(data):
+    return json.dumps(data, separators=(',', ':'))
+
+
+def _serialize(tasks):
+    # Imported lazily to avoid a circular import with serializers.py
+    from .serializers import TaskSerializer
+
+    return [_dump(item) for item in TaskSerializer(tasks, many=True).data]
+
+
+def _timeout():
+    return getattr(settings, 'TASK_FRAGMENT_CACHE_TIMEOUT', 300)
+
+
+def render_tasks(queryset):
+    """
+    Returns the serialized tasks of `queryset` (in queryset order).
+
+    Only `(id, version)` pairs are read up front. Fragments are fetched from
+    the cache with one `get_many`; the missing tasks are read in a single
+    `.values()` query, rendered and written back with one `set_many`.
+    """
+    pairs = list(queryset.values_list('id', 'version'))
+    if not pairs:
+        return []
+
+    keys = {task_id: fragment_key(task_id, version) for task_id, version in pairs}
+    cached = cache.get_many(list(keys.values()))
+
+    missing_ids = [task_id for task_id, key in keys.items() if key not in cached]
+    if missing_ids:
+        fresh = {}
+        # Misses are rendered from plain rows (see readers.py), not model instances
+        rows = list(task_values(Task.objects.filter(pk__in=missing_ids)))
+        users = get_summaries(task_user_ids(rows))
+        for row in rows:
+            # Use the version that was actually serialized, not the one read above
+            key = keys[row['id']] = fragment_key(row['id'], row['version'])
+            fresh[key] = _dump(task_data(row, users))
+        cache.set_many(fresh, _timeout())
+        cached.update(fresh)
+
+    hit_bytes = sum(len(cached[keys[task_id]]) for task_id, _ in pairs if task_id not in missing_ids)
+    _record(len(pairs) - len(missing_ids), len(missing_ids), hit_bytes)
+
+    return [json.loads(cached[keys[task_id]]) for task_id, _ in pairs if keys[task_id] in cached]
+
+
+def render_task(task):
+    """
+    Returns the serialized representation of a single, already loaded task
+    and stores it in the fragment cache for subsequent list requests.
+    """
+    key = fragment_key(task.id, task.version)
+    fragment = cache.get(key)
+    if fragment is None:
+        _record(0, 1, 0)
+        fragment = _serialize([task])[0]
+        cache.set(key, fragment, _timeout())
+    else:
+        _record(1, 0, len(fragment))
+    return json.loads(fragment)
@@ -0,0 +1,12 @@
+from rest_framework.pagination import CursorPagination
+
+
+class ActivityPagination(CursorPagination):
+    """
+    Keyset pagination over the (board, created_at) index: every page is
+    one index range scan, no matter how deep the client pages.
+    """
+    ordering = '-created_at'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
@@ -0,0 +1,93 @@
+"""
+Read-only fast paths for list responses.
+
+The functions here read rows with `.values()` and build the response dicts
+directly, without model instances or per-row serializer fields; nested users
+come from the user summary cache with one lookup per response. Their output
+is identical to TaskSerializer, UserSummarySerializer and CommentSerializer;
+`python manage.py serializer_benchmark` compares both paths.
+"""
+
+from rest_framework import serializers
+
+from auth_app.user_summaries import get_summaries
+
+
+# Field objects are only used for their to_representation(), so one
+# instance each is shared by all rows (same formatting as the serializers)
+_date = serializers.DateField()
+_datetime = serializers.DateTimeField()
+
+USER_ROLES = ('assignee', 'reviewer', 'creator')
+
+TASK_COLUMNS = [
+    'id', 'board_id', 'title', 'description', 'status', 'priority',
+    'due_date', 'created_at', 'version', 'assignee_id', 'reviewer_id', 'creator_id',
+]
+
+COMMENT_COLUMNS = ['id', 'created_at', 'content', 'author_id']
+
+
+def task_user_ids(rows):
+    return {row[f'{role}_id'] for row in rows for role in USER_ROLES}
+
+
+def task_values(queryset):
+    """
+    Returns the rows needed by `task_data`, including the version
+    (used by the fragment cache), in queryset order.
+    """
+    return queryset.values(*TASK_COLUMNS)
+
+
+def task_data(row, users):
+    """
+    Builds the TaskSerializer representation of one `task_values` row;
+    `users` are the summaries of `get_summaries(task_user_ids(rows))`.
+    """
+    return {
+        'id': row['id'],
+        'board': row['board_id'],
+        'title': row['title'],
+        'description': row['description'],
+        'status': row['status'],
+        'priority': row['priority'],
+        'assignee': users.get(row['assignee_id']),
+        'reviewer': users.get(row['reviewer_id']),
+        'creator': users.get(row['creator_id']),
+        'due_date': _date.to_representation(row['due_date']) if row['due_date'] is not None else None,
+        'created_at': _datetime.to_representation(row['created_at']),
+        'comments_count': 0,  # Same placeholder as TaskSerializer.get_comments_count
+    }
+
+
+def serialize_tasks(queryset):
+    rows = list(task_values(queryset))
+    users = get_summaries(task_user_ids(rows))
+    return [task_data(row, users) for row in rows]
+
+
+def serialize_users(queryset):
+    """
+    Same output as UserSummarySerializer(queryset, many=True).
+    """
+    user_ids = list(queryset.values_list('id', flat=True))
+    users = get_summaries(user_ids)
+    return [users[user_id] for user_id in user_ids if user_id in users]
+
+
+def serialize_comments(queryset):
+    """
+    Same output as CommentSerializer(queryset, many=True).
+    """
+    rows = list(queryset.values(*COMMENT_COLUMNS))
+    users = get_summaries(row['author_id'] for row in rows)
+    return [
+        {
+            'id': row['id'],
+            'created_at': _datetime.to_representation(row['created_at']),
+            'author': users[row['author_id']]['fullname'] if row['author_id'] in users else "",
+            'content': row['content'],
+        }
+        for row in rows
+    ]
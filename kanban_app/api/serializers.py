@@ -1,6 +1,18 @@
+from datetime import timedelta
+from urllib.parse import urlsplit
+
 from rest_framework import serializers
-from kanban_app.models import Board, Task, Comment
+from kanban_app.models import Activity, Board, BoardDailyMetrics, Task, Comment, WebhookSubscription
+from kanban_app.webhooks import EVENTS as WEBHOOK_EVENTS, SCHEMES as WEBHOOK_SCHEMES, BlockedHostError, check_url
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import models
+from django.utils import timezone
+from auth_app.user_summaries import get_summaries, get_summary
+
+from .fragments import render_tasks
+from .readers import serialize_tasks
+from .sparse import SparseFieldsMixin
 
 
 class BoardSerializer(serializers.ModelSerializer):
@@ -45,34 +57,94 @@ class BoardSerializer(serializers.ModelSerializer):
         return board
 
 
+class UserSummaryListSerializer(serializers.ListSerializer):
+    """
+    Renders many users with one summary cache lookup.
+    """
+
+    def to_representation(self, data):
+        users = data.all() if isinstance(data, models.manager.BaseManager) else data
+        summaries = get_summaries(user.pk for user in users)
+        return [summaries.get(user.pk) for user in users]
+
+
 class UserSummarySerializer(serializers.ModelSerializer):
     """
     A lightweight representation of a user, used for nested output in tasks and boards.
+    Rendered from the user summary cache (auth_app/user_summaries.py).
     """
     fullname = serializers.SerializerMethodField()
 
     class Meta:
         model = User
         fields = ['id', 'email', 'fullname']
+        list_serializer_class = UserSummaryListSerializer
+
+    def to_representation(self, instance):
+        return get_summary(instance.pk)
 
     def get_fullname(self, obj):
-        try:
-            return obj.userprofile.fullname
-        except:
-            return ""
+        return get_summary(obj.pk)['fullname']
+
+
+class UserSummaryField(serializers.Field):
+    """
+    Nested user of a foreign key ({id, email, fullname}), read from the user
+    summary cache by the key column; the user row itself is never loaded.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        return getattr(instance, f'{self.source}_id')
+
+    def to_representation(self, value):
+        return get_summary(value)
+
+
+class UserPrimingListSerializer(serializers.ListSerializer):
+    """
+    List serializer for models with UserSummaryFields: the summaries of all
+    rows are loaded with one lookup, so the per-row lookups are local hits.
+    """
 
+    def to_representation(self, data):
+        rows = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        names = [name for name, field in self.child.fields.items() if isinstance(field, UserSummaryField)]
+        get_summaries(getattr(row, f'{self.child.fields[name].source}_id') for row in rows for name in names)
+        return super().to_representation(rows)
 
-class TaskSerializer(serializers.ModelSerializer):
+
+class TaskSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for reading task data with assignee, reviewer, and creator info.
+    Supports sparse output via the `fields` / `expand` arguments (see sparse.py).
     """
-    assignee = UserSummarySerializer(read_only=True)
-    reviewer = UserSummarySerializer(read_only=True)
-    creator = UserSummarySerializer(read_only=True)
+    expandable_fields = ('assignee', 'reviewer', 'creator')
+
+    # Database columns needed per output field (relations are handled separately)
+    field_columns = {
+        'id': ('id',),
+        'board': ('board',),
+        'title': ('title',),
+        'description': ('description',),
+        'status': ('status',),
+        'priority': ('priority',),
+        'due_date': ('due_date',),
+        'created_at': ('created_at',),
+        'comments_count': (),
+    }
+
+    assignee = UserSummaryField()
+    reviewer = UserSummaryField()
+    creator = UserSummaryField()
     comments_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Task
+        list_serializer_class = UserPrimingListSerializer
         fields = [
             'id', 'board', 'title', 'description',
             'status', 'priority',
@@ -84,6 +156,25 @@ class TaskSerializer(serializers.ModelSerializer):
     def get_comments_count(self, obj):
         return 0  # Placeholder until comment model relation is finalized
 
+    @classmethod
+    def setup_queryset(cls, queryset, fields=None, expand=None):
+        """
+        Restricts `queryset` to the columns needed to render the given fields.
+        Relations only read the foreign key column, expanded or not: nested
+        users come from the user summary cache.
+        """
+        fields = cls.Meta.fields if fields is None else fields
+
+        # The board column is always loaded: querysets from `board.tasks` read it
+        # to attach the board instance, which would cost one query per task otherwise
+        columns = ['id', 'board']
+        for name in fields:
+            if name in cls.expandable_fields:
+                columns.append(name)
+            else:
+                columns += cls.field_columns[name]
+        return queryset.only(*columns)
+
 
 class TaskCreateSerializer(serializers.ModelSerializer):
     """
@@ -121,22 +212,15 @@ class TaskCreateSerializer(serializers.ModelSerializer):
         return data
 
     def create(self, validated_data):
-        # Pop assignee/reviewer IDs and assign them manually
-        assignee_id = validated_data.pop('assignee_id', None)
-        reviewer_id = validated_data.pop('reviewer_id', None)
-
-        task = Task.objects.create(
+        # Assignee/reviewer are set in the INSERT itself, so the post_save receivers
+        # (status history, webhooks, caches) see the complete task
+        for role_field in ['assignee_id', 'reviewer_id']:
+            # Same as before: 0 (skipped by validate) means "nobody"
+            validated_data[role_field] = validated_data.get(role_field) or None
+        return Task.objects.create(
             creator=self.context['request'].user, **validated_data
         )
 
-        if assignee_id:
-            task.assignee = User.objects.get(pk=assignee_id)
-        if reviewer_id:
-            task.reviewer = User.objects.get(pk=reviewer_id)
-
-        task.save()
-        return task
-
 
 class TaskUpdateSerializer(serializers.ModelSerializer):
     """
@@ -184,7 +268,7 @@ class TaskUpdateSerializer(serializers.ModelSerializer):
 
 class CommentSerializer(serializers.ModelSerializer):
     """
-    Serializer for task comments. Includes author name via userprofile.
+    Serializer for task comments. Includes the author's fullname (from the user summary cache).
     """
     author = serializers.SerializerMethodField()
 
@@ -193,17 +277,33 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = ['id', 'created_at', 'author', 'content']
 
     def get_author(self, obj):
-        try:
-            return obj.author.userprofile.fullname
-        except:
-            return ""
+        summary = get_summary(obj.author_id)
+        return summary['fullname'] if summary else ""
+
+
+class ActivitySerializer(serializers.ModelSerializer):
+    """
+    Serializer for activity log entries; the actor is null for changes made outside of requests.
+    """
+    actor = UserSummaryField()
+
+    class Meta:
+        model = Activity
+        list_serializer_class = UserPrimingListSerializer
+        fields = ['id', 'verb', 'actor', 'task_id', 'data', 'created_at']
 
 
-class BoardDetailSerializer(serializers.ModelSerializer):
+class BoardDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Detailed board serializer including task list and member info.
+    Tasks are assembled from the shared serialized-task fragment cache.
+
+    Sparse task output is requested through the `task_fields` / `task_expand`
+    context entries; the cache is only used for the full representation.
     """
-    tasks = TaskSerializer(many=True, read_only=True)
+    expandable_fields = ('members',)
+
+    tasks = serializers.SerializerMethodField()
     owner_id = serializers.IntegerField(source='owner.id', read_only=True)
     members = UserSummarySerializer(many=True)
 
@@ -212,3 +312,127 @@ class BoardDetailSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'title', 'owner_id', 'members', 'tasks'
         ]
+
+    def get_tasks(self, obj):
+        fields = self.context.get('task_fields')
+        expand = self.context.get('task_expand')
+        if fields is None and expand is None:
+            # `uncached` renders from the database, e.g. to verify snapshots
+            if self.context.get('uncached'):
+                return serialize_tasks(obj.tasks.all())
+            return render_tasks(obj.tasks.all())
+
+        tasks = TaskSerializer.setup_queryset(obj.tasks.all(), fields, expand)
+        return TaskSerializer(tasks, many=True, fields=fields, expand=expand).data
+
+
+class BoardCloneSerializer(serializers.Serializer):
+    """
+    Validates the payload of POST /api/boards/<id>/clone/.
+    """
+    title = serializers.CharField(max_length=255, required=False)
+    include_comments = serializers.BooleanField(default=False)
+    reset_status = serializers.BooleanField(default=False)
+    reset_due_dates = serializers.BooleanField(default=False)
+    reset_assignees = serializers.BooleanField(default=False)
+
+
+class WebhookSubscriptionSerializer(serializers.ModelSerializer):
+    """
+    Webhook of a board; `events` limits which events are sent (empty: all).
+    The secret is generated on creation and signs every delivery.
+    """
+    events = serializers.ListField(child=serializers.ChoiceField(choices=WEBHOOK_EVENTS), required=False)
+
+    class Meta:
+        model = WebhookSubscription
+        fields = ['id', 'url', 'events', 'is_active', 'secret', 'failures', 'last_error', 'created_at']
+        read_only_fields = ['secret', 'failures', 'last_error', 'created_at']
+
+    def validate_url(self, value):
+        if urlsplit(value).scheme not in WEBHOOK_SCHEMES:
+            raise serializers.ValidationError("Webhooks can only be sent over http or https.")
+        try:
+            check_url(value)
+        except BlockedHostError:
+            raise serializers.ValidationError("Webhooks can only be sent to public addresses.")
+        except (OSError, UnicodeError):
+            raise serializers.ValidationError("The host of this URL cannot be resolved.")
+        return value
+
+
+class BoardDailyMetricsSerializer(serializers.ModelSerializer):
+    """
+    One day of flow metrics of a board; durations are in seconds.
+    """
+
+    class Meta:
+        model = BoardDailyMetrics
+        fields = [
+            'date', 'created', 'completed', 'reopened', 'transitions', 'entered',
+            'lead_time_p50', 'lead_time_p90', 'cycle_time_p50', 'cycle_time_p90',
+        ]
+
+
+class BoardMetricsQuerySerializer(serializers.Serializer):
+    """
+    Validates ?start= and ?end= of GET /api/boards/<id>/metrics/ (default: the last 30 days).
+    """
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, data):
+        end = data.get('end') or timezone.localdate()
+        start = data.get('start') or end - timedelta(days=29)
+        if start > end:
+            raise serializers.ValidationError("`start` must not be after `end`.")
+        limit = getattr(settings, 'BOARD_METRICS_MAX_DAYS', 366)
+        if (end - start).days >= limit:
+            raise serializers.ValidationError(f"At most {limit} days per request.")
+        return {'start': start, 'end': end}
+
+
+class BoardMemberInviteSerializer(serializers.Serializer):
+    """
+    Validates the payload of POST /api/boards/<id>/members/.
+    """
+    add = serializers.ListField(child=serializers.EmailField(), required=False)
+    remove = serializers.ListField(child=serializers.EmailField(), required=False)
+
+    def validate(self, data):
+        add, remove = data.get('add', []), data.get('remove', [])
+        if not add and not remove:
+            raise serializers.ValidationError("Provide at least one email in `add` or `remove`.")
+        if set(add) & set(remove):
+            raise serializers.ValidationError("An email cannot be added and removed at once.")
+        limit = getattr(settings, 'BOARD_INVITE_MAX_EMAILS', 100)
+        if len(add) + len(remove) > limit:
+            raise serializers.ValidationError(f"At most {limit} emails per request.")
+        return data
+
+
+class BatchRequestItemSerializer(serializers.Serializer):
+    """
+    One sub-request of a batch: HTTP method, API path (with optional query string) and JSON body.
+    """
+    method = serializers.ChoiceField(choices=['GET', 'POST', 'PUT', 'PATCH', 'DELETE'])
+    path = serializers.CharField()
+    body = serializers.JSONField(required=False, allow_null=True)
+
+    def validate_path(self, value):
+        if not value.startswith('/api/'):
+            raise serializers.ValidationError("Only /api/ routes can be batched.")
+        return value
+
+
+class BatchSerializer(serializers.Serializer):
+    """
+    Validates the payload of POST /api/batch/.
+    """
+    requests = BatchRequestItemSerializer(many=True, allow_empty=False)
+
+    def validate_requests(self, value):
+        limit = getattr(settings, 'BATCH_MAX_REQUESTS', 20)
+        if len(value) > limit:
+            raise serializers.ValidationError(f"At most {limit} requests per batch.")
+        return value
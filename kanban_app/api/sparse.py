@@ -0,0 +1,65 @@
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin that accepts two optional keyword arguments:
+
+    - `fields`: names of the fields to render (None renders all fields).
+    - `expand`: names of the relations in `expandable_fields` to render as
+      nested objects; the others are rendered as primary keys only.
+      None expands all of them, which is the regular output.
+    """
+    expandable_fields = ()
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+        if expand is not None:
+            for name in self.expandable_fields:
+                if name in self.fields and name not in expand:
+                    many = isinstance(self.fields[name], serializers.ListSerializer)
+                    self.fields[name] = serializers.PrimaryKeyRelatedField(many=many, read_only=True)
+
+
+def _split(value):
+    return {part.strip() for part in value.split(',') if part.strip()}
+
+
+def parse_sparse_params(request, allowed_fields, allowed_expand):
+    """
+    Reads `?fields=` and `?expand=` (comma-separated) from the request.
+
+    Returns a `(fields, expand)` tuple of sets; a parameter that is not present
+    is returned as None. Unknown names raise a ValidationError (HTTP 400).
+    """
+    params = {}
+    errors = {}
+    for name, allowed in (('fields', allowed_fields), ('expand', allowed_expand)):
+        value = request.query_params.get(name)
+        if value is None:
+            params[name] = None
+            continue
+        params[name] = _split(value)
+        unknown = params[name] - set(allowed)
+        if unknown:
+            errors[name] = [f"Unknown {name}: {', '.join(sorted(unknown))}."]
+
+    if errors:
+        raise ValidationError(errors)
+    return params['fields'], params['expand']
+
+
+def nested_params(names, prefix):
+    """
+    Returns the names below `prefix` (e.g. `tasks.title` -> `title` for prefix `tasks`),
+    or None if `names` is None.
+    """
+    if names is None:
+        return None
+    return {name[len(prefix) + 1:] for name in names if name.startswith(prefix + '.')}
@@ -0,0 +1,100 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models
+from django.utils import timezone
+
+from core.metrics import CACHE_REQUESTS
+from kanban_app.models import Board, Task
+
+
+# Tasks with this status are never counted as overdue or due this week
+DONE_STATUS = 'done'
+
+
+def summary_key(user_id):
+    return f'dashboard-summary:{user_id}'
+
+
+def invalidate_summaries(user_ids):
+    """
+    Drops the cached dashboard summary of every given user (None entries are ignored).
+    """
+    keys = [summary_key(user_id) for user_id in set(user_ids) if user_id is not None]
+    if keys:
+        cache.delete_many(keys)
+
+
+def _empty_counts():
+    return {'total': 0, 'by_status': {}, 'by_priority': {}, 'overdue': 0, 'due_this_week': 0}
+
+
+def build_summary(user):
+    """
+    Computes the dashboard counts of `user` with two queries:
+
+    - one COUNT over the boards the user owns or is a member of,
+    - one grouped aggregate over all tasks the user is assigned to or reviews,
+      split by role with conditional counts per (status, priority) group.
+    """
+    today = timezone.localdate()
+    # Sunday of the current week
+    week_end = today + timedelta(days=6 - today.weekday())
+    is_open = ~models.Q(status=DONE_STATUS)
+
+    board_count = Board.objects.filter(
+        models.Q(owner=user) | models.Q(members=user)
+    ).distinct().count()
+
+    roles = {'assigned': models.Q(assignee=user), 'reviewing': models.Q(reviewer=user)}
+    annotations = {}
+    for role, condition in roles.items():
+        annotations[role] = models.Count('id', filter=condition)
+        annotations[f'{role}_overdue'] = models.Count(
+            'id', filter=condition & is_open & models.Q(due_date__lt=today)
+        )
+        annotations[f'{role}_due_this_week'] = models.Count(
+            'id', filter=condition & is_open & models.Q(due_date__gte=today, due_date__lte=week_end)
+        )
+
+    groups = (
+        Task.objects
+        .filter(roles['assigned'] | roles['reviewing'], board__is_deleted=False)
+        .values('status', 'priority')
+        .annotate(**annotations)
+        .order_by()
+    )
+
+    summary = {'board_count': board_count}
+    for role in roles:
+        summary[role] = _empty_counts()
+
+    for group in groups:
+        for role in roles:
+            count = group[role]
+            if not count:
+                continue
+            counts = summary[role]
+            counts['total'] += count
+            counts['by_status'][group['status']] = counts['by_status'].get(group['status'], 0) + count
+            counts['by_priority'][group['priority']] = counts['by_priority'].get(group['priority'], 0) + count
+            counts['overdue'] += group[f'{role}_overdue']
+            counts['due_this_week'] += group[f'{role}_due_this_week']
+
+    return summary
+
+
+def get_summary(user):
+    """
+    Returns the dashboard summary of `user`, served from the cache when possible.
+    """
+    key = summary_key(user.id)
+    summary = cache.get(key)
+    if summary is None:
+        CACHE_REQUESTS.inc('dashboard-summary', 'miss')
+        summary = build_summary(user)
+        cache.set(key, summary, getattr(settings, 'DASHBOARD_SUMMARY_CACHE_TIMEOUT', 30))
+    else:
+        CACHE_REQUESTS.inc('dashboard-summary', 'hit')
+    return summary
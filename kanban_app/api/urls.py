@@ -2,13 +2,23 @@ from django.urls import path
 from .views import (
     BoardListCreateView,
     BoardRetrieveUpdateDeleteView,
+    BoardMembersView,
+    BoardCloneView,
+    BoardActivityView,
+    BoardMetricsView,
+    BoardWebhooksView,
+    BoardWebhookDetailView,
+    BoardTasksView,
     EmailCheckView,
     AssignedTasksView,
     ReviewingTasksView,
+    DashboardSummaryView,
     TaskCreateView,
     TaskUpdateDeleteView,
     CommentListCreateView,
-    CommentDeleteView
+    CommentDeleteView,
+    BatchView,
+    FragmentCacheStatsView
 )
 
 # URL patterns for Kanban-related API endpoints
@@ -24,6 +34,35 @@ urlpatterns = [
     # Endpoint: /api/boards/<id>/
     path('boards/<int:pk>/', BoardRetrieveUpdateDeleteView.as_view(), name='board-rud'),
 
+    # POST: Add/remove board members by email in one request
+    # Endpoint: /api/boards/<id>/members/
+    path('boards/<int:pk>/members/', BoardMembersView.as_view(), name='board-members'),
+
+    # POST: Copy a board with its members and tasks (optionally comments)
+    # Endpoint: /api/boards/<id>/clone/
+    path('boards/<int:pk>/clone/', BoardCloneView.as_view(), name='board-clone'),
+
+    # GET: Filtered, sorted and cursor-paginated tasks of a board
+    # Endpoint: /api/boards/<id>/tasks/
+    path('boards/<int:pk>/tasks/', BoardTasksView.as_view(), name='board-tasks'),
+
+    # GET: Activity log of a board (task, comment and member changes), newest first
+    # Endpoint: /api/boards/<id>/activity/
+    path('boards/<int:pk>/activity/', BoardActivityView.as_view(), name='board-activity'),
+
+    # GET: Daily flow metrics of a board (throughput, lead and cycle time)
+    # Endpoint: /api/boards/<id>/metrics/
+    path('boards/<int:pk>/metrics/', BoardMetricsView.as_view(), name='board-metrics'),
+
+    # GET: List the webhooks of a board (owner only)
+    # POST: Add a webhook for task and comment events
+    # Endpoint: /api/boards/<id>/webhooks/
+    path('boards/<int:pk>/webhooks/', BoardWebhooksView.as_view(), name='board-webhooks'),
+
+    # GET/PATCH/DELETE: Show, change or remove a webhook
+    # Endpoint: /api/boards/<id>/webhooks/<webhook_id>/
+    path('boards/<int:pk>/webhooks/<int:webhook_id>/', BoardWebhookDetailView.as_view(), name='board-webhook-detail'),
+
     # GET: Check if an email belongs to a registered user (used for inviting team members, etc.)
     # Endpoint: /api/email-check/
     path('email-check/', EmailCheckView.as_view(), name='email-check'),
@@ -36,6 +75,14 @@ urlpatterns = [
     # Endpoint: /api/tasks/reviewing/
     path('tasks/reviewing/', ReviewingTasksView.as_view(), name='reviewing-tasks'),
 
+    # GET: Hit ratio and bytes saved of the serialized-task fragment cache (staff only)
+    # Endpoint: /api/tasks/fragment-cache-stats/
+    path('tasks/fragment-cache-stats/', FragmentCacheStatsView.as_view(), name='task-fragment-cache-stats'),
+
+    # GET: Board count and task counts for the current user's dashboard
+    # Endpoint: /api/summary/
+    path('summary/', DashboardSummaryView.as_view(), name='dashboard-summary'),
+
     # POST: Create a new task
     # Endpoint: /api/tasks/
     path('tasks/', TaskCreateView.as_view(), name='task-create'),
@@ -53,4 +100,8 @@ urlpatterns = [
     # DELETE: Remove a specific comment from a task
     # Endpoint: /api/tasks/<task_id>/comments/<comment_id>/
     path('tasks/<int:task_id>/comments/<int:comment_id>/', CommentDeleteView.as_view(), name='comment-delete'),
+
+    # POST: Run several API requests in one round trip
+    # Endpoint: /api/batch/
+    path('batch/', BatchView.as_view(), name='batch'),
 ]
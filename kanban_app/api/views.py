@@ -1,20 +1,45 @@
+import secrets
+
 from rest_framework import mixins, generics, status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.exceptions import PermissionDenied
-from django.db import models
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from django.conf import settings
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
-
-from kanban_app.models import Board, Task, Comment
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+
+from kanban_app.models import Activity, Board, BoardDailyMetrics, Task, Comment, WebhookSubscription
+from kanban_app.webhooks import latest_event_id
+from kanban_app.cloning import clone_board
+from kanban_app.snapshots import get_snapshot_data, snapshot_etag
+from core.coalescing import SingleFlight
 from auth_app.models import UserProfile
-from .serializers import BoardSerializer, BoardDetailSerializer, TaskSerializer, TaskCreateSerializer, TaskUpdateSerializer, CommentSerializer
+from auth_app.user_summaries import get_summary as get_user_summary
+from .serializers import BoardSerializer, BoardDetailSerializer, TaskSerializer, TaskCreateSerializer, TaskUpdateSerializer, CommentSerializer, ActivitySerializer, BatchSerializer, BoardMemberInviteSerializer, BoardDailyMetricsSerializer, BoardMetricsQuerySerializer, BoardCloneSerializer, WebhookSubscriptionSerializer
+from .batch import run_batch
+from .filters import filter_tasks, order_tasks, paginate_tasks, parse_task_query
+from .pagination import ActivityPagination
+from .readers import serialize_comments
+from .fragments import get_stats as get_fragment_stats, render_task, render_tasks
+from .summary import get_summary
+from .sparse import nested_params, parse_sparse_params
+
+
+# Concurrent reads of the same board versions share one computation
+board_list_flight = SingleFlight('board-list')
+board_detail_flight = SingleFlight('board-detail')
 
 
 class BoardListCreateView(generics.ListCreateAPIView):
     """
     - GET /api/boards/: List all boards where the current user is a member or owner.
+      Requests for the same boards in the same versions are coalesced.
     - POST /api/boards/: Create a new board. The creator becomes the owner.
     """
     serializer_class = BoardSerializer
@@ -26,19 +51,71 @@ class BoardListCreateView(generics.ListCreateAPIView):
             models.Q(owner=user) | models.Q(members=user)
         ).distinct()
 
+    def list(self, request, *args, **kwargs):
+        # Which boards this user may see is decided per request; the counts of
+        # those boards only depend on their versions and are computed once for
+        # all requests asking for the same boards at the same time
+        boards = list(self.get_queryset().values_list('id', 'version'))
+        board_ids = [board_id for board_id, version in boards]
+        data = board_list_flight.run(tuple(boards), lambda: self.render_boards(board_ids))
+        return Response(data)
+
+    def render_boards(self, board_ids):
+        boards = Board.objects.in_bulk(board_ids)
+        return self.get_serializer([boards[pk] for pk in board_ids if pk in boards], many=True).data
+
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
 
+def board_update_data(board, members):
+    """
+    Response body of board updates: the board with owner and member details.
+    """
+    def user_data(user):
+        return {
+            "id": user.id,
+            "email": user.email,
+            "fullname": f"{user.first_name} {user.last_name}".strip()
+        }
+
+    return {
+        "id": board.id,
+        "title": board.title,
+        "owner_data": user_data(board.owner),
+        "members_data": [user_data(m) for m in members]
+    }
+
+
 class BoardRetrieveUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
     """
     - GET /api/boards/<id>/: View a specific board (if user is owner or member).
+      Served from the board's materialized snapshot (see kanban_app/snapshots.py);
+      concurrent requests for the same version share one snapshot read/render.
     - PATCH /api/boards/<id>/: Update board (if owner or member).
     - DELETE /api/boards/<id>/: Delete board (only if user is owner).
+      The board is soft-deleted; its tasks and comments are purged in the background.
     """
     queryset = Board.objects.all()
     permission_classes = [IsAuthenticated]
 
+    # Names accepted by ?fields= and ?expand= on GET, e.g.
+    # ?fields=id,title,tasks.id,tasks.title,tasks.status&expand=members
+    sparse_fields = BoardDetailSerializer.Meta.fields + [
+        f'tasks.{name}' for name in TaskSerializer.Meta.fields
+    ]
+    sparse_expand = list(BoardDetailSerializer.expandable_fields) + [
+        f'tasks.{name}' for name in TaskSerializer.expandable_fields
+    ]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method == 'GET':
+            # Members are needed for the permission check and the output
+            # (which renders them from the user summary cache)
+            queryset = queryset.prefetch_related('members')
+        return queryset
+
     def get_serializer_class(self):
         return BoardDetailSerializer if self.request.method == 'GET' else BoardSerializer
 
@@ -46,18 +123,45 @@ class BoardRetrieveUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
         board = super().get_object()
         user = self.request.user
 
-        if self.request.method == 'GET' and user != board.owner and user not in board.members.all():
+        # Compared by id, so the owner row is not loaded just for the check
+        is_owner = user.pk == board.owner_id
+
+        if self.request.method == 'GET' and not is_owner and user not in board.members.all():
             raise PermissionDenied("You do not have access to view this board.")
-        if self.request.method in ['PUT', 'PATCH'] and user != board.owner and user not in board.members.all():
+        if self.request.method in ['PUT', 'PATCH'] and not is_owner and user not in board.members.all():
             raise PermissionDenied("You do not have permission to edit this board.")
-        if self.request.method == 'DELETE' and user != board.owner:
+        if self.request.method == 'DELETE' and not is_owner:
             raise PermissionDenied("Only the owner can delete this board.")
 
         return board
 
     def retrieve(self, request, *args, **kwargs):
+        fields, expand = parse_sparse_params(request, self.sparse_fields, self.sparse_expand)
         board = self.get_object()
-        serializer = self.get_serializer(board)
+
+        # The full representation is served from the stored snapshot (already
+        # rendered JSON) once the permission check above has passed. Its ETag lets
+        # clients poll with If-None-Match (304 without reading the snapshot) and
+        # lets the compression middleware reuse the gzipped body
+        if fields is None and expand is None:
+            etag = snapshot_etag(board)
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                # A snapshot that is outdated is rendered once for all concurrent readers
+                data = board_detail_flight.run((board.pk, board.version), lambda: get_snapshot_data(board))
+                response = HttpResponse(data, content_type='application/json')
+            response['ETag'] = etag
+            return response
+
+        # `tasks.<name>` entries select/expand the fields of the nested tasks
+        task_fields = nested_params(fields, 'tasks') or None
+        task_expand = nested_params(expand, 'tasks')
+        if task_fields:
+            fields.add('tasks')
+
+        context = self.get_serializer_context()
+        context.update(task_fields=task_fields, task_expand=task_expand)
+        serializer = BoardDetailSerializer(board, fields=fields, expand=expand, context=context)
         return Response(serializer.data)
 
     def update(self, request, *args, **kwargs):
@@ -67,29 +171,180 @@ class BoardRetrieveUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
         serializer.is_valid(raise_exception=True)
         updated_board = serializer.save()
 
-        return Response({
-            "id": updated_board.id,
-            "title": updated_board.title,
-            "owner_data": {
-                "id": updated_board.owner.id,
-                "email": updated_board.owner.email,
-                "fullname": f"{updated_board.owner.first_name} {updated_board.owner.last_name}".strip()
-            },
-            "members_data": [
-                {
-                    "id": m.id,
-                    "email": m.email,
-                    "fullname": f"{m.first_name} {m.last_name}".strip()
-                } for m in updated_board.members.all()
-            ]
-        }, status=status.HTTP_200_OK)
+        return Response(
+            board_update_data(updated_board, updated_board.members.all()), status=status.HTTP_200_OK
+        )
 
     def destroy(self, request, *args, **kwargs):
         board = self.get_object()
-        board.delete()
+        board.soft_delete()
         return Response(None, status=status.HTTP_204_NO_CONTENT)
 
 
+class BoardMembersView(APIView):
+    """
+    - POST /api/boards/<id>/members/: Adds and/or removes members by email
+      (if user is owner or member), e.g. {"add": ["a@x.de", ...], "remove": [...]}.
+      Returns the updated board like PATCH /api/boards/<id>/, plus the
+      emails that do not belong to any user in `not_found`.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        serializer = BoardMemberInviteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        add = serializer.validated_data.get('add', [])
+        remove = serializer.validated_data.get('remove', [])
+
+        board = get_object_or_404(
+            Board.objects.select_related('owner').prefetch_related('members'), pk=pk
+        )
+        members = {member.pk: member for member in board.members.all()}
+        if request.user != board.owner and request.user.pk not in members:
+            raise PermissionDenied("You do not have permission to edit this board.")
+
+        # All emails are resolved with a single IN query
+        users_by_email = {}
+        for user in User.objects.filter(email__in=[*add, *remove]):
+            users_by_email.setdefault(user.email, []).append(user)
+        not_found = list(dict.fromkeys(email for email in [*add, *remove] if email not in users_by_email))
+
+        to_add = {user.pk: user for email in add for user in users_by_email.get(email, []) if user.pk not in members}
+        to_remove = {user.pk: user for email in remove for user in users_by_email.get(email, []) if user.pk in members}
+
+        # add()/remove() write the through rows with one INSERT / DELETE each
+        # and send m2m_changed, so caches and the activity log stay in sync
+        with transaction.atomic():
+            if to_add:
+                board.members.add(*to_add.values())
+            if to_remove:
+                board.members.remove(*to_remove.values())
+
+        # The response is built from the members loaded above, without re-reading them
+        updated_members = [member for pk, member in members.items() if pk not in to_remove]
+        updated_members += to_add.values()
+        data = board_update_data(board, updated_members)
+        data['not_found'] = not_found
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class BoardCloneView(APIView):
+    """
+    - POST /api/boards/<id>/clone/: Copies the board with its members and tasks
+      (if user is owner or member); the current user owns the copy. Options:
+      {"title": "...", "include_comments": false, "reset_status": false,
+       "reset_due_dates": false, "reset_assignees": false}.
+      Returns the new board like POST /api/boards/.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        serializer = BoardCloneSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        board = get_object_or_404(Board, pk=pk)
+        user = request.user
+        if user.pk != board.owner_id and not board.members.filter(pk=user.pk).exists():
+            raise PermissionDenied("You do not have access to view this board.")
+
+        clone = clone_board(board, user, **serializer.validated_data)
+        return Response(BoardSerializer(clone).data, status=status.HTTP_201_CREATED)
+
+
+class BoardActivityView(generics.ListAPIView):
+    """
+    - GET /api/boards/<id>/activity/: Activity log of the board, newest first
+      (if user is owner or member). Paginated with `?cursor=` / `?page_size=`.
+    """
+    serializer_class = ActivitySerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = ActivityPagination
+
+    def get_queryset(self):
+        board = get_object_or_404(Board, pk=self.kwargs['pk'])
+        user = self.request.user
+        if user.pk != board.owner_id and not board.members.filter(pk=user.pk).exists():
+            raise PermissionDenied("You do not have access to view this board.")
+        return Activity.objects.filter(board=board)
+
+
+class BoardMetricsView(generics.ListAPIView):
+    """
+    - GET /api/boards/<id>/metrics/: Daily flow metrics of the board (if user is owner or member):
+      created/completed/reopened tasks, transitions, and lead/cycle time percentiles.
+      Range with ?start=&end= (YYYY-MM-DD, default: the last 30 days); days without
+      status changes are left out. Served from the daily rollups only.
+    """
+    serializer_class = BoardDailyMetricsSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = None
+
+    def get_queryset(self):
+        board = get_object_or_404(Board, pk=self.kwargs['pk'])
+        user = self.request.user
+        if user.pk != board.owner_id and not board.members.filter(pk=user.pk).exists():
+            raise PermissionDenied("You do not have access to view this board.")
+        query = BoardMetricsQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+        return BoardDailyMetrics.objects.filter(
+            board=board, date__range=(query.validated_data['start'], query.validated_data['end'])
+        ).order_by('date')
+
+
+class WebhookOwnerMixin:
+    """
+    Webhooks of the board in the URL; only its owner may manage them.
+    """
+    serializer_class = WebhookSubscriptionSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_board(self):
+        board = get_object_or_404(Board, pk=self.kwargs['pk'])
+        if self.request.user.pk != board.owner_id:
+            raise PermissionDenied("Only the owner can manage the webhooks of this board.")
+        return board
+
+    def get_queryset(self):
+        return WebhookSubscription.objects.filter(board=self.get_board()).order_by('id')
+
+
+class BoardWebhooksView(WebhookOwnerMixin, generics.ListCreateAPIView):
+    """
+    - GET /api/boards/<id>/webhooks/: Webhooks of the board (owner only).
+    - POST /api/boards/<id>/webhooks/: Adds a webhook, e.g. {"url": "https://...", "events": ["task.updated"]}.
+      Task and comment changes from then on are POSTed to the URL in batches,
+      signed with the returned `secret` (X-KanMind-Signature: sha256=<HMAC of the body>).
+    """
+    pagination_class = None
+
+    def perform_create(self, serializer):
+        board = self.get_board()
+        limit = getattr(settings, 'BOARD_WEBHOOKS_MAX', 10)
+        if WebhookSubscription.objects.filter(board=board).count() >= limit:
+            raise ValidationError(f"A board can have at most {limit} webhooks.")
+        serializer.save(
+            board=board, created_by=self.request.user, secret=secrets.token_hex(32),
+            # Only events from now on
+            last_event_id=latest_event_id(),
+        )
+
+
+class BoardWebhookDetailView(WebhookOwnerMixin, generics.RetrieveUpdateDestroyAPIView):
+    """
+    - GET/PATCH/DELETE /api/boards/<id>/webhooks/<webhook_id>/: Shows, changes or removes
+      a webhook (owner only). Setting `is_active` to true re-enables a webhook that was
+      disabled after too many failed deliveries.
+    """
+    lookup_url_kwarg = 'webhook_id'
+    http_method_names = ['get', 'patch', 'delete', 'head', 'options']
+
+    def perform_update(self, serializer):
+        if serializer.validated_data.get('is_active') and not serializer.instance.is_active:
+            serializer.save(failures=0, last_error='', retry_at=timezone.now())
+        else:
+            serializer.save()
+
+
 class EmailCheckView(APIView):
     """
     - GET /api/email-check/?email=...:
@@ -103,38 +358,102 @@ class EmailCheckView(APIView):
             return Response({'detail': 'Email address is required.'}, status=400)
 
         try:
-            user = User.objects.get(email=email)
-            return Response({
-                "id": user.id,
-                "email": user.email,
-                "fullname": user.userprofile.fullname if hasattr(user, 'userprofile') else ""
-            })
+            user_id = User.objects.values_list('id', flat=True).get(email=email)
+            return Response(get_user_summary(user_id))
         except User.DoesNotExist:
             return Response({'detail': 'Email not found.'}, status=404)
     
 
-class AssignedTasksView(generics.ListAPIView):
+class TaskListView(generics.ListAPIView):
     """
-    - GET /api/tasks/assigned-to-me/: Returns tasks assigned to the current user.
+    Base class for task lists.
+
+    Supports `?fields=` and `?expand=` (assignee, reviewer, creator); only the
+    requested columns are selected and only expanded relations are joined.
+    The full representation is assembled from the fragment cache.
     """
     serializer_class = TaskSerializer
     permission_classes = [IsAuthenticated]
 
+    def list(self, request, *args, **kwargs):
+        fields, expand = parse_sparse_params(
+            request, TaskSerializer.Meta.fields, TaskSerializer.expandable_fields
+        )
+        if fields is None and expand is None:
+            return Response(render_tasks(self.get_queryset()))
+
+        tasks = TaskSerializer.setup_queryset(self.get_queryset(), fields, expand)
+        return Response(TaskSerializer(tasks, many=True, fields=fields, expand=expand).data)
+
+
+class AssignedTasksView(TaskListView):
+    """
+    - GET /api/tasks/assigned-to-me/: Returns tasks assigned to the current user.
+    """
+
     def get_queryset(self):
-        return Task.objects.filter(assignee=self.request.user)
+        return Task.objects.filter(assignee=self.request.user, board__is_deleted=False)
 
 
-class ReviewingTasksView(generics.ListAPIView):
+class ReviewingTasksView(TaskListView):
     """
     - GET /api/tasks/reviewing/: Returns tasks where the user is the reviewer.
     """
-    serializer_class = TaskSerializer
-    permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Task.objects.filter(reviewer=self.request.user)
+        return Task.objects.filter(reviewer=self.request.user, board__is_deleted=False)
     
 
+class BoardTasksView(TaskListView):
+    """
+    - GET /api/boards/<id>/tasks/: Tasks of a board (if user is owner or member).
+      Filters: ?status= and ?priority= (comma-separated), ?assignee=, ?reviewer=
+      and ?creator= (user id, `me` or `none`), ?due_after= / ?due_before= (YYYY-MM-DD).
+      Sorted by ?ordering= (id, -id, due_date, -due_date) and paginated with
+      ?cursor= / ?page_size=; ?fields= / ?expand= work like on the other task lists.
+      Unknown or invalid parameters are rejected with 400.
+    """
+
+    def list(self, request, *args, **kwargs):
+        query = parse_task_query(request)
+        fields, expand = parse_sparse_params(
+            request, TaskSerializer.Meta.fields, TaskSerializer.expandable_fields
+        )
+
+        board = get_object_or_404(Board, pk=self.kwargs['pk'])
+        user = request.user
+        if user.pk != board.owner_id and not board.members.filter(pk=user.pk).exists():
+            raise PermissionDenied("You do not have access to view this board.")
+
+        tasks = filter_tasks(Task.objects.filter(board=board), query, user)
+        ids, next_cursor = paginate_tasks(tasks, query)
+
+        # The page is loaded by id, in the same order as the keyset query
+        page = order_tasks(Task.objects.filter(pk__in=ids), query['ordering'])
+        if fields is None and expand is None:
+            results = render_tasks(page)
+        else:
+            page = TaskSerializer.setup_queryset(page, fields, expand)
+            results = TaskSerializer(page, many=True, fields=fields, expand=expand).data
+
+        url = request.build_absolute_uri()
+        return Response({
+            'next': replace_query_param(url, 'cursor', next_cursor) if next_cursor else None,
+            'results': results,
+        })
+
+
+class DashboardSummaryView(APIView):
+    """
+    - GET /api/summary/: Returns the board count and the assigned/reviewing task
+      counts (by status, by priority, overdue, due this week) of the current user.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(get_summary(request.user))
+
+
 class TaskCreateView(generics.CreateAPIView):
     """
     - POST /api/tasks/: Creates a new task.
@@ -147,12 +466,14 @@ class TaskCreateView(generics.CreateAPIView):
         return {'request': self.request}
 
     def perform_create(self, serializer):
-        serializer.save()
+        # The task and its webhook event are committed together
+        with transaction.atomic():
+            serializer.save()
 
     def create(self, request, *args, **kwargs):
         response = super().create(request, *args, **kwargs)
         created_task = Task.objects.get(pk=response.data['id'])
-        full_data = TaskSerializer(created_task).data
+        full_data = render_task(created_task)
         return Response(full_data, status=status.HTTP_201_CREATED)
     
 
@@ -168,7 +489,7 @@ class TaskUpdateDeleteView(generics.GenericAPIView,
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
-        task = get_object_or_404(Task, pk=self.kwargs['pk'])
+        task = get_object_or_404(Task, pk=self.kwargs['pk'], board__is_deleted=False)
         user = self.request.user
 
         if self.request.method == 'PATCH' and user != task.board.owner and user not in task.board.members.all():
@@ -186,7 +507,7 @@ class TaskUpdateDeleteView(generics.GenericAPIView,
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
         serializer.save()
-        full_data = TaskSerializer(instance).data
+        full_data = render_task(instance)
         return Response(full_data, status=status.HTTP_200_OK)
 
     def delete(self, request, *args, **kwargs):
@@ -203,11 +524,17 @@ class CommentListCreateView(generics.ListCreateAPIView):
 
     def get_queryset(self):
         task_id = self.kwargs['task_id']
-        return Comment.objects.filter(task_id=task_id).order_by('created_at')
+        return Comment.objects.filter(task_id=task_id, task__board__is_deleted=False).order_by('created_at')
+
+    def list(self, request, *args, **kwargs):
+        # Read-only output is built from plain rows (see readers.py)
+        return Response(serialize_comments(self.get_queryset()))
 
     def perform_create(self, serializer):
-        task = get_object_or_404(Task, pk=self.kwargs['task_id'])
-        serializer.save(author=self.request.user, task=task)
+        task = get_object_or_404(Task, pk=self.kwargs['task_id'], board__is_deleted=False)
+        # The comment and its webhook event are committed together
+        with transaction.atomic():
+            serializer.save(author=self.request.user, task=task)
 
 
 class CommentDeleteView(generics.DestroyAPIView):
@@ -221,4 +548,31 @@ class CommentDeleteView(generics.DestroyAPIView):
         comment = get_object_or_404(Comment, pk=self.kwargs['comment_id'])
         if comment.author != self.request.user:
             raise PermissionDenied("You may only delete your own comments.")
-        return comment
\ No newline at end of file
+        return comment
+
+
+class BatchView(APIView):
+    """
+    - POST /api/batch/: Runs a list of sub-requests against the other API routes
+      in one round trip, e.g. {"requests": [{"method": "GET", "path": "/api/boards/"}]}.
+      Sub-requests run in order with the caller's user; the response lists
+      their status codes and bodies in the same order.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        responses = run_batch(request, serializer.validated_data['requests'])
+        return Response({'responses': responses}, status=status.HTTP_200_OK)
+
+
+class FragmentCacheStatsView(APIView):
+    """
+    - GET /api/tasks/fragment-cache-stats/:
+      Returns hit ratio and bytes saved of the serialized-task fragment cache (staff only).
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(get_fragment_stats())
@@ -0,0 +1,127 @@
+from django.db import connection, transaction
+from django.utils import timezone
+
+from kanban_app.api.summary import invalidate_summaries
+from kanban_app.flow_metrics import DONE_STATUS
+from kanban_app.models import Board, Comment, Task, TaskStatusChange
+
+
+# Status of cloned tasks with `reset_status`
+INITIAL_STATUS = 'to-do'
+
+# Source tasks per INSERT ... SELECT (bound as parameters of its IN list)
+CHUNK_SIZE = 500
+
+
+def _table(model):
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def _column(model, name):
+    return connection.ops.quote_name(model._meta.get_field(name).column)
+
+
+def _insert_select(model, columns, source, params):
+    """
+    Runs INSERT INTO <model> (<columns>) SELECT <expressions> <source>.
+    `columns` maps field names to SQL expressions; `params` fills the
+    placeholders of the expressions and then of `source`, in that order.
+    Returns the number of inserted rows.
+    """
+    sql = 'INSERT INTO {} ({}) SELECT {} {}'.format(
+        _table(model),
+        ', '.join(_column(model, name) for name in columns),
+        ', '.join(columns.values()),
+        source,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def clone_board(board, owner, title=None, include_comments=False,
+                reset_status=False, reset_due_dates=False, reset_assignees=False):
+    """
+    Copies `board` with its members and tasks (and optionally comments) to a
+    new board owned by `owner`, in one transaction. Returns the new board.
+
+    Tasks are copied with INSERT ... SELECT in chunks of source ids, so no
+    task row passes through Python; comments are copied with `bulk_create`.
+    Neither sends signals, so what the per-row receivers would do is done
+    here in bulk (creation entries of the status history, dashboard cache
+    invalidation). The activity log of the new board starts empty.
+
+    The status history of a copy starts with its creation entry; copies that
+    are already done get none, so they are not counted as completed (with a
+    lead time of zero) on the day of the clone.
+    """
+    # Raw parameters are not converted by the fields, so the timestamp is adapted here
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    task, old = _table(Task), connection.ops.quote_name('old')
+
+    def task_column(name):
+        return f'{old}.{_column(Task, name)}'
+
+    with transaction.atomic():
+        clone = Board.objects.create(title=title or f"{board.title} (copy)", owner=owner)
+        member_ids = list(board.members.values_list('id', flat=True))
+        if member_ids:
+            # One INSERT of all through rows (and the usual m2m_changed receivers)
+            clone.members.add(*member_ids)
+
+        # Locked, so the tasks cannot change until the copies are mapped to them
+        source_ids = list(
+            Task.objects.select_for_update().filter(board=board).order_by('id').values_list('id', flat=True)
+        )
+        columns = {
+            'board': '%s',
+            'title': task_column('title'),
+            'description': task_column('description'),
+            'status': '%s' if reset_status else task_column('status'),
+            'priority': task_column('priority'),
+            'assignee': 'NULL' if reset_assignees else task_column('assignee'),
+            'reviewer': 'NULL' if reset_assignees else task_column('reviewer'),
+            'due_date': 'NULL' if reset_due_dates else task_column('due_date'),
+            'creator': task_column('creator'),
+            'created_at': '%s',
+            'version': '1',
+        }
+        for start in range(0, len(source_ids), CHUNK_SIZE):
+            chunk = source_ids[start:start + CHUNK_SIZE]
+            # In id order, so the copies get their ids in the order of their sources
+            _insert_select(Task, columns, 'FROM {} {} WHERE {} IN ({}) ORDER BY {}'.format(
+                task, old, task_column('id'), ', '.join(['%s'] * len(chunk)), task_column('id'),
+            ), [clone.pk, *([INITIAL_STATUS] if reset_status else []), now, *chunk])
+
+        # Same as kanban_app.signals.record_status_change for created tasks
+        _insert_select(TaskStatusChange, {
+            'board': _column(Task, 'board'),
+            'task_id': _column(Task, 'id'),
+            'from_status': "''",
+            'to_status': _column(Task, 'status'),
+            'changed_at': '%s',
+        }, f'FROM {task} WHERE {_column(Task, "board")} = %s AND {_column(Task, "status")} <> %s', [
+            now, clone.pk, DONE_STATUS,
+        ])
+
+        if include_comments:
+            copy_ids = Task.objects.filter(board=clone).order_by('id').values_list('id', flat=True)
+            new_task_ids = dict(zip(source_ids, copy_ids))
+            comments = (
+                Comment.objects
+                .filter(task__board=board)
+                .order_by('created_at', 'id')
+                .values_list('task_id', 'author_id', 'content')
+            )
+            Comment.objects.bulk_create((
+                Comment(task_id=new_task_ids[task_id], author_id=author_id, content=content)
+                for task_id, author_id, content in comments.iterator(chunk_size=2000)
+            ), batch_size=1000)
+
+        if not reset_assignees:
+            user_ids = set()
+            for assignee_id, reviewer_id in Task.objects.filter(board=clone).values_list('assignee_id', 'reviewer_id').distinct():
+                user_ids.update((assignee_id, reviewer_id))
+            transaction.on_commit(lambda: invalidate_summaries(user_ids))
+
+    return clone
@@ -0,0 +1,238 @@
+"""
+Daily "overdue / due soon" digests (`python manage.py send_digests`).
+
+All digests of a day are computed in one pass: the open tasks due up to the
+horizon are streamed ordered by assignee and by reviewer (both read along the
+(user, due_date) indexes) and merged, so each user's tasks arrive together.
+Digests are written with `bulk_create` per batch of users, together with the
+checkpoint (DigestRun.last_user_id) in the same transaction; an interrupted
+run resumes after the last written user. Delivery goes through a pluggable
+backend and marks the digests as delivered afterwards, so a digest may be
+delivered twice after a crash, but never not at all.
+"""
+
+import heapq
+import itertools
+import json
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from auth_app.user_summaries import get_summaries
+from kanban_app.models import Digest, DigestRun, Task
+
+
+DEFAULTS = {
+    # Tasks due within this many days (including today) are "due soon"
+    'due_soon_days': 3,
+    # Users per bulk_create / checkpoint / delivery batch
+    'batch_size': 1000,
+    # Delivery backend (dotted path) and its keyword arguments
+    'backend': 'kanban_app.digests.ConsoleBackend',
+    'options': {},
+}
+
+# Tasks with this status are finished and never part of a digest
+DONE_STATUS = 'done'
+
+ROLES = ('assignee', 'reviewer')
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'DIGESTS', {})}
+
+
+def get_backend(path=None, **options):
+    """
+    Returns an instance of the configured delivery backend (or of `path`).
+    """
+    config = get_config()
+    backend_class = import_string(path or config['backend'])
+    return backend_class(**{**config['options'], **options})
+
+
+class BaseBackend:
+    """
+    Delivers rendered digests. Subclasses implement `send(messages)`, where each
+    message is a dict with `to`, `subject`, `body`, `date` and `user`.
+    """
+
+    def __init__(self, **options):
+        self.options = options
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def render(self, digest, user):
+        lines = [f"Hello {user['fullname'] or user['email']},", ""]
+        for item in digest.items:
+            label = 'overdue' if item['overdue'] else 'due'
+            lines.append(f"- [{label} {item['due_date']}] {item['title']} (board {item['board']}, {', '.join(item['roles'])})")
+        return {
+            'to': user['email'],
+            'user': digest.user_id,
+            'date': digest.date,
+            'subject': f"KanMind: {digest.overdue_count} overdue, {digest.due_soon_count} due soon",
+            'body': '\n'.join(lines),
+        }
+
+    def send(self, messages):
+        raise NotImplementedError
+
+
+class ConsoleBackend(BaseBackend):
+    """
+    Writes the digests to stdout (or the `stream` option); for development.
+    """
+
+    def send(self, messages):
+        stream = self.options.get('stream') or sys.stdout
+        for message in messages:
+            stream.write(f"To: {message['to']}\nSubject: {message['subject']}\n\n{message['body']}\n{'-' * 70}\n")
+        stream.flush()
+
+
+class FileBackend(BaseBackend):
+    """
+    Appends the digests as JSON lines to `<directory>/digests-<date>.jsonl`.
+    """
+
+    def send(self, messages):
+        directory = Path(self.options.get('directory') or Path(settings.BASE_DIR) / 'digests')
+        directory.mkdir(parents=True, exist_ok=True)
+        for date, group in itertools.groupby(messages, key=lambda message: message['date']):
+            with open(directory / f'digests-{date}.jsonl', 'a') as file:
+                for message in group:
+                    file.write(json.dumps(message, cls=DjangoJSONEncoder) + '\n')
+
+
+def _task_stream(role, horizon, after_user_id):
+    """
+    Yields (user id, due date, task id, board id, title, role) of the open tasks
+    due up to `horizon` where the user has `role`, ordered by user and due date.
+    """
+    rows = (
+        Task.objects
+        .filter(**{f'{role}_id__gt': after_user_id}, due_date__lte=horizon, board__is_deleted=False)
+        .exclude(status=DONE_STATUS)
+        .order_by(f'{role}_id', 'due_date', 'id')
+        .values_list(f'{role}_id', 'due_date', 'id', 'board_id', 'title')
+        .iterator(chunk_size=2000)
+    )
+    return (row + (role,) for row in rows)
+
+
+def build_digest(user_id, rows, day):
+    """
+    Builds the (unsaved) digest of one user from their merged task rows.
+    """
+    items = {}
+    for _, due_date, task_id, board_id, title, role in rows:
+        item = items.get(task_id)
+        if item is not None:
+            # Assignee and reviewer of the same task
+            item['roles'].append(role)
+            continue
+        items[task_id] = {
+            'task': task_id,
+            'board': board_id,
+            'title': title,
+            'due_date': due_date,
+            'roles': [role],
+            'overdue': due_date < day,
+        }
+    items = list(items.values())
+    overdue = sum(item['overdue'] for item in items)
+    return Digest(
+        user_id=user_id, date=day, items=items,
+        overdue_count=overdue, due_soon_count=len(items) - overdue,
+    )
+
+
+def _write_batch(run, digests):
+    """
+    Stores a batch of digests and advances the checkpoint in one transaction.
+    """
+    with transaction.atomic():
+        # Conflicts only occur if digests of this day were written outside of the run
+        Digest.objects.bulk_create(digests, ignore_conflicts=True)
+        run.last_user_id = digests[-1].user_id
+        DigestRun.objects.filter(pk=run.pk).update(
+            last_user_id=run.last_user_id, digests=models.F('digests') + len(digests)
+        )
+
+
+def deliver_pending(day, backend, batch_size):
+    """
+    Delivers all digests of `day` that were not delivered yet.
+    Returns their number.
+    """
+    delivered = 0
+    pending = Digest.objects.filter(date=day, delivered_at__isnull=True).order_by('user_id')
+    while True:
+        digests = list(pending[:batch_size])
+        if not digests:
+            return delivered
+        users = get_summaries(digest.user_id for digest in digests)
+        messages = [backend.render(digest, users[digest.user_id]) for digest in digests if digest.user_id in users]
+        backend.send(messages)
+        Digest.objects.filter(pk__in=[digest.pk for digest in digests]).update(delivered_at=timezone.now())
+        delivered += len(digests)
+
+
+def run_digests(day, backend, restart=False, log=None):
+    """
+    Computes, stores and delivers the digests of `day`, resuming an unfinished
+    run of the same day. Returns the DigestRun.
+    """
+    config = get_config()
+    batch_size = config['batch_size']
+    # `due_soon_days` includes today: with 3, tasks due today, tomorrow and the day after
+    horizon = day + timedelta(days=config['due_soon_days'] - 1)
+    log = log or (lambda message: None)
+
+    run, _ = DigestRun.objects.get_or_create(date=day)
+    if restart:
+        Digest.objects.filter(date=day).delete()
+        run.last_user_id, run.digests, run.started_at, run.finished_at = 0, 0, timezone.now(), None
+        run.save()
+    elif run.finished_at:
+        log(f"Digests of {day} were already computed ({run.digests} digests).")
+    elif run.last_user_id:
+        log(f"Resuming after user {run.last_user_id} ({run.digests} digests written).")
+
+    backend.open()
+    try:
+        # Left over from an interrupted run: written but not delivered
+        deliver_pending(day, backend, batch_size)
+        if run.finished_at:
+            return run
+
+        merged = heapq.merge(*(_task_stream(role, horizon, run.last_user_id) for role in ROLES))
+        batch = []
+        for user_id, rows in itertools.groupby(merged, key=lambda row: row[0]):
+            batch.append(build_digest(user_id, rows, day))
+            if len(batch) >= batch_size:
+                _write_batch(run, batch)
+                deliver_pending(day, backend, batch_size)
+                log(f"Up to user {run.last_user_id}")
+                batch = []
+        if batch:
+            _write_batch(run, batch)
+            deliver_pending(day, backend, batch_size)
+
+        run.refresh_from_db()
+        run.finished_at = timezone.now()
+        run.save(update_fields=['finished_at'])
+        return run
+    finally:
+        backend.close()
@@ -0,0 +1,114 @@
+"""
+Flow metrics (lead time, cycle time, throughput) from the task status history.
+
+Every status change is stored as a TaskStatusChange row by a signal receiver.
+`rollup_day` aggregates one day of that history into a BoardDailyMetrics row
+per board; GET /api/boards/<id>/metrics/ only reads those rollups.
+"""
+
+import math
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import models, transaction
+from django.utils import timezone
+
+from kanban_app.models import BoardDailyMetrics, Task, TaskStatusChange
+
+
+# A task is completed when it enters DONE_STATUS; its cycle starts
+# when it first enters START_STATUS
+DONE_STATUS = 'done'
+START_STATUS = 'in-progress'
+
+
+def day_bounds(day):
+    """
+    Returns the start and end (exclusive) of `day` in the current time zone.
+    """
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    return start, end
+
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile of `values` (seconds, rounded), None for no values.
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[max(math.ceil(fraction * len(values)) - 1, 0)])
+
+
+def task_start_times(task_ids, before):
+    """
+    Returns {task id: (created, started)} from the history before `before`;
+    tasks created before the history existed fall back to Task.created_at.
+    """
+    rows = (
+        TaskStatusChange.objects
+        .filter(task_id__in=task_ids, changed_at__lt=before)
+        .values('task_id')
+        .annotate(
+            created=models.Min('changed_at', filter=models.Q(from_status='')),
+            started=models.Min('changed_at', filter=models.Q(to_status=START_STATUS)),
+        )
+    )
+    times = {row['task_id']: (row['created'], row['started']) for row in rows}
+
+    missing = [task_id for task_id in task_ids if times.get(task_id, (None,))[0] is None]
+    for task_id, created_at in Task.objects.filter(pk__in=missing).values_list('id', 'created_at'):
+        times[task_id] = (created_at, times.get(task_id, (None, None))[1])
+    return times
+
+
+def rollup_day(day):
+    """
+    (Re)computes the BoardDailyMetrics rows of `day` for all boards with
+    status changes on that day. Returns the number of rows written.
+    """
+    start, end = day_bounds(day)
+    changes = (
+        TaskStatusChange.objects
+        .filter(changed_at__gte=start, changed_at__lt=end)
+        .values_list('board_id', 'task_id', 'from_status', 'to_status', 'changed_at')
+    )
+
+    boards = defaultdict(lambda: {'created': 0, 'reopened': 0, 'transitions': 0, 'entered': Counter(), 'done': []})
+    for board_id, task_id, from_status, to_status, changed_at in changes.iterator(chunk_size=2000):
+        board = boards[board_id]
+        board['transitions'] += 1
+        board['entered'][to_status] += 1
+        if not from_status:
+            board['created'] += 1
+        elif from_status == DONE_STATUS:
+            board['reopened'] += 1
+        if to_status == DONE_STATUS:
+            board['done'].append((task_id, changed_at))
+
+    task_ids = list({task_id for board in boards.values() for task_id, _ in board['done']})
+    starts = task_start_times(task_ids, end) if task_ids else {}
+
+    rows = []
+    for board_id, board in boards.items():
+        lead_times, cycle_times = [], []
+        for task_id, done_at in board['done']:
+            created, started = starts.get(task_id, (None, None))
+            if created is not None:
+                lead_times.append((done_at - created).total_seconds())
+            if started is not None and started <= done_at:
+                cycle_times.append((done_at - started).total_seconds())
+        rows.append(BoardDailyMetrics(
+            board_id=board_id, date=day,
+            created=board['created'], completed=len(board['done']), reopened=board['reopened'],
+            transitions=board['transitions'], entered=dict(board['entered']),
+            lead_time_p50=percentile(lead_times, 0.5), lead_time_p90=percentile(lead_times, 0.9),
+            cycle_time_p50=percentile(cycle_times, 0.5), cycle_time_p90=percentile(cycle_times, 0.9),
+        ))
+
+    # Replaces an earlier rollup of the same day, so reruns are safe
+    with transaction.atomic():
+        BoardDailyMetrics.objects.filter(date=day).delete()
+        BoardDailyMetrics.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
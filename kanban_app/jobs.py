@@ -0,0 +1,151 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from kanban_app.models import Activity, Board, Comment, Job, Task, TaskStatusChange, WebhookEvent
+from kanban_app.signals import muted
+from kanban_app.snapshots import rebuild_snapshot
+
+
+logger = logging.getLogger(__name__)
+
+# Number of attempts before a job is marked as failed for good
+MAX_ATTEMPTS = 5
+
+# Handlers by job kind; each receives the job's payload as keyword arguments
+HANDLERS = {}
+
+
+def handler(kind):
+    """
+    Registers the decorated function as the handler for jobs of `kind`.
+    """
+    def register(func):
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+def enqueue(kind, delay=None, **payload):
+    """
+    Stores a new pending job. `delay` (a timedelta) postpones its execution.
+    """
+    available_at = timezone.now() + delay if delay else timezone.now()
+    return Job.objects.create(kind=kind, payload=payload, available_at=available_at)
+
+
+def _lease_timeout():
+    return timedelta(seconds=getattr(settings, 'JOB_LEASE_TIMEOUT', 600))
+
+
+def claim_next_job():
+    """
+    Claims the next due job for this worker, or returns None if there is none.
+
+    The status is switched with a conditional UPDATE, so two workers
+    never run the same job. Jobs that have been running for longer than
+    JOB_LEASE_TIMEOUT belong to a worker that died and are claimed again
+    (handlers are idempotent); after MAX_ATTEMPTS they are marked as failed.
+    """
+    while True:
+        now = timezone.now()
+        job = (
+            Job.objects
+            .filter(
+                Q(status=Job.STATUS_PENDING, available_at__lte=now)
+                | Q(status=Job.STATUS_RUNNING, updated_at__lt=now - _lease_timeout())
+            )
+            .order_by('available_at', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+
+        # Matching the loaded state, so only one worker wins an expired lease as well
+        unclaimed = Job.objects.filter(pk=job.pk, status=job.status, updated_at=job.updated_at)
+        if job.status == Job.STATUS_RUNNING and job.attempts >= MAX_ATTEMPTS:
+            unclaimed.update(status=Job.STATUS_FAILED, last_error="Worker lost", updated_at=now)
+            logger.error("Job %s failed: worker lost %s times", job, job.attempts)
+            continue
+
+        claimed = unclaimed.update(status=Job.STATUS_RUNNING, attempts=job.attempts + 1, updated_at=now)
+        if claimed:
+            if job.status == Job.STATUS_RUNNING:
+                logger.warning("Reclaiming job %s after its lease expired", job)
+            job.status = Job.STATUS_RUNNING
+            job.attempts += 1
+            job.updated_at = now
+            return job
+
+
+def run_job(job):
+    """
+    Runs a claimed job and records the outcome. Failed jobs are retried with
+    an exponential backoff until MAX_ATTEMPTS is reached.
+    """
+    try:
+        HANDLERS[job.kind](**job.payload)
+    except Exception as exc:
+        logger.exception("Job %s failed", job)
+        job.last_error = str(exc)
+        if job.attempts >= MAX_ATTEMPTS:
+            job.status = Job.STATUS_FAILED
+        else:
+            job.status = Job.STATUS_PENDING
+            job.available_at = timezone.now() + timedelta(seconds=2 ** job.attempts)
+        job.save(update_fields=['status', 'last_error', 'available_at', 'updated_at'])
+        return False
+
+    job.status = Job.STATUS_DONE
+    job.save(update_fields=['status', 'updated_at'])
+    return True
+
+
+def _delete_in_chunks(queryset, chunk_size):
+    """
+    Deletes the rows of `queryset` in chunks of `chunk_size`, each in its own
+    short transaction, so other requests can write in between.
+    Returns the number of deleted rows.
+    """
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            ids = list(queryset.values_list('id', flat=True)[:chunk_size])
+            if not ids:
+                return deleted
+            queryset.model.objects.filter(pk__in=ids).delete()
+        deleted += len(ids)
+
+
+@handler(Job.KIND_PURGE_BOARD)
+def purge_board(board_id):
+    """
+    Removes a soft-deleted board: first its comments, tasks, activity entries,
+    status history and webhook events (in bounded chunks), and finally the board row itself.
+    """
+    chunk_size = getattr(settings, 'BOARD_PURGE_CHUNK_SIZE', 500)
+
+    # Per-row receivers (cache invalidation etc.) are pointless for rows of a
+    # board nobody can see anymore
+    with muted():
+        comments = _delete_in_chunks(Comment.objects.filter(task__board_id=board_id), chunk_size)
+        tasks = _delete_in_chunks(Task.objects.filter(board_id=board_id), chunk_size)
+        _delete_in_chunks(Activity.objects.filter(board_id=board_id), chunk_size)
+        _delete_in_chunks(TaskStatusChange.objects.filter(board_id=board_id), chunk_size)
+        _delete_in_chunks(WebhookEvent.objects.filter(board_id=board_id), chunk_size)
+        with transaction.atomic():
+            Board.all_objects.filter(pk=board_id, is_deleted=True).delete()
+
+    logger.info("Purged board %s (%s tasks, %s comments)", board_id, tasks, comments)
+
+
+@handler(Job.KIND_REBUILD_SNAPSHOT)
+def rebuild_board_snapshot(board_id):
+    """
+    Re-renders the stored GET /api/boards/<id>/ response after board changes.
+    """
+    rebuild_snapshot(board_id)
@@ -0,0 +1,73 @@
+import difflib
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from kanban_app.models import Board, BoardSnapshot
+from kanban_app.snapshots import render_board, store_snapshot
+
+
+class Command(BaseCommand):
+    """
+    Compares the stored board snapshots with a live rendering of each board.
+
+    - current: snapshot version matches the board and the data is identical
+    - outdated: the board changed since the snapshot was built (expected while
+      a rebuild is pending; such snapshots are never served)
+    - mismatch: same version but different data, i.e. a change that did not
+      bump Board.version (a bug)
+    - missing: boards without a snapshot yet
+
+    The live rendering reads the tasks from the database, not from the
+    fragment cache (nested users still come from the user summary cache).
+
+    Usage:
+        python manage.py check_board_snapshots
+        python manage.py check_board_snapshots --board 12 --diff
+        python manage.py check_board_snapshots --fix
+    """
+    help = "Diffs stored board snapshots against live serialization."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--board', type=int, action='append', dest='boards', help="Only check this board id.")
+        parser.add_argument('--diff', action='store_true', help="Print a diff for every mismatch.")
+        parser.add_argument('--fix', action='store_true', help="Rebuild outdated, mismatched and missing snapshots.")
+
+    def handle(self, *args, **options):
+        boards = Board.objects.prefetch_related('members').order_by('id')
+        if options['boards']:
+            boards = boards.filter(pk__in=options['boards'])
+        snapshots = {
+            snapshot.board_id: snapshot
+            for snapshot in BoardSnapshot.objects.filter(board__in=boards)
+        }
+
+        counts = {'current': 0, 'outdated': 0, 'mismatch': 0, 'missing': 0}
+        for board in boards.iterator(chunk_size=100):
+            snapshot = snapshots.get(board.pk)
+            if snapshot is None:
+                state = 'missing'
+            elif snapshot.version != board.version:
+                state = 'outdated'
+            else:
+                live = render_board(board, uncached=True)
+                state = 'current' if live == snapshot.data else 'mismatch'
+                if state == 'mismatch':
+                    self.stdout.write(self.style.ERROR(f"Board {board.pk}: snapshot v{snapshot.version} differs"))
+                    if options['diff']:
+                        self.write_diff(snapshot.data, live)
+            counts[state] += 1
+
+            if options['fix'] and state != 'current':
+                store_snapshot(board, uncached=True)
+
+        self.stdout.write(', '.join(f"{count} {state}" for state, count in counts.items()))
+        if counts['mismatch'] and not options['fix']:
+            raise CommandError(f"{counts['mismatch']} snapshot(s) differ from the live data.")
+
+    def write_diff(self, stored, live):
+        def lines(data):
+            return json.dumps(json.loads(data), indent=2, sort_keys=True).splitlines()
+
+        for line in difflib.unified_diff(lines(stored), lines(live), 'snapshot', 'live', lineterm=''):
+            self.stdout.write(f"    {line}")
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from kanban_app.webhooks import ConnectionPool, deliver_due, get_config, purge_delivered
+
+
+class Command(BaseCommand):
+    """
+    Delivery worker for webhooks: sends the outbox events (WebhookEvent) to
+    every due subscription in batches, over one keep-alive connection per
+    host, and retries failing endpoints with an exponential backoff.
+
+    Usage:
+        python manage.py deliver_webhooks            # run forever
+        python manage.py deliver_webhooks --once     # deliver until nothing is due, then exit
+    """
+    help = "Delivers pending webhook events."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Exit as soon as no events were delivered in a round.")
+        parser.add_argument(
+            '--sleep', type=float, default=1.0,
+            help="Seconds to wait after a round without deliveries (default: 1)."
+        )
+
+    def handle(self, *args, **options):
+        pool = ConnectionPool(get_config()['timeout'])
+        last_purge = 0.0
+        try:
+            while True:
+                if time.monotonic() - last_purge > 3600:
+                    purge_delivered()
+                    last_purge = time.monotonic()
+
+                delivered = deliver_due(pool)
+                if delivered:
+                    self.stdout.write(f"Delivered {delivered} events")
+                    continue
+                if options['once']:
+                    return
+                time.sleep(options['sleep'])
+        finally:
+            pool.close()
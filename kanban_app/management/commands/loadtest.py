@@ -0,0 +1,438 @@
+import http.client
+import json
+import os
+import queue
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Default traffic mix: route name -> relative weight
+DEFAULT_MIX = 'board_read=50,board_list=10,summary=10,task_create=10,task_patch=12,comment_post=8'
+
+PASSWORD = 'load-test-password'
+
+
+def parse_mix(value):
+    """
+    Parses "route=weight,route=weight" into a dict, validating the route names.
+    """
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ROUTES:
+            raise CommandError(f"Unknown route '{name}'. Available: {', '.join(ROUTES)}")
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise CommandError(f"Invalid weight for route '{name}': {weight!r}")
+    return mix
+
+
+def percentile(sorted_values, fraction):
+    """
+    Nearest-rank percentile of an already sorted list (0.0 for an empty list).
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class Client:
+    """
+    Minimal JSON client on a keep-alive HTTP connection (one per worker thread).
+    """
+
+    def __init__(self, port):
+        self.port = port
+        self.connection = None
+
+    def request(self, method, path, token=None, body=None):
+        headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Token {token}'
+        payload = json.dumps(body) if body is not None else None
+
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+        try:
+            self.connection.request(method, path, body=payload, headers=headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            # Drop the broken connection; the next request opens a new one
+            self.connection.close()
+            self.connection = None
+            raise
+
+        if response.getheader('Connection', '').lower() == 'close':
+            self.connection.close()
+            self.connection = None
+        try:
+            return response.status, (json.loads(data) if data else None)
+        except ValueError:
+            # E.g. Django's HTML error page for a 500 ("database is locked")
+            return response.status, None
+
+
+class Scenario:
+    """
+    Test data shared by all workers: logged-in users, their boards and tasks.
+    """
+
+    def __init__(self):
+        self.users = []          # (user_id, token, board_id)
+        self.tasks = defaultdict(list)
+        self.lock = threading.Lock()
+
+    def pick_user(self):
+        return random.choice(self.users)
+
+    def pick_task(self, board_id):
+        """
+        Returns a random task of the board, or None if it has none yet.
+        """
+        with self.lock:
+            tasks = self.tasks[board_id]
+            return random.choice(tasks) if tasks else None
+
+    def add_task(self, board_id, task_id):
+        with self.lock:
+            self.tasks[board_id].append(task_id)
+
+
+# Each route takes (client, scenario) and returns the HTTP status,
+# or a string naming why no request could be sent
+NO_TASK = 'no task'
+
+
+def _board_read(client, scenario):
+    _, token, board_id = scenario.pick_user()
+    return client.request('GET', f'/api/boards/{board_id}/', token)[0]
+
+
+def _board_list(client, scenario):
+    _, token, _ = scenario.pick_user()
+    return client.request('GET', '/api/boards/', token)[0]
+
+
+def _summary(client, scenario):
+    _, token, _ = scenario.pick_user()
+    return client.request('GET', '/api/summary/', token)[0]
+
+
+def _task_create(client, scenario):
+    user_id, token, board_id = scenario.pick_user()
+    status, data = client.request('POST', '/api/tasks/', token, {
+        'board': board_id, 'title': 'Load test task', 'description': 'Created by loadtest',
+        'status': 'to-do', 'priority': random.choice(['low', 'medium', 'high']),
+        'assignee_id': user_id,
+    })
+    if status == 201 and data:
+        scenario.add_task(board_id, data['id'])
+    return status
+
+
+def _task_patch(client, scenario):
+    _, token, board_id = scenario.pick_user()
+    task_id = scenario.pick_task(board_id)
+    if task_id is None:
+        return NO_TASK
+    return client.request('PATCH', f'/api/tasks/{task_id}/', token, {
+        'status': random.choice(['to-do', 'in-progress', 'review', 'done']),
+    })[0]
+
+
+def _comment_post(client, scenario):
+    _, token, board_id = scenario.pick_user()
+    task_id = scenario.pick_task(board_id)
+    if task_id is None:
+        return NO_TASK
+    return client.request('POST', f'/api/tasks/{task_id}/comments/', token, {
+        'content': 'Load test comment',
+    })[0]
+
+
+ROUTES = {
+    'board_read': _board_read,
+    'board_list': _board_list,
+    'summary': _summary,
+    'task_create': _task_create,
+    'task_patch': _task_patch,
+    'comment_post': _comment_post,
+}
+
+
+class Server:
+    """
+    Runs the app with `runserver` on a fresh SQLite database for one settings profile.
+    """
+
+    def __init__(self, profile, port):
+        self.profile = profile
+        self.port = port
+        self.directory = tempfile.TemporaryDirectory(prefix='kanmind-loadtest-')
+        self.env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': profile,
+            'KANMIND_DB_PATH': os.path.join(self.directory.name, 'db.sqlite3'),
+        }
+        self.process = None
+
+    def _manage(self, *args):
+        return [sys.executable, str(settings.BASE_DIR / 'manage.py'), *args]
+
+    def start(self, timeout=30):
+        subprocess.run(self._manage('migrate', '--noinput'), env=self.env, check=True,
+                       stdout=subprocess.DEVNULL)
+        self.process = subprocess.Popen(
+            self._manage('runserver', '--noreload', f'127.0.0.1:{self.port}'),
+            env=self.env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise CommandError(f"Server for profile {self.profile} exited during startup.")
+            try:
+                socket.create_connection(('127.0.0.1', self.port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f"Server for profile {self.profile} did not start within {timeout}s.")
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait(timeout=10)
+        self.directory.cleanup()
+
+
+class Recorder:
+    """
+    Collects latencies (seconds) and error counts per route from all workers.
+    """
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.lock = threading.Lock()
+
+    def record(self, route, status, latency):
+        with self.lock:
+            self.latencies[route].append(latency)
+            self.statuses[route][status] += 1
+            if not isinstance(status, int) or status >= 400:
+                self.errors[route] += 1
+
+    def summary(self, elapsed):
+        """
+        Returns {route: {count, rps, p50, p99, p999, error_rate, statuses}} (latencies in ms).
+        """
+        result = {}
+        with self.lock:
+            routes = sorted(self.latencies)
+            for route in routes + ['all']:
+                if route == 'all':
+                    values = sorted(v for route_values in self.latencies.values() for v in route_values)
+                    errors = sum(self.errors.values())
+                    statuses = {}
+                else:
+                    values = sorted(self.latencies[route])
+                    errors = self.errors[route]
+                    statuses = dict(self.statuses[route])
+                count = len(values)
+                result[route] = {
+                    'count': count,
+                    'rps': count / elapsed if elapsed else 0.0,
+                    'p50': percentile(values, 0.50) * 1000,
+                    'p99': percentile(values, 0.99) * 1000,
+                    'p999': percentile(values, 0.999) * 1000,
+                    'error_rate': errors / count if count else 0.0,
+                    'statuses': statuses,
+                }
+        return result
+
+
+class Command(BaseCommand):
+    """
+    Load-generation harness with a realistic traffic mix.
+
+    For every settings profile the command starts the app locally on a fresh
+    SQLite database, registers and logs in `--users` users (via LoginView),
+    creates shared boards and seed tasks, and then replays the route mix at
+    `--rps` requests per second with `--concurrency` client threads.
+
+    Requests are scheduled open-loop: latency is measured from the planned
+    start time, so queueing inside the server is not hidden when it falls behind.
+
+    Usage:
+        python manage.py loadtest --rps 50 --duration 30
+        python manage.py loadtest --profile core.settings --profile other.settings
+        python manage.py loadtest --mix board_read=80,task_patch=20 --json
+    """
+    help = "Runs a concurrent load test against a local server and reports latency per route."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', action='append', dest='profiles',
+                            help="Settings module to test; pass twice to compare two profiles "
+                                 "(default: the current DJANGO_SETTINGS_MODULE).")
+        parser.add_argument('--users', type=int, default=50, help="Number of users (default: 50).")
+        parser.add_argument('--board-size', type=int, default=5,
+                            help="Users sharing one board (default: 5).")
+        parser.add_argument('--seed-tasks', type=int, default=20,
+                            help="Tasks created per board before the run (default: 20).")
+        parser.add_argument('--concurrency', type=int, default=20,
+                            help="Concurrent client threads (default: 20).")
+        parser.add_argument('--rps', type=float, default=50.0,
+                            help="Target requests per second (default: 50).")
+        parser.add_argument('--duration', type=float, default=30.0,
+                            help="Length of the measured run in seconds (default: 30).")
+        parser.add_argument('--mix', default=DEFAULT_MIX,
+                            help=f"Route weights (default: {DEFAULT_MIX}).")
+        parser.add_argument('--port', type=int, default=8765,
+                            help="Port of the first server; further profiles use the next ports.")
+        parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        profiles = options['profiles'] or [os.environ.get('DJANGO_SETTINGS_MODULE', 'core.settings')]
+        if len(profiles) > 2:
+            raise CommandError("At most two profiles can be compared.")
+        mix = parse_mix(options['mix'])
+
+        results = {}
+        for offset, profile in enumerate(profiles):
+            server = Server(profile, options['port'] + offset)
+            self.stderr.write(f"Starting server for {profile} on port {server.port} ...")
+            try:
+                server.start()
+                scenario = self.prepare(server.port, options)
+                self.stderr.write(f"Running {options['duration']}s at {options['rps']} req/s ...")
+                # The same profile may be run twice to see the run-to-run noise
+                label = profile if profile not in results else f'{profile} (run {offset + 1})'
+                results[label] = self.run_load(server.port, scenario, mix, options)
+            finally:
+                server.stop()
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            self.report(results)
+
+    def prepare(self, port, options):
+        """
+        Registers and logs in all users, creates one board per group and seed tasks.
+        """
+        client = Client(port)
+        scenario = Scenario()
+        logins = []
+        for index in range(options['users']):
+            email = f'load-user-{index}@example.com'
+            client.request('POST', '/api/registration/', body={
+                'fullname': f'Load User {index}', 'email': email,
+                'password': PASSWORD, 'repeated_password': PASSWORD,
+            })
+            status, data = client.request('POST', '/api/login/', body={'email': email, 'password': PASSWORD})
+            if status != 200:
+                raise CommandError(f"Login of {email} failed with status {status}.")
+            logins.append((data['user_id'], data['token']))
+
+        size = max(1, options['board_size'])
+        for start in range(0, len(logins), size):
+            group = logins[start:start + size]
+            owner_id, owner_token = group[0]
+            status, board = client.request('POST', '/api/boards/', owner_token, {
+                'title': f'Load board {start // size}',
+                'members': [user_id for user_id, _ in group[1:]],
+            })
+            if status != 201:
+                raise CommandError(f"Board creation failed with status {status}.")
+            for user_id, token in group:
+                scenario.users.append((user_id, token, board['id']))
+            for index in range(options['seed_tasks']):
+                status, task = client.request('POST', '/api/tasks/', owner_token, {
+                    'board': board['id'], 'title': f'Seed task {index}', 'description': '',
+                    'status': 'to-do', 'priority': 'medium', 'assignee_id': owner_id,
+                })
+                if status == 201 and task:
+                    scenario.add_task(board['id'], task['id'])
+        return scenario
+
+    def run_load(self, port, scenario, mix, options):
+        routes = list(mix)
+        weights = [mix[route] for route in routes]
+        schedule = queue.Queue()
+        recorder = Recorder()
+
+        def worker():
+            client = Client(port)
+            while True:
+                planned = schedule.get()
+                if planned is None:
+                    return
+                route = random.choices(routes, weights)[0]
+                delay = planned - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                try:
+                    status = ROUTES[route](client, scenario)
+                except Exception as exc:
+                    # Connection errors, unexpected responses etc. are results
+                    # too; the worker has to keep going either way
+                    status = type(exc).__name__
+                recorder.record(route, status, time.monotonic() - planned)
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(options['concurrency'])]
+        for thread in threads:
+            thread.start()
+
+        # Open-loop schedule: request i is due at start + i / rps, however slow the server is
+        start = time.monotonic()
+        total = int(options['duration'] * options['rps'])
+        for index in range(total):
+            planned = start + index / options['rps']
+            delay = planned - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            schedule.put(planned)
+        for _ in threads:
+            schedule.put(None)
+        for thread in threads:
+            thread.join()
+
+        return recorder.summary(time.monotonic() - start)
+
+    def report(self, results):
+        header = f"{'route':<14}{'count':>8}{'req/s':>9}{'p50 ms':>10}{'p99 ms':>10}{'p999 ms':>10}{'errors':>9}"
+        for profile, routes in results.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\nProfile: {profile}"))
+            self.stdout.write(header)
+            for route, row in routes.items():
+                self.stdout.write(
+                    f"{route:<14}{row['count']:>8}{row['rps']:>9.1f}{row['p50']:>10.1f}"
+                    f"{row['p99']:>10.1f}{row['p999']:>10.1f}{row['error_rate']:>9.1%}"
+                )
+                failures = {code: n for code, n in row['statuses'].items() if not (isinstance(code, int) and code < 400)}
+                if failures:
+                    self.stdout.write(f"{'':<14}failures: {failures}")
+
+        if len(results) == 2:
+            (name_a, a), (name_b, b) = results.items()
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\nComparison: {name_a} vs {name_b}"))
+            self.stdout.write(f"{'route':<14}{'p50 ms':>18}{'p99 ms':>18}{'p999 ms':>18}{'errors':>18}")
+            for route in a:
+                if route not in b:
+                    continue
+                cells = [f"{a[route][key]:.1f} / {b[route][key]:.1f}" for key in ('p50', 'p99', 'p999')]
+                cells.append(f"{a[route]['error_rate']:.1%} / {b[route]['error_rate']:.1%}")
+                self.stdout.write(f"{route:<14}" + ''.join(f"{cell:>18}" for cell in cells))
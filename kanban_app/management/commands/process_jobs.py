@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from kanban_app.jobs import claim_next_job, run_job
+
+
+class Command(BaseCommand):
+    """
+    Background worker for the database-backed job queue (kanban_app.models.Job).
+
+    Usage:
+        python manage.py process_jobs            # run forever, polling for new jobs
+        python manage.py process_jobs --once     # process all due jobs, then exit
+    """
+    help = "Processes pending background jobs (e.g. purging deleted boards)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Exit as soon as no due job is left instead of polling."
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=2.0,
+            help="Seconds to wait between polls when the queue is empty (default: 2)."
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['sleep'])
+                continue
+
+            if run_job(job):
+                self.stdout.write(self.style.SUCCESS(f"Finished {job}"))
+            else:
+                self.stderr.write(f"Failed {job}: {job.last_error}")
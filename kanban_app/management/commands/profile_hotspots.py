@@ -0,0 +1,63 @@
+import io
+import pstats
+from collections import Counter
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.profiling import get_config
+
+
+class Command(BaseCommand):
+    """
+    Aggregates the profiles written by core.profiling.ProfilingMiddleware.
+
+    Usage:
+        python manage.py profile_hotspots
+        python manage.py profile_hotspots --view BoardRetrieveUpdateDeleteView --sort tottime
+        python manage.py profile_hotspots --collapsed-output merged.collapsed
+    """
+    help = "Prints the top hotspots across captured request profiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--directory', help="Profile directory (default: PROFILING['directory']).")
+        parser.add_argument('--view', help="Only include profiles of this view.")
+        parser.add_argument('--sort', default='cumulative', choices=['cumulative', 'tottime', 'ncalls'],
+                            help="Sort order of the hotspot table (default: cumulative).")
+        parser.add_argument('--limit', type=int, default=25, help="Number of rows to print (default: 25).")
+        parser.add_argument('--collapsed-output',
+                            help="Also merge the collapsed stacks of all matching profiles into this file.")
+
+    def handle(self, *args, **options):
+        directory = Path(options['directory']) if options['directory'] else get_config()['directory']
+        files = sorted(directory.glob('*.pstats'))
+        if options['view']:
+            files = [path for path in files if f"-{options['view']}-" in path.name]
+        if not files:
+            raise CommandError(f"No profiles found in {directory}.")
+
+        # File names are "<date>-<time>-<View>-<id>.pstats"
+        views = Counter(path.stem.split('-')[2] for path in files)
+        self.stdout.write(self.style.MIGRATE_HEADING(f"{len(files)} profiles"))
+        for view, count in views.most_common():
+            self.stdout.write(f"  {count:>5}  {view}")
+
+        output = io.StringIO()
+        stats = pstats.Stats(*(str(path) for path in files), stream=output)
+        stats.strip_dirs().sort_stats(options['sort']).print_stats(options['limit'])
+        self.stdout.write(output.getvalue())
+
+        if options['collapsed_output']:
+            merged = Counter()
+            for path in files:
+                collapsed = path.with_suffix('.collapsed')
+                if not collapsed.exists():
+                    continue
+                for line in collapsed.read_text().splitlines():
+                    stack, _, count = line.rpartition(' ')
+                    if stack:
+                        merged[stack] += int(count)
+            Path(options['collapsed_output']).write_text(
+                ''.join(f"{stack} {count}\n" for stack, count in merged.most_common())
+            )
+            self.stdout.write(self.style.SUCCESS(f"Merged stacks written to {options['collapsed_output']}"))
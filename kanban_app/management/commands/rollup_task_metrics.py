@@ -0,0 +1,36 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from kanban_app.flow_metrics import rollup_day
+
+
+class Command(BaseCommand):
+    """
+    Aggregates the task status history into per-board, per-day flow metrics
+    (BoardDailyMetrics), served by GET /api/boards/<id>/metrics/.
+    Meant to run once a day, shortly after midnight; rerunning a day replaces its rows.
+
+    Usage:
+        python manage.py rollup_task_metrics                     # yesterday
+        python manage.py rollup_task_metrics --date 2025-06-02 --days 7
+    """
+    help = "Rolls up task status changes into daily board metrics."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="Last day to roll up (YYYY-MM-DD, default: yesterday).")
+        parser.add_argument('--days', type=int, default=1, help="Number of days up to --date (default: 1).")
+
+    def handle(self, *args, **options):
+        try:
+            last = date.fromisoformat(options['date']) if options['date'] else timezone.localdate() - timedelta(days=1)
+        except ValueError:
+            raise CommandError("--date must be in the format YYYY-MM-DD.")
+        if options['days'] < 1:
+            raise CommandError("--days must be at least 1.")
+
+        for offset in range(options['days'] - 1, -1, -1):
+            day = last - timedelta(days=offset)
+            boards = rollup_day(day)
+            self.stdout.write(f"{day}: {boards} boards")
@@ -0,0 +1,44 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from kanban_app.digests import get_backend, run_digests
+
+
+class Command(BaseCommand):
+    """
+    Computes the daily "overdue / due soon" digest of every assignee and
+    reviewer in one pass over the tasks and delivers them through the
+    backend configured in settings.DIGESTS (see kanban_app/digests.py).
+
+    Running it again for the same day resumes an interrupted run and
+    does nothing for a finished one.
+
+    Usage:
+        python manage.py send_digests
+        python manage.py send_digests --date 2025-06-02 --backend kanban_app.digests.FileBackend
+        python manage.py send_digests --restart
+    """
+    help = "Computes and delivers the daily due-date digests."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="Day to compute the digests for (YYYY-MM-DD, default: today).")
+        parser.add_argument('--backend', help="Dotted path of the delivery backend (default: settings.DIGESTS).")
+        parser.add_argument('--restart', action='store_true', help="Discard the digests of the day and start over.")
+
+    def handle(self, *args, **options):
+        try:
+            day = date.fromisoformat(options['date']) if options['date'] else timezone.localdate()
+        except ValueError:
+            raise CommandError("--date must be in the format YYYY-MM-DD.")
+
+        started = time.perf_counter()
+        run = run_digests(
+            day, get_backend(options['backend']), restart=options['restart'],
+            log=lambda message: self.stderr.write(message),
+        )
+        self.stderr.write(self.style.SUCCESS(
+            f"{run.digests} digests for {day} in {time.perf_counter() - started:.1f}s"
+        ))
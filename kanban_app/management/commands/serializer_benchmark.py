@@ -0,0 +1,122 @@
+import json
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from auth_app.models import UserProfile
+from kanban_app.api.readers import serialize_comments, serialize_tasks
+from kanban_app.api.serializers import CommentSerializer, TaskSerializer
+from kanban_app.models import Board, Comment, Task
+
+
+STATUSES = ['to-do', 'in-progress', 'review', 'done']
+PRIORITIES = ['low', 'medium', 'high']
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """
+    Compares the CPU time of the DRF serializers with the `.values()` readers
+    of kanban_app/api/readers.py on a generated board, and checks that both
+    produce the same JSON.
+
+    The sample data is created inside a transaction that is rolled back,
+    so the database is left unchanged.
+
+    Usage:
+        python manage.py serializer_benchmark
+        python manage.py serializer_benchmark --tasks 10000 --comments 10000 --runs 5
+    """
+    help = "Benchmarks ModelSerializer vs. values()-based list rendering."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=10000, help="Number of tasks (default: 10000).")
+        parser.add_argument('--comments', type=int, default=10000, help="Number of comments (default: 10000).")
+        parser.add_argument('--users', type=int, default=50, help="Number of board members (default: 50).")
+        parser.add_argument('--runs', type=int, default=3, help="Runs per variant (default: 3).")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def create_data(self, options):
+        users = [
+            User(username=f'bench-{i}@example.com', email=f'bench-{i}@example.com')
+            for i in range(options['users'])
+        ]
+        User.objects.bulk_create(users)
+        users = list(User.objects.filter(username__startswith='bench-'))
+        UserProfile.objects.bulk_create(
+            # Every tenth user has no profile, like users created outside the registration
+            UserProfile(user=user, fullname=f'Bench User {i}') for i, user in enumerate(users) if i % 10
+        )
+        board = Board.objects.create(title='Benchmark', owner=users[0])
+        Task.objects.bulk_create((
+            Task(
+                board=board, title=f'Task {i}', description='Lorem ipsum dolor sit amet. ' * 4,
+                status=STATUSES[i % len(STATUSES)], priority=PRIORITIES[i % len(PRIORITIES)],
+                assignee=users[i % len(users)] if i % 3 else None,
+                reviewer=users[(i * 7) % len(users)] if i % 2 else None,
+                creator=users[(i * 3) % len(users)],
+            )
+            for i in range(options['tasks'])
+        ), batch_size=1000)
+        task = Task.objects.filter(board=board).first()
+        Comment.objects.bulk_create((
+            Comment(task=task, author=users[i % len(users)], content=f'Comment {i}')
+            for i in range(options['comments'])
+        ), batch_size=1000)
+        return board, task
+
+    def measure(self, func, runs):
+        """
+        Returns the median CPU and wall time (ms) of `func` and its last result.
+        """
+        cpu, wall = [], []
+        for _ in range(runs):
+            started_cpu, started_wall = time.process_time(), time.perf_counter()
+            result = func()
+            cpu.append((time.process_time() - started_cpu) * 1000)
+            wall.append((time.perf_counter() - started_wall) * 1000)
+        return statistics.median(cpu), statistics.median(wall), result
+
+    def run(self, options):
+        board, task = self.create_data(options)
+        tasks = Task.objects.filter(board=board).order_by('id')
+        comments = Comment.objects.filter(task=task).order_by('created_at', 'id')
+
+        cases = [
+            (
+                f"{options['tasks']} tasks",
+                lambda: TaskSerializer(tasks, many=True).data,
+                lambda: serialize_tasks(tasks),
+            ),
+            (
+                f"{options['comments']} comments",
+                lambda: CommentSerializer(comments, many=True).data,
+                lambda: serialize_comments(comments),
+            ),
+        ]
+
+        self.stdout.write(f"{'case':<18}{'variant':<18}{'cpu ms':>10}{'wall ms':>10}")
+        for name, serializer_func, reader_func in cases:
+            serializer_cpu, serializer_wall, expected = self.measure(serializer_func, options['runs'])
+            reader_cpu, reader_wall, actual = self.measure(reader_func, options['runs'])
+            if json.dumps(expected) != json.dumps(actual):
+                raise CommandError(f"{name}: values() output differs from the serializer output.")
+
+            self.stdout.write(f"{name:<18}{'serializer':<18}{serializer_cpu:>10.1f}{serializer_wall:>10.1f}")
+            self.stdout.write(f"{'':<18}{'values()':<18}{reader_cpu:>10.1f}{reader_wall:>10.1f}")
+            self.stdout.write(self.style.SUCCESS(
+                f"{'':<18}identical output, {serializer_cpu / max(reader_cpu, 0.001):.1f}x less CPU"
+            ))
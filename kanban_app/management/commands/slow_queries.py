@@ -0,0 +1,64 @@
+import json
+from collections import defaultdict
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.querylog import get_config
+
+
+class Command(BaseCommand):
+    """
+    Summarizes the slow-query log written by core.querylog.SlowQueryLogMiddleware.
+
+    Usage:
+        python manage.py slow_queries
+        python manage.py slow_queries --limit 5 --plans
+    """
+    help = "Ranks logged slow SQL statements by total time."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', help="Log file (default: SLOW_QUERY_LOG['path']); rotated files are included.")
+        parser.add_argument('--limit', type=int, default=20, help="Number of statements to show (default: 20).")
+        parser.add_argument('--plans', action='store_true', help="Print the query plan of each statement.")
+
+    def read_entries(self, path):
+        # Rotated files are named slow_queries.log.1, .2, ...
+        files = [path] + sorted(path.parent.glob(f'{path.name}.*'))
+        for file in files:
+            if not file.exists():
+                continue
+            with file.open() as handle:
+                for line in handle:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+
+    def handle(self, *args, **options):
+        path = Path(options['path']) if options['path'] else get_config()['path']
+
+        groups = defaultdict(lambda: {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'views': set(), 'plan': None})
+        for entry in self.read_entries(path):
+            group = groups[entry['sql']]
+            group['count'] += 1
+            group['total_ms'] += entry['duration_ms']
+            group['max_ms'] = max(group['max_ms'], entry['duration_ms'])
+            group['views'].add(entry['view'])
+            group['plan'] = entry.get('plan') or group['plan']
+
+        if not groups:
+            raise CommandError(f"No slow queries logged in {path}.")
+
+        ranked = sorted(groups.items(), key=lambda item: item[1]['total_ms'], reverse=True)
+        for rank, (sql, group) in enumerate(ranked[:options['limit']], start=1):
+            mean = group['total_ms'] / group['count']
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"#{rank}  total {group['total_ms']:.1f} ms  |  {group['count']}x  |  "
+                f"mean {mean:.1f} ms  |  max {group['max_ms']:.1f} ms"
+            ))
+            self.stdout.write(f"    views: {', '.join(sorted(group['views']))}")
+            self.stdout.write(f"    {sql}")
+            if options['plans'] and group['plan']:
+                for step in group['plan']:
+                    self.stdout.write(f"      plan: {step}")
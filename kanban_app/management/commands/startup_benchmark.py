@@ -0,0 +1,125 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Runs in a fresh interpreter per measurement, so nothing is imported yet
+CHILD_SCRIPT = r"""
+import io, json, sys, time
+
+started = time.perf_counter()
+import django
+django.setup()
+setup_done = time.perf_counter()
+
+from django.core.handlers.wsgi import WSGIHandler
+application = WSGIHandler()
+handler_done = time.perf_counter()
+
+def request():
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': '/api/boards/', 'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost',
+        'wsgi.input': io.BytesIO(), 'wsgi.url_scheme': 'http', 'wsgi.errors': sys.stderr,
+    }
+    statuses = []
+    began = time.perf_counter()
+    body = b''.join(application(environ, lambda status, headers: statuses.append(status)))
+    return time.perf_counter() - began, statuses[0]
+
+first, status = request()
+second, _ = request()
+
+from django.conf import settings
+print(json.dumps({
+    'setup': setup_done - started,
+    'handler': handler_done - setup_done,
+    'first_request': first,
+    'second_request': second,
+    'status': status,
+    'modules': len(sys.modules),
+    'apps': len(settings.INSTALLED_APPS),
+    'middleware': len(settings.MIDDLEWARE),
+}))
+"""
+
+# Printed columns: key, header, factor, format
+COLUMNS = [
+    ('process', 'process ms', 1000, '.1f'),
+    ('setup', 'setup ms', 1000, '.1f'),
+    ('handler', 'handler ms', 1000, '.1f'),
+    ('first_request', '1st req ms', 1000, '.2f'),
+    ('second_request', '2nd req ms', 1000, '.2f'),
+    ('ready', 'ready ms', 1000, '.1f'),
+    ('modules', 'modules', 1, '.0f'),
+    ('apps', 'apps', 1, '.0f'),
+    ('middleware', 'middleware', 1, '.0f'),
+]
+
+
+class Command(BaseCommand):
+    """
+    Measures worker cold-start cost per settings profile.
+
+    Each run starts a fresh interpreter that imports Django, runs
+    `django.setup()`, builds the WSGI handler (loads the middleware) and serves
+    two unauthenticated requests to /api/boards/. Reported are the medians of:
+
+    - process: wall time of the whole interpreter run
+    - setup: import + `django.setup()` (app registry, models)
+    - handler: WSGI handler creation (middleware, URLconf is loaded lazily)
+    - 1st req / 2nd req: latency of the first (cold) and second request
+    - ready: setup + handler + 1st req, i.e. how long a new worker takes to
+      answer its first request. Imports that are deferred move from setup to
+      the first request, so only this column shows what a profile really saves.
+
+    Usage:
+        python manage.py startup_benchmark
+        python manage.py startup_benchmark --profile core.settings --profile core.settings_api --runs 10
+    """
+    help = "Reports import time and first-request latency for each settings profile."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', action='append', dest='profiles',
+                            help="Settings module to measure (default: core.settings and core.settings_api).")
+        parser.add_argument('--runs', type=int, default=5, help="Runs per profile (default: 5).")
+        parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+
+    def measure(self, profile):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': profile}
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-c', CHILD_SCRIPT], env=env, cwd=settings.BASE_DIR,
+            capture_output=True, text=True,
+        )
+        elapsed = time.perf_counter() - started
+        if result.returncode != 0:
+            raise CommandError(f"Profile {profile} failed:\n{result.stderr}")
+        data = json.loads(result.stdout.strip().splitlines()[-1])
+        data['process'] = elapsed
+        data['ready'] = data['setup'] + data['handler'] + data['first_request']
+        return data
+
+    def handle(self, *args, **options):
+        profiles = options['profiles'] or ['core.settings', 'core.settings_api']
+        results = {}
+        for profile in profiles:
+            runs = [self.measure(profile) for _ in range(options['runs'])]
+            results[profile] = {key: statistics.median(run[key] for run in runs) for key, *_ in COLUMNS}
+            results[profile]['status'] = runs[0]['status']
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(f"{'profile':<24}" + ''.join(f"{header:>12}" for _, header, _, _ in COLUMNS))
+        for profile, values in results.items():
+            cells = ''.join(f"{values[key] * factor:>12{fmt}}" for key, _, factor, fmt in COLUMNS)
+            self.stdout.write(f"{profile:<24}{cells}")
+        self.stdout.write(f"(medians of {options['runs']} runs; requests are unauthenticated GET /api/boards/)")
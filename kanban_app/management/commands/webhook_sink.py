@@ -0,0 +1,74 @@
+import hmac
+import json
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+from kanban_app.webhooks import sign
+
+
+class Command(BaseCommand):
+    """
+    Local stand-in for a webhook endpoint: accepts POSTs on any path, prints
+    each batch (and whether its signature matches `--secret`) and answers 204.
+    Speaks HTTP/1.1 keep-alive, so connection reuse by the worker is visible
+    in the output. `--fail-rate` answers a share of requests with 503 to
+    exercise the retry backoff.
+
+    Usage:
+        python manage.py webhook_sink --port 8765
+        python manage.py webhook_sink --port 8765 --secret <secret> --fail-rate 0.3
+    """
+    help = "Runs a local HTTP server that receives webhook deliveries."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--secret', help="Verify the X-KanMind-Signature header with this secret.")
+        parser.add_argument('--fail-rate', type=float, default=0.0, help="Share of requests answered with 503.")
+        parser.add_argument('--quiet', action='store_true', help="Print one line per batch instead of the events.")
+
+    def handle(self, *args, **options):
+        command = self
+        lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                failed = random.random() < options['fail_rate']
+                self.send_response(503 if failed else 204)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+                try:
+                    batch = json.loads(body)
+                except ValueError:
+                    batch = {'events': []}
+                signature = ''
+                if options['secret']:
+                    valid = hmac.compare_digest(sign(options['secret'], body), self.headers.get('X-KanMind-Signature', ''))
+                    signature = ', signature ok' if valid else ', SIGNATURE MISMATCH'
+                with lock:
+                    command.stdout.write(
+                        f"{self.path} from port {self.client_address[1]}: board {batch.get('board')}, "
+                        f"{len(batch['events'])} events{signature}{' -> 503' if failed else ''}"
+                    )
+                    if not options['quiet']:
+                        for event in batch['events']:
+                            command.stdout.write(f"    #{event['id']} {event['event']} {json.dumps(event['data'])}")
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((options['host'], options['port']), Handler)
+        self.stdout.write(f"Listening on http://{options['host']}:{options['port']}/")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
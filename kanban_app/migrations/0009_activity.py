@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-19 02:56
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban_app', '0008_board_soft_delete_job'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Activity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('verb', models.CharField(choices=[('task_created', 'Task created'), ('task_updated', 'Task updated'), ('task_deleted', 'Task deleted'), ('comment_added', 'Comment added'), ('comment_deleted', 'Comment deleted'), ('member_added', 'Member added'), ('member_removed', 'Member removed')], max_length=30)),
+                ('task_id', models.BigIntegerField(blank=True, null=True)),
+                ('data', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activities', to='kanban_app.board')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['board', 'created_at'], name='activity_board_created_idx')],
+            },
+        ),
+    ]
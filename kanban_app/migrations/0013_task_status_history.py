@@ -0,0 +1,49 @@
+# Generated by Django 5.2.1 on 2026-10-19 03:15
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban_app', '0012_digests'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BoardDailyMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('created', models.PositiveIntegerField(default=0)),
+                ('completed', models.PositiveIntegerField(default=0)),
+                ('reopened', models.PositiveIntegerField(default=0)),
+                ('transitions', models.PositiveIntegerField(default=0)),
+                ('entered', models.JSONField(blank=True, default=dict)),
+                ('lead_time_p50', models.PositiveIntegerField(blank=True, null=True)),
+                ('lead_time_p90', models.PositiveIntegerField(blank=True, null=True)),
+                ('cycle_time_p50', models.PositiveIntegerField(blank=True, null=True)),
+                ('cycle_time_p90', models.PositiveIntegerField(blank=True, null=True)),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_metrics', to='kanban_app.board')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('board', 'date'), name='board_daily_metrics_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskStatusChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.BigIntegerField()),
+                ('from_status', models.CharField(blank=True, max_length=50)),
+                ('to_status', models.CharField(blank=True, max_length=50)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='kanban_app.board')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['changed_at'], name='status_change_changed_idx'), models.Index(fields=['task_id', 'changed_at'], name='status_change_task_idx')],
+            },
+        ),
+    ]
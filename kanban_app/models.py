@@ -1,8 +1,48 @@
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 
-class Board(models.Model):
+class VersionedSaveMixin:
+    """
+    Makes every save of an existing row a new `version`. The counter is
+    incremented in the UPDATE itself (version = version + 1) and read back
+    afterwards, because it is also bumped with F() updates elsewhere (e.g.
+    when a comment is added): an instance loaded before such a bump must
+    not write back a version number that is already in use.
+    """
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+
+        loaded_version = self.version
+        self.version = models.F('version') + 1
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'version'}
+        try:
+            with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+                super().save(*args, **kwargs)
+                # In the same transaction, so this is the version written by this save
+                self.refresh_from_db(fields=['version'])
+        except Exception:
+            self.version = loaded_version
+            raise
+
+
+class BoardManager(models.Manager):
+    """
+    Default manager for boards; hides boards that were soft-deleted
+    and are waiting to be purged by the background worker.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+
+class Board(VersionedSaveMixin, models.Model):
     """
     Represents a Kanban board that groups tasks and users.
 
@@ -10,6 +50,10 @@ class Board(models.Model):
     - `owner`: The user who created the board and has full permissions.
     - `members`: Other users who are allowed to view/edit tasks on the board.
     - `created_at`: Timestamp of when the board was created.
+    - `is_deleted` / `deleted_at`: Soft-delete marker; the board's rows are
+      purged later in small chunks (see kanban_app/jobs.py).
+    - `version`: Counter bumped on every change that affects the board detail
+      output; a BoardSnapshot is only served if it was built from this version.
     """
     title = models.CharField(max_length=255)
     owner = models.ForeignKey(
@@ -23,12 +67,30 @@ class Board(models.Model):
         blank=True
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    is_deleted = models.BooleanField(default=False)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+    version = models.PositiveIntegerField(default=1)
+
+    # Only boards that are not deleted; `all_objects` includes deleted ones
+    objects = BoardManager()
+    all_objects = models.Manager()
 
     def __str__(self):
         return self.title
+
+    def soft_delete(self):
+        """
+        Marks the board as deleted and queues the purge of its tasks and comments.
+        """
+        from kanban_app.jobs import enqueue
+
+        self.is_deleted = True
+        self.deleted_at = timezone.now()
+        self.save(update_fields=['is_deleted', 'deleted_at'])
+        enqueue(Job.KIND_PURGE_BOARD, board_id=self.pk)
     
 
-class Task(models.Model):
+class Task(VersionedSaveMixin, models.Model):
     """
     Represents a task (or ticket) within a board.
 
@@ -42,6 +104,7 @@ class Task(models.Model):
     - `due_date`: Optional deadline.
     - `creator`: The user who created the task.
     - `created_at`: Timestamp when the task was created.
+    - `version`: Counter bumped on every change that affects the serialized task.
     """
     board = models.ForeignKey(
         Board,
@@ -76,9 +139,46 @@ class Task(models.Model):
         null=True, blank=True
     )
 
+    # Used as part of the serialized-task cache key (see kanban_app/api/fragments.py)
+    version = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            # Query paths of GET /api/boards/<id>/tasks/ (kanban_app/api/filters.py):
+            # status filter with due-date range/order, due-date range/order alone,
+            # and "my tasks" per board
+            models.Index(fields=['board', 'status', 'due_date'], name='task_board_status_due_idx'),
+            models.Index(fields=['board', 'due_date'], name='task_board_due_idx'),
+            models.Index(fields=['board', 'assignee', 'status'], name='task_board_assignee_idx'),
+            # Due dates per user, read in user order by `send_digests` (kanban_app/digests.py)
+            models.Index(fields=['assignee', 'due_date'], name='task_assignee_due_idx'),
+            models.Index(fields=['reviewer', 'due_date'], name='task_reviewer_due_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the values as loaded from the database, so signal
+        # receivers can tell what a save changed (e.g. a new assignee)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # The saved values are what the next save of this instance changes
+        update_fields = kwargs.get('update_fields')
+        deferred = self.get_deferred_fields()
+        saved = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if field.attname not in deferred
+            and (update_fields is None or field.name in update_fields or field.attname in update_fields)
+        }
+        self._loaded_values = {**getattr(self, '_loaded_values', {}), **saved}
+
 
 class Comment(models.Model):
     """
@@ -103,3 +203,323 @@ class Comment(models.Model):
 
     def __str__(self):
         return f"Comment by {self.author} on Task {self.task_id}"
+
+
+class BoardSnapshot(models.Model):
+    """
+    Materialized GET /api/boards/<id>/ response of a board (see kanban_app/snapshots.py).
+
+    - `board`: The board (also the primary key).
+    - `version`: The Board.version the snapshot was built from.
+    - `data`: The rendered JSON response body.
+    - `updated_at`: When the snapshot was last rebuilt.
+    """
+    board = models.OneToOneField(
+        Board,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='snapshot'
+    )
+    version = models.PositiveIntegerField()
+    data = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Snapshot of board {self.board_id} (v{self.version})"
+
+
+class Job(models.Model):
+    """
+    A unit of background work, stored in the database and processed by
+    `python manage.py process_jobs`.
+
+    - `kind`: Which handler runs the job (see kanban_app/jobs.py).
+    - `payload`: JSON arguments for the handler.
+    - `status`: pending, running, done or failed.
+    - `attempts`: How often the job has been started.
+    - `last_error`: Error message of the last failed attempt.
+    - `available_at`: The job is not picked up before this time (used for retries).
+    """
+    KIND_PURGE_BOARD = 'purge_board'
+    KIND_REBUILD_SNAPSHOT = 'rebuild_board_snapshot'
+    KIND_CHOICES = [
+        (KIND_PURGE_BOARD, 'Purge deleted board'),
+        (KIND_REBUILD_SNAPSHOT, 'Rebuild board snapshot'),
+    ]
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=50, choices=KIND_CHOICES)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Lookup path of the worker: next pending job that is due
+            models.Index(fields=['status', 'available_at'], name='job_status_available_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+
+class Activity(models.Model):
+    """
+    Append-only audit trail entry of a board.
+
+    Rows are not written one by one: kanban_app/activity.py buffers the
+    events recorded by the signal receivers and stores them with `bulk_create`.
+
+    - `board`: The board the change happened on.
+    - `actor`: The user who made the change (empty outside of requests).
+    - `verb`: What happened (see VERB_CHOICES).
+    - `task_id`: The affected task; a plain id, so the entry outlives the task.
+    - `data`: Details, e.g. the changed task fields with old and new values.
+    - `created_at`: When the change happened (not when the row was flushed).
+    """
+    VERB_TASK_CREATED = 'task_created'
+    VERB_TASK_UPDATED = 'task_updated'
+    VERB_TASK_DELETED = 'task_deleted'
+    VERB_COMMENT_ADDED = 'comment_added'
+    VERB_COMMENT_DELETED = 'comment_deleted'
+    VERB_MEMBER_ADDED = 'member_added'
+    VERB_MEMBER_REMOVED = 'member_removed'
+    VERB_CHOICES = [
+        (VERB_TASK_CREATED, 'Task created'),
+        (VERB_TASK_UPDATED, 'Task updated'),
+        (VERB_TASK_DELETED, 'Task deleted'),
+        (VERB_COMMENT_ADDED, 'Comment added'),
+        (VERB_COMMENT_DELETED, 'Comment deleted'),
+        (VERB_MEMBER_ADDED, 'Member added'),
+        (VERB_MEMBER_REMOVED, 'Member removed'),
+    ]
+
+    board = models.ForeignKey(
+        Board,
+        on_delete=models.CASCADE,
+        related_name='activities'  # Access via board.activities.all()
+    )
+    actor = models.ForeignKey(
+        User,
+        null=True, blank=True,
+        on_delete=models.SET_NULL,
+        related_name='+'
+    )
+    verb = models.CharField(max_length=30, choices=VERB_CHOICES)
+    task_id = models.BigIntegerField(null=True, blank=True)
+    data = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Lookup path of GET /api/boards/<id>/activity/ (newest first)
+            models.Index(fields=['board', 'created_at'], name='activity_board_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.verb} on board {self.board_id}"
+
+
+class Digest(models.Model):
+    """
+    Daily overview of a user's overdue and soon due tasks, written in bulk by
+    `python manage.py send_digests` (see kanban_app/digests.py).
+
+    - `user`: The recipient (assignee or reviewer of the tasks).
+    - `date`: The day the digest was computed for.
+    - `overdue_count` / `due_soon_count`: Number of tasks in each group.
+    - `items`: The tasks (id, board, title, due date, role, overdue), overdue first.
+    - `delivered_at`: When the delivery backend accepted the digest (empty until then).
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='digests'
+    )
+    date = models.DateField()
+    overdue_count = models.PositiveIntegerField(default=0)
+    due_soon_count = models.PositiveIntegerField(default=0)
+    items = models.JSONField(default=list, blank=True, encoder=DjangoJSONEncoder)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # One digest per user and day, also when an interrupted run is resumed
+            models.UniqueConstraint(fields=['date', 'user'], name='digest_date_user_uniq'),
+        ]
+
+    def __str__(self):
+        return f"Digest for user {self.user_id} on {self.date}"
+
+
+class DigestRun(models.Model):
+    """
+    Progress of the digest computation for one day; the checkpoint that
+    lets an interrupted `send_digests` resume.
+
+    - `date`: The day the digests are computed for.
+    - `last_user_id`: All users up to this id are written.
+    - `digests`: Number of digests written so far.
+    - `finished_at`: When the run completed (empty while incomplete).
+    """
+    date = models.DateField(unique=True)
+    last_user_id = models.BigIntegerField(default=0)
+    digests = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Digest run {self.date} (up to user {self.last_user_id})"
+
+
+class TaskStatusChange(models.Model):
+    """
+    One status transition of a task; creating a task counts as a transition
+    from "" to its initial status. Rolled up daily into BoardDailyMetrics.
+
+    - `board`: The board of the task at the time of the change.
+    - `task_id`: The task; a plain id, so the history outlives the task.
+    - `from_status` / `to_status`: The status before and after.
+    - `changed_at`: When the change was saved.
+    """
+    board = models.ForeignKey(
+        Board,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    task_id = models.BigIntegerField()
+    from_status = models.CharField(max_length=50, blank=True)
+    to_status = models.CharField(max_length=50, blank=True)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # The rollup reads one day of all boards, and the history of the tasks finished that day
+            models.Index(fields=['changed_at'], name='status_change_changed_idx'),
+            models.Index(fields=['task_id', 'changed_at'], name='status_change_task_idx'),
+        ]
+
+    def __str__(self):
+        return f"Task {self.task_id}: {self.from_status or '-'} -> {self.to_status}"
+
+
+class BoardDailyMetrics(models.Model):
+    """
+    Flow metrics of one board and day, computed from TaskStatusChange by
+    `python manage.py rollup_task_metrics` (see kanban_app/flow_metrics.py).
+
+    - `created` / `completed` / `reopened`: Tasks created, moved to done and moved out of done.
+    - `transitions`: All status changes of the day.
+    - `entered`: Transitions by target status, e.g. {"review": 3}.
+    - `lead_time_*`: Percentiles (seconds) from creation to done of the tasks completed that day.
+    - `cycle_time_*`: Percentiles (seconds) from the first move to in-progress to done.
+    """
+    board = models.ForeignKey(
+        Board,
+        on_delete=models.CASCADE,
+        related_name='daily_metrics'
+    )
+    date = models.DateField()
+    created = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    reopened = models.PositiveIntegerField(default=0)
+    transitions = models.PositiveIntegerField(default=0)
+    entered = models.JSONField(default=dict, blank=True)
+    lead_time_p50 = models.PositiveIntegerField(null=True, blank=True)
+    lead_time_p90 = models.PositiveIntegerField(null=True, blank=True)
+    cycle_time_p50 = models.PositiveIntegerField(null=True, blank=True)
+    cycle_time_p90 = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['board', 'date'], name='board_daily_metrics_uniq'),
+        ]
+
+    def __str__(self):
+        return f"Metrics of board {self.board_id} on {self.date}"
+
+
+class WebhookSubscription(models.Model):
+    """
+    An integration endpoint that receives the task and comment events of a board
+    (see kanban_app/webhooks.py).
+
+    - `board`: The board whose events are sent.
+    - `url`: Where batches of events are POSTed.
+    - `secret`: Key of the HMAC-SHA256 signature sent with every batch.
+    - `events`: Event names to send (e.g. ["task.updated"]); empty means all.
+    - `is_active`: Disabled subscriptions receive nothing (set after too many failures).
+    - `last_event_id`: Delivery cursor; all events up to this id were delivered.
+    - `failures`: Consecutive failed deliveries, for the retry backoff.
+    - `retry_at`: The endpoint is not contacted before this time.
+    """
+    board = models.ForeignKey(
+        Board,
+        on_delete=models.CASCADE,
+        related_name='webhooks'
+    )
+    url = models.URLField(max_length=500)
+    secret = models.CharField(max_length=64)
+    events = models.JSONField(default=list, blank=True)
+    is_active = models.BooleanField(default=True)
+    created_by = models.ForeignKey(
+        User,
+        null=True, blank=True,
+        on_delete=models.SET_NULL,
+        related_name='+'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    last_event_id = models.BigIntegerField(default=0)
+    failures = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    retry_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Lookup path of the delivery worker: active endpoints that are due
+            models.Index(fields=['is_active', 'retry_at'], name='webhook_active_retry_idx'),
+        ]
+
+    def __str__(self):
+        return f"Webhook {self.url} for board {self.board_id}"
+
+
+class WebhookEvent(models.Model):
+    """
+    Outbox entry of a task or comment change, written in the transaction of
+    the change and sent to the board's webhooks by `python manage.py deliver_webhooks`.
+
+    - `board_id`: The board; a plain id, so pending events outlive a deleted board.
+    - `event`: e.g. "task.created", "comment.deleted".
+    - `data`: The event body (ids and the changed values).
+    - `created_at`: When the change happened.
+    """
+    board_id = models.BigIntegerField()
+    event = models.CharField(max_length=30)
+    data = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Events of a board after a subscription's cursor
+            models.Index(fields=['board_id', 'id'], name='webhook_event_board_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event} on board {self.board_id}"
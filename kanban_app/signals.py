@@ -0,0 +1,330 @@
+import functools
+import threading
+from contextlib import contextmanager
+
+from django.db import models, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from auth_app.signals import user_summary_changed
+from kanban_app import activity, webhooks
+from kanban_app.models import Activity, Board, Comment, Task, TaskStatusChange, WebhookSubscription
+from kanban_app.api.summary import invalidate_summaries
+from kanban_app.snapshots import bump_board_versions, schedule_rebuild
+
+
+_state = threading.local()
+
+
+@contextmanager
+def muted():
+    """
+    Disables the receivers of this module in the current thread,
+    e.g. while the job worker purges thousands of rows.
+    """
+    previous = getattr(_state, 'muted', False)
+    _state.muted = True
+    try:
+        yield
+    finally:
+        _state.muted = previous
+
+
+def unless_muted(receiver_func):
+    """
+    Decorator that skips a receiver while signals are muted.
+    """
+    @functools.wraps(receiver_func)
+    def wrapper(*args, **kwargs):
+        if getattr(_state, 'muted', False):
+            return None
+        return receiver_func(*args, **kwargs)
+    return wrapper
+
+
+def bump_task_versions(queryset):
+    """
+    Increments the version of all tasks in `queryset` with a single UPDATE,
+    which invalidates their cached serialized fragments.
+    """
+    queryset.update(version=models.F('version') + 1)
+
+
+def tasks_of_user(user_id):
+    """
+    Returns all tasks in which the given user is rendered as a nested object.
+    """
+    return Task.objects.filter(
+        models.Q(assignee_id=user_id) | models.Q(reviewer_id=user_id) | models.Q(creator_id=user_id)
+    )
+
+
+def task_user_ids(task):
+    """
+    Returns the ids of all users whose dashboard counts depend on `task`,
+    including the assignee/reviewer it had when it was loaded.
+    """
+    loaded = getattr(task, '_loaded_values', {})
+    return {
+        task.assignee_id, task.reviewer_id,
+        loaded.get('assignee_id'), loaded.get('reviewer_id'),
+    }
+
+
+@receiver([post_save, post_delete], sender=Task)
+@unless_muted
+def task_changed(sender, instance, **kwargs):
+    invalidate_summaries(task_user_ids(instance))
+
+
+@receiver(post_save, sender=Board)
+@unless_muted
+def board_saved(sender, instance, created, **kwargs):
+    if created:
+        invalidate_summaries([instance.owner_id])
+    elif instance.is_deleted:
+        # Soft delete: the board vanishes from the owner's and members' counts
+        member_ids = list(instance.members.values_list('id', flat=True))
+        invalidate_summaries([instance.owner_id, *member_ids])
+
+
+@receiver(pre_delete, sender=Board)
+@unless_muted
+def board_deleted(sender, instance, **kwargs):
+    # Members have to be read before the through rows are gone
+    member_ids = list(instance.members.values_list('id', flat=True))
+    invalidate_summaries([instance.owner_id, *member_ids])
+
+
+@receiver(m2m_changed, sender=Board.members.through)
+@unless_muted
+def board_members_changed(sender, instance, action, pk_set, **kwargs):
+    if action in ('post_add', 'post_remove') and isinstance(instance, Board):
+        invalidate_summaries(pk_set or [])
+    elif action == 'pre_clear' and isinstance(instance, Board):
+        invalidate_summaries(instance.members.values_list('id', flat=True))
+
+
+@receiver([post_save, post_delete], sender=Comment)
+@unless_muted
+def comment_changed(sender, instance, **kwargs):
+    # A comment belongs to exactly one task
+    bump_task_versions(Task.objects.filter(pk=instance.task_id))
+
+
+# Activity log (kanban_app/activity.py)
+
+# Task fields whose changes are logged; old and new values are kept
+# for all of them except the (possibly long) description
+TRACKED_TASK_FIELDS = ['title', 'description', 'status', 'priority', 'assignee_id', 'reviewer_id', 'due_date']
+VALUE_TASK_FIELDS = ['title', 'status', 'priority', 'assignee_id', 'reviewer_id', 'due_date']
+
+
+def task_changes(task):
+    """
+    Returns the changed tracked fields of `task` compared to the values it was loaded with.
+    """
+    loaded = getattr(task, '_loaded_values', {})
+    return [
+        name for name in TRACKED_TASK_FIELDS
+        if name in loaded and loaded[name] != getattr(task, name)
+    ]
+
+
+@receiver(post_save, sender=Task)
+@unless_muted
+def log_task_saved(sender, instance, created, **kwargs):
+    if created:
+        activity.record(instance.board_id, Activity.VERB_TASK_CREATED, instance.pk, title=instance.title)
+        return
+
+    fields = task_changes(instance)
+    if not fields:
+        return
+    loaded = instance._loaded_values
+    changes = {
+        name: [loaded[name], getattr(instance, name)]
+        for name in fields if name in VALUE_TASK_FIELDS
+    }
+    activity.record(
+        instance.board_id, Activity.VERB_TASK_UPDATED, instance.pk,
+        title=instance.title, fields=fields, changes=changes,
+    )
+
+
+@receiver(post_delete, sender=Task)
+@unless_muted
+def log_task_deleted(sender, instance, origin=None, **kwargs):
+    # Tasks removed together with their board leave no trace of their own
+    if isinstance(origin, Board):
+        return
+    activity.record(instance.board_id, Activity.VERB_TASK_DELETED, instance.pk, title=instance.title)
+
+
+@receiver(post_save, sender=Comment)
+@unless_muted
+def log_comment_added(sender, instance, created, **kwargs):
+    if created:
+        activity.record(
+            instance.task.board_id, Activity.VERB_COMMENT_ADDED, instance.task_id, comment_id=instance.pk
+        )
+
+
+@receiver(post_delete, sender=Comment)
+@unless_muted
+def log_comment_deleted(sender, instance, origin=None, **kwargs):
+    # Only comments deleted on their own; not those of a deleted task or board
+    if origin is not None and not isinstance(origin, Comment):
+        return
+    activity.record(
+        instance.task.board_id, Activity.VERB_COMMENT_DELETED, instance.task_id, comment_id=instance.pk
+    )
+
+
+@receiver(m2m_changed, sender=Board.members.through)
+@unless_muted
+def log_members_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # The removed ids are only known before the through rows are gone
+        if reverse:
+            instance._cleared_ids = list(instance.boards.values_list('id', flat=True))
+        else:
+            instance._cleared_ids = list(instance.members.values_list('id', flat=True))
+        return
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_cleared_ids', [])
+    elif action not in ('post_add', 'post_remove'):
+        return
+
+    verb = Activity.VERB_MEMBER_ADDED if action == 'post_add' else Activity.VERB_MEMBER_REMOVED
+    for pk in pk_set or []:
+        # Forward: instance is the board; reverse (user.boards.add()): instance is the user
+        board_id, user_id = (pk, instance.pk) if reverse else (instance.pk, pk)
+        activity.record(board_id, verb, user_id=user_id)
+
+
+# Status history (kanban_app/flow_metrics.py)
+
+@receiver(post_save, sender=Task)
+@unless_muted
+def record_status_change(sender, instance, created, **kwargs):
+    if created:
+        from_status = ''
+    else:
+        loaded = getattr(instance, '_loaded_values', {})
+        if 'status' not in loaded or loaded['status'] == instance.status:
+            return
+        from_status = loaded['status']
+    # One small INSERT in the transaction of the task change
+    TaskStatusChange.objects.create(
+        board_id=instance.board_id, task_id=instance.pk,
+        from_status=from_status, to_status=instance.status,
+    )
+
+
+# Board snapshots (kanban_app/snapshots.py)
+
+def boards_of_user(user_id):
+    """
+    Returns the ids of all boards whose detail output shows the given user.
+    """
+    return Board.all_objects.filter(
+        models.Q(members=user_id)
+        | models.Q(tasks__assignee_id=user_id)
+        | models.Q(tasks__reviewer_id=user_id)
+        | models.Q(tasks__creator_id=user_id)
+    ).values_list('id', flat=True).distinct()
+
+
+@receiver([post_save, post_delete], sender=Task)
+@unless_muted
+def snapshot_task_changed(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Board):
+        return
+    bump_board_versions([instance.board_id])
+
+
+@receiver(post_save, sender=Board)
+@unless_muted
+def snapshot_board_saved(sender, instance, created, **kwargs):
+    # Board.save() already bumped the version; new boards are rendered on first read
+    if not created and not instance.is_deleted:
+        transaction.on_commit(lambda: schedule_rebuild(instance.pk))
+
+
+@receiver(m2m_changed, sender=Board.members.through)
+@unless_muted
+def snapshot_members_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # user.boards.add(): pk_set holds board ids (None for clear, handled in pre_clear above)
+        board_ids = pk_set if pk_set is not None else getattr(instance, '_cleared_ids', [])
+    else:
+        board_ids = [instance.pk]
+    bump_board_versions(board_ids)
+
+
+# User summaries (auth_app/user_summaries.py)
+
+@receiver(user_summary_changed)
+def refresh_user_renderings(sender, user_id, **kwargs):
+    """
+    Runs after auth_app dropped the changed summary of a user: the tasks and
+    boards showing the user get new versions (outdated snapshots are rebuilt
+    when they are read next). A render between the commit and this bump
+    stores its output under versions that are never served again.
+    """
+    bump_task_versions(tasks_of_user(user_id))
+    bump_board_versions(list(boards_of_user(user_id)), rebuild=False)
+
+
+# Webhooks (kanban_app/webhooks.py)
+
+def task_event_data(task):
+    return {
+        'id': task.pk, 'board': task.board_id, 'title': task.title, 'status': task.status,
+        'priority': task.priority, 'assignee': task.assignee_id, 'reviewer': task.reviewer_id,
+        'due_date': task.due_date,
+    }
+
+
+@receiver(post_save, sender=Task)
+@unless_muted
+def webhook_task_saved(sender, instance, created, **kwargs):
+    if created:
+        webhooks.enqueue(instance.board_id, 'task.created', task=task_event_data(instance))
+        return
+    fields = task_changes(instance)
+    if fields:
+        webhooks.enqueue(instance.board_id, 'task.updated', task=task_event_data(instance), changed=fields)
+
+
+@receiver(post_delete, sender=Task)
+@unless_muted
+def webhook_task_deleted(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Board):
+        return
+    webhooks.enqueue(instance.board_id, 'task.deleted', task={'id': instance.pk, 'board': instance.board_id})
+
+
+@receiver(post_save, sender=Comment)
+@unless_muted
+def webhook_comment_added(sender, instance, created, **kwargs):
+    if created:
+        webhooks.enqueue(instance.task.board_id, 'comment.created', comment={
+            'id': instance.pk, 'task': instance.task_id, 'author': instance.author_id, 'content': instance.content,
+        })
+
+
+@receiver(post_delete, sender=Comment)
+@unless_muted
+def webhook_comment_deleted(sender, instance, origin=None, **kwargs):
+    if origin is not None and not isinstance(origin, Comment):
+        return
+    webhooks.enqueue(instance.task.board_id, 'comment.deleted', comment={'id': instance.pk, 'task': instance.task_id})
+
+
+@receiver([post_save, post_delete], sender=WebhookSubscription)
+def webhook_subscriptions_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: webhooks.invalidate_board(instance.board_id))
@@ -0,0 +1,110 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
+
+from kanban_app.models import Board, BoardSnapshot, Job
+
+
+def _debounce():
+    return timedelta(seconds=getattr(settings, 'BOARD_SNAPSHOT_DEBOUNCE', 2.0))
+
+
+def render_board(board, uncached=False):
+    """
+    Renders the full GET /api/boards/<id>/ response body of `board`, byte for
+    byte what the view would send (same serializer, same JSON renderer).
+    With `uncached`, the tasks are read from the database instead of the fragment cache.
+    """
+    # Imported lazily: this module is loaded with the signal receivers at app
+    # startup, and DRF (~75 ms of imports) is only needed once something renders
+    from rest_framework.renderers import JSONRenderer
+
+    from kanban_app.api.serializers import BoardDetailSerializer
+
+    serializer = BoardDetailSerializer(board, context={'uncached': uncached})
+    return JSONRenderer().render(serializer.data).decode()
+
+
+def store_snapshot(board, uncached=False):
+    """
+    Renders `board` and stores the result for the version the board was loaded with.
+
+    The board is loaded before its tasks and members are read, so the stored
+    data is never older than the version it is labeled with.
+    """
+    data = render_board(board, uncached)
+    BoardSnapshot.objects.update_or_create(board_id=board.pk, defaults={'version': board.version, 'data': data})
+    return data
+
+
+def snapshot_etag(board):
+    """
+    ETag of the full board detail response; it changes with every version bump.
+    """
+    return f'"board-{board.pk}-v{board.version}"'
+
+
+def get_snapshot_data(board):
+    """
+    Returns the response body for `board`: the stored snapshot if it matches
+    the board's version, otherwise a freshly rendered one (which is stored).
+    """
+    data = (
+        BoardSnapshot.objects
+        .filter(board_id=board.pk, version=board.version)
+        .values_list('data', flat=True)
+        .first()
+    )
+    if data is None:
+        data = store_snapshot(board)
+    return data
+
+
+def rebuild_snapshot(board_id):
+    """
+    Rebuilds the snapshot of one board unless it is deleted or already current.
+    """
+    board = Board.objects.filter(pk=board_id).prefetch_related('members').first()
+    if board is None:
+        return
+    if BoardSnapshot.objects.filter(board_id=board_id, version=board.version).exists():
+        return
+    store_snapshot(board)
+
+
+def bump_board_versions(board_ids, rebuild=True):
+    """
+    Marks the snapshots of the given boards as outdated with one UPDATE and,
+    with `rebuild`, schedules their (debounced) rebuild once the transaction commits.
+    """
+    board_ids = {board_id for board_id in board_ids if board_id is not None}
+    if not board_ids:
+        return
+    Board.all_objects.filter(pk__in=board_ids).update(version=models.F('version') + 1)
+    if rebuild:
+        for board_id in board_ids:
+            transaction.on_commit(lambda board_id=board_id: schedule_rebuild(board_id))
+
+
+def _scheduled_key(board_id):
+    return f'snapshot-rebuild:{board_id}'
+
+
+def schedule_rebuild(board_id):
+    """
+    Queues a snapshot rebuild after the debounce delay. Further changes within
+    that delay are covered by the job that is already pending; a cache entry
+    that lives as long as the delay marks it, so coalesced changes cost no query.
+
+    The entry is per process with the default cache, so several processes may
+    queue a job for the same board; the later ones find the snapshot current.
+    """
+    from kanban_app.jobs import enqueue
+
+    debounce = _debounce()
+    # add() only succeeds for the first change within the delay; the entry
+    # expires before the job becomes due, so no later change is left uncovered
+    if cache.add(_scheduled_key(board_id), True, debounce.total_seconds()):
+        enqueue(Job.KIND_REBUILD_SNAPSHOT, delay=debounce, board_id=board_id)
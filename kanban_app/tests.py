@@ -1,3 +1,1269 @@
-from django.test import TestCase
+import gzip
+import hashlib
+import hmac
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from auth_app import user_summaries
+from auth_app.models import UserProfile
+from core.admission import AdmissionControlMiddleware
+from core.coalescing import SingleFlight
+from core.metrics import REGISTRY
+from core.querylog import normalize_sql
+from kanban_app import activity, digests, jobs, webhooks
+from kanban_app.api import fragments
+from kanban_app.api.readers import serialize_comments, serialize_tasks
+from kanban_app.api.serializers import CommentSerializer, TaskSerializer
+from kanban_app.api.summary import build_summary
+from kanban_app.flow_metrics import rollup_day
+from kanban_app.management.commands import loadtest
+from kanban_app.models import (
+    Activity, Board, BoardDailyMetrics, BoardSnapshot, Comment, Digest, DigestRun, Job, Task,
+    TaskStatusChange, WebhookEvent, WebhookSubscription,
+)
+
+
+# Both caches in memory, so tests neither share state with nor write to the
+# file-based cache of a running development server
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'kanban-tests'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'kanban-tests-shared'},
+}
+
+
+def create_user(email, fullname='User'):
+    user = User.objects.create_user(username=email, email=email, password='secret-password')
+    UserProfile.objects.create(user=user, fullname=fullname)
+    return user
+
+
+@override_settings(
+    CACHES=TEST_CACHES,
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    # Many requests per test from the same client address
+    ADMISSION_CONTROL={**settings.ADMISSION_CONTROL, 'rate': 10000.0, 'burst': 10000},
+    METRICS={**settings.METRICS, 'directory': None},
+)
+class KanbanTestCase(TestCase):
+    """
+    A board owned by `owner` with `member` as member; `outsider` has no access.
+    `self.client` is authenticated as the owner.
+    """
+
+    def setUp(self):
+        for alias in TEST_CACHES:
+            caches[alias].clear()
+        # Ids are reused after the rollback of a test; local entries must not survive it
+        user_summaries._cache.clear()
+        # Events a test left unflushed belong to its rolled back data
+        self.addCleanup(activity._process_buffer.events.clear)
+
+        self.owner = create_user('owner@example.com', 'Olivia Owner')
+        self.member = create_user('member@example.com', 'Max Member')
+        self.outsider = create_user('outsider@example.com', 'Oscar Outsider')
+        self.board = Board.objects.create(title='Board', owner=self.owner)
+        self.board.members.add(self.member)
+        self.client = self.client_for(self.owner)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def create_task(self, **kwargs):
+        fields = {'board': self.board, 'title': 'Task', 'status': 'to-do', 'priority': 'medium', 'creator': self.owner}
+        fields.update(kwargs)
+        return Task.objects.create(**fields)
+
+
+class FragmentCacheTests(KanbanTestCase):
+    """
+    Serialized-task fragment cache shared by the task lists and the board detail.
+    """
+
+    def stats_delta(self, before):
+        after = fragments.get_stats()
+        return after['hits'] - before['hits'], after['misses'] - before['misses']
+
+    def test_second_request_is_served_from_the_cache(self):
+        self.create_task(title='A', assignee=self.owner)
+        self.create_task(title='B', assignee=self.owner)
+
+        before = fragments.get_stats()
+        first = self.client.get('/api/tasks/assigned-to-me/').json()
+        self.assertEqual(self.stats_delta(before), (0, 2))
+
+        before = fragments.get_stats()
+        second = self.client.get('/api/tasks/assigned-to-me/').json()
+        self.assertEqual(self.stats_delta(before), (2, 0))
+        self.assertEqual(first, second)
+        self.assertEqual([task['title'] for task in first], ['A', 'B'])
+
+    def test_cached_output_matches_the_serializer(self):
+        self.create_task(title='A', assignee=self.member, reviewer=self.owner, due_date=date(2025, 7, 1))
+        self.client.get('/api/tasks/reviewing/')
+
+        cached = self.client.get('/api/tasks/reviewing/').json()
+        expected = json.loads(json.dumps(TaskSerializer(Task.objects.all(), many=True).data))
+        self.assertEqual(cached, expected)
+
+    def test_changes_invalidate_the_fragment(self):
+        task = self.create_task(title='Old', assignee=self.owner)
+        self.client.get('/api/tasks/assigned-to-me/')
+
+        response = self.client.patch(f'/api/tasks/{task.pk}/', {'title': 'New'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/api/tasks/assigned-to-me/').json()[0]['title'], 'New')
+
+        # A new comment bumps the version as well
+        version = Task.objects.get(pk=task.pk).version
+        self.client.post(f'/api/tasks/{task.pk}/comments/', {'content': 'Hi'}, format='json')
+        self.assertEqual(Task.objects.get(pk=task.pk).version, version + 1)
+
+    def test_stale_instance_never_reuses_a_version(self):
+        task = self.create_task(title='Original', assignee=self.owner)
+        first, second = Task.objects.get(pk=task.pk), Task.objects.get(pk=task.pk)
+
+        first.title = 'First'
+        first.save()
+        self.client.get('/api/tasks/assigned-to-me/')  # caches "First" under version 2
+        second.title = 'Second'
+        second.save()
+
+        self.assertEqual((first.version, second.version), (2, 3))
+        self.assertEqual(self.client.get('/api/tasks/assigned-to-me/').json()[0]['title'], 'Second')
+
+    def test_stats_endpoint_is_staff_only(self):
+        self.assertEqual(self.client.get('/api/tasks/fragment-cache-stats/').status_code, 403)
+
+        self.owner.is_staff = True
+        self.owner.save()
+        response = self.client_for(self.owner).get('/api/tasks/fragment-cache-stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data), {'hits', 'misses', 'bytes_saved', 'hit_ratio'})
+
+
+class DashboardSummaryTests(KanbanTestCase):
+
+    def test_counts_by_role(self):
+        today = timezone.localdate()
+        self.create_task(assignee=self.owner, status='to-do', priority='high', due_date=today - timedelta(days=1))
+        self.create_task(assignee=self.owner, status='done', priority='low', due_date=today - timedelta(days=1))
+        self.create_task(reviewer=self.owner, status='review', priority='high')
+
+        summary = self.client.get('/api/summary/').json()
+
+        self.assertEqual(summary['board_count'], 1)
+        self.assertEqual(summary['assigned']['total'], 2)
+        self.assertEqual(summary['assigned']['by_status'], {'to-do': 1, 'done': 1})
+        self.assertEqual(summary['assigned']['overdue'], 1)
+        self.assertEqual(summary['reviewing']['by_priority'], {'high': 1})
+
+    def test_built_with_two_queries(self):
+        self.create_task(assignee=self.owner)
+        with self.assertNumQueries(2):
+            build_summary(self.owner)
+
+    def test_cached_summary_is_invalidated_by_changes(self):
+        self.assertEqual(self.client.get('/api/summary/').json()['assigned']['total'], 0)
+        task = self.create_task(assignee=self.owner)
+        self.assertEqual(self.client.get('/api/summary/').json()['assigned']['total'], 1)
+
+        # Reassigning updates the previous and the new assignee
+        self.client.patch(f'/api/tasks/{task.pk}/', {'assignee_id': self.member.pk}, format='json')
+        self.assertEqual(self.client.get('/api/summary/').json()['assigned']['total'], 0)
+        self.assertEqual(self.client_for(self.member).get('/api/summary/').json()['assigned']['total'], 1)
+
+        self.client.delete(f'/api/boards/{self.board.pk}/')
+        self.assertEqual(self.client_for(self.member).get('/api/summary/').json()['board_count'], 0)
+
+
+class SoftDeleteTests(KanbanTestCase):
+
+    def test_delete_hides_the_board_and_purges_it_in_the_background(self):
+        task = self.create_task()
+        Comment.objects.create(task=task, author=self.owner, content='Hi')
+
+        response = self.client.delete(f'/api/boards/{self.board.pk}/')
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.client.get(f'/api/boards/{self.board.pk}/').status_code, 404)
+        self.assertEqual(self.client.get('/api/boards/').json(), [])
+        self.assertTrue(Board.all_objects.filter(pk=self.board.pk).exists())
+
+        with self.settings(BOARD_PURGE_CHUNK_SIZE=1):
+            call_command('process_jobs', '--once', stdout=io.StringIO())
+
+        self.assertFalse(Board.all_objects.filter(pk=self.board.pk).exists())
+        self.assertFalse(Task.objects.filter(pk=task.pk).exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(Job.objects.get(kind=Job.KIND_PURGE_BOARD).status, Job.STATUS_DONE)
+
+    def test_only_the_owner_can_delete(self):
+        response = self.client_for(self.member).delete(f'/api/boards/{self.board.pk}/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_failed_job_is_retried_later(self):
+        job = jobs.enqueue('unknown_kind')
+        claimed = jobs.claim_next_job()
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertFalse(jobs.run_job(claimed))
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.STATUS_PENDING, 1))
+        self.assertGreater(job.available_at, timezone.now())
+        self.assertIsNone(jobs.claim_next_job())
+
+    def test_job_of_a_lost_worker_is_reclaimed_after_the_lease(self):
+        job = jobs.enqueue(Job.KIND_PURGE_BOARD, board_id=self.board.pk)
+        self.assertEqual(jobs.claim_next_job().pk, job.pk)
+        self.assertIsNone(jobs.claim_next_job())
+
+        Job.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        reclaimed = jobs.claim_next_job()
+        self.assertEqual((reclaimed.pk, reclaimed.attempts), (job.pk, 2))
+
+        Job.objects.filter(pk=job.pk).update(attempts=jobs.MAX_ATTEMPTS, updated_at=timezone.now() - timedelta(hours=1))
+        self.assertIsNone(jobs.claim_next_job())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.last_error), (Job.STATUS_FAILED, "Worker lost"))
+
+
+@override_settings(ADMISSION_CONTROL={
+    'read': {'concurrency': 1, 'queue': 0, 'timeout': 0.1},
+    'write': {'concurrency': 1, 'queue': 0, 'timeout': 0.1},
+    'rate': 1.0,
+    'burst': 3,
+})
+class AdmissionControlTests(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.view_calls = 0
+
+    def view(self, request):
+        from django.http import HttpResponse
+        self.view_calls += 1
+        return HttpResponse('ok')
+
+    def test_rate_limit_per_client_address(self):
+        middleware = AdmissionControlMiddleware(self.view)
+        statuses = [middleware(self.factory.get('/api/boards/')).status_code for _ in range(4)]
+        other = middleware(self.factory.get('/api/boards/', REMOTE_ADDR='10.0.0.2'))
+
+        self.assertEqual(statuses, [200, 200, 200, 429])
+        self.assertEqual(other.status_code, 200)
+        self.assertEqual(self.view_calls, 4)
+
+    def test_made_up_tokens_share_the_bucket_of_the_address(self):
+        middleware = AdmissionControlMiddleware(self.view)
+        statuses = [
+            middleware(self.factory.get('/api/boards/', HTTP_AUTHORIZATION=f'Token fake-{index}')).status_code
+            for index in range(4)
+        ]
+        self.assertEqual(statuses[-1], 429)
+
+    def test_batch_costs_one_token_per_sub_request(self):
+        middleware = AdmissionControlMiddleware(self.view)
+        body = json.dumps({'requests': [{'method': 'GET', 'path': '/api/boards/'}] * 3})
+        first = middleware(self.factory.post('/api/batch/', body, content_type='application/json'))
+        second = middleware(self.factory.get('/api/boards/'))
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 429)
+        self.assertEqual(second['Retry-After'], '1')
+
+    def test_full_pool_sheds_with_503(self):
+        middleware = AdmissionControlMiddleware(self.view)
+        middleware.pools['write'].acquire()  # A request in flight
+        try:
+            response = middleware(self.factory.post('/api/tasks/', '{}', content_type='application/json'))
+        finally:
+            middleware.pools['write'].release()
+        read = middleware(self.factory.get('/api/boards/'))
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(read.status_code, 200)
+
+    def test_only_api_requests_are_limited(self):
+        middleware = AdmissionControlMiddleware(self.view)
+        statuses = {middleware(self.factory.get('/admin/')).status_code for _ in range(5)}
+        self.assertEqual(statuses, {200})
+
+
+class SparseFieldsetTests(KanbanTestCase):
+
+    def test_task_list_fields_and_expand(self):
+        self.create_task(title='A', assignee=self.owner, reviewer=self.member)
+
+        sparse = self.client.get('/api/tasks/assigned-to-me/?fields=id,title,assignee&expand=').json()
+        expanded = self.client.get('/api/tasks/assigned-to-me/?fields=id,assignee&expand=assignee').json()
+
+        self.assertEqual(set(sparse[0]), {'id', 'title', 'assignee'})
+        self.assertEqual(sparse[0]['assignee'], self.owner.pk)
+        self.assertEqual(expanded[0]['assignee']['email'], 'owner@example.com')
+
+    def test_board_detail_nested_task_fields(self):
+        self.create_task(title='A', assignee=self.owner)
+
+        data = self.client.get(f'/api/boards/{self.board.pk}/?fields=id,tasks.id,tasks.status&expand=').json()
+
+        self.assertEqual(set(data), {'id', 'tasks'})
+        self.assertEqual(set(data['tasks'][0]), {'id', 'status'})
+
+    def test_only_requested_columns_are_selected(self):
+        self.create_task(title='A', description='long text', assignee=self.owner)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/tasks/assigned-to-me/?fields=id,title')
+        task_query = next(query['sql'] for query in queries if 'FROM "kanban_app_task"' in query['sql'])
+        self.assertNotIn('"description"', task_query)
+
+    def test_unknown_names_are_rejected(self):
+        response = self.client.get('/api/tasks/assigned-to-me/?fields=id,secret')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fields', response.json())
+
+
+class BatchTests(KanbanTestCase):
+
+    def test_sub_requests_run_in_order_with_the_callers_user(self):
+        response = self.client.post('/api/batch/', {'requests': [
+            {'method': 'POST', 'path': '/api/tasks/', 'body': {
+                'board': self.board.pk, 'title': 'Batched', 'status': 'to-do', 'priority': 'low',
+                'assignee_id': self.owner.pk,
+            }},
+            {'method': 'GET', 'path': '/api/tasks/assigned-to-me/?fields=title'},
+            {'method': 'GET', 'path': '/api/nothing-here/'},
+            {'method': 'POST', 'path': '/api/batch/', 'body': {'requests': []}},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        statuses = [item['status'] for item in response.data['responses']]
+        self.assertEqual(statuses, [201, 200, 404, 400])
+        self.assertEqual(response.data['responses'][1]['body'], [{'title': 'Batched'}])
+
+    def test_conditional_headers_are_not_passed_on(self):
+        etag = self.client.get(f'/api/boards/{self.board.pk}/')['ETag']
+
+        response = self.client.post('/api/batch/', {'requests': [
+            {'method': 'GET', 'path': f'/api/boards/{self.board.pk}/'},
+        ]}, format='json', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.data['responses'][0]['status'], 200)
+        self.assertEqual(response.data['responses'][0]['body']['title'], 'Board')
+
+    def test_invalid_batches_are_rejected(self):
+        too_many = [{'method': 'GET', 'path': '/api/boards/'}] * (settings.BATCH_MAX_REQUESTS + 1)
+        self.assertEqual(self.client.post('/api/batch/', {'requests': too_many}, format='json').status_code, 400)
+        self.assertEqual(self.client.post('/api/batch/', {'requests': [
+            {'method': 'GET', 'path': '/admin/'},
+        ]}, format='json').status_code, 400)
+
+
+class LoadTestHarnessTests(SimpleTestCase):
+
+    class FakeClient:
+        def __init__(self, result):
+            self.result = result
+
+        def request(self, method, path, token=None, body=None):
+            return self.result
+
+    def scenario(self):
+        scenario = loadtest.Scenario()
+        scenario.users.append((1, 'token', 1))
+        return scenario
+
+    def test_parse_mix(self):
+        self.assertEqual(loadtest.parse_mix('board_read=3,task_patch=1'), {'board_read': 3.0, 'task_patch': 1.0})
+        with self.assertRaises(CommandError):
+            loadtest.parse_mix('nope=1')
+
+    def test_routes_without_task_or_json_body_are_errors(self):
+        recorder = loadtest.Recorder()
+        scenario = self.scenario()
+        recorder.record('task_patch', loadtest.ROUTES['task_patch'](self.FakeClient((200, {})), scenario), 0.01)
+        # A 201 with an HTML body (no JSON) is not remembered as a task
+        recorder.record('task_create', loadtest.ROUTES['task_create'](self.FakeClient((201, None)), scenario), 0.01)
+        recorder.record('board_read', loadtest.ROUTES['board_read'](self.FakeClient((500, None)), scenario), 0.01)
+
+        summary = recorder.summary(1.0)
+        self.assertEqual(summary['task_patch']['statuses'], {loadtest.NO_TASK: 1})
+        self.assertEqual(summary['task_patch']['error_rate'], 1.0)
+        self.assertEqual(summary['task_create']['error_rate'], 0.0)
+        self.assertEqual(scenario.tasks[1], [])
+        self.assertEqual(summary['all']['count'], 3)
+        self.assertAlmostEqual(summary['all']['error_rate'], 2 / 3)
+
+    def test_short_run_against_a_local_server(self):
+        with socket_port() as port:
+            pass
+        output = io.StringIO()
+        call_command(
+            'loadtest', '--users', '2', '--board-size', '2', '--seed-tasks', '1', '--concurrency', '2',
+            '--rps', '10', '--duration', '1', '--port', str(port), '--json', stdout=output, stderr=io.StringIO(),
+        )
+        results = next(iter(json.loads(output.getvalue()).values()))
+        self.assertEqual(results['all']['count'], 10)
+        self.assertEqual(results['all']['error_rate'], 0.0)
+
+
+class socket_port:
+    """
+    Context manager returning a free local TCP port.
+    """
+
+    def __enter__(self):
+        import socket
+        self.socket = socket.socket()
+        self.socket.bind(('127.0.0.1', 0))
+        return self.socket.getsockname()[1]
+
+    def __exit__(self, *exc_info):
+        self.socket.close()
+
+
+class ProfilingTests(KanbanTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.settings_override = self.settings(PROFILING={'directory': self.directory.name, 'token': 'profile-me'})
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.client = self.client_for(self.owner)
+
+    def test_requests_with_the_token_are_profiled(self):
+        plain = self.client.get('/api/boards/')
+        profiled = self.client.get('/api/boards/', HTTP_X_PROFILE='profile-me')
+
+        self.assertNotIn('X-Profile-Id', plain)
+        name = profiled['X-Profile-Id']
+        self.assertIn('BoardListCreateView', name)
+        self.assertTrue((Path(self.directory.name) / f'{name}.pstats').exists())
+        self.assertTrue((Path(self.directory.name) / f'{name}.collapsed').exists())
+
+        output = io.StringIO()
+        call_command('profile_hotspots', '--directory', self.directory.name, stdout=output)
+        self.assertIn('1 profiles', output.getvalue())
+
+    def test_profiler_already_active_falls_back_to_the_sampler(self):
+        with mock.patch('cProfile.Profile.enable', side_effect=ValueError("Another profiling tool is already active")):
+            response = self.client.get('/api/boards/', HTTP_X_PROFILE='profile-me')
+
+        self.assertEqual(response.status_code, 200)
+        name = response['X-Profile-Id']
+        self.assertFalse((Path(self.directory.name) / f'{name}.pstats').exists())
+        self.assertTrue((Path(self.directory.name) / f'{name}.collapsed').exists())
+
+
+class MetricsEndpointTests(KanbanTestCase):
+
+    def test_exposition_after_requests(self):
+        self.client.get('/api/boards/')
+        response = self.client.get('/metrics')
+
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('# TYPE kanmind_http_requests_total counter', body)
+        self.assertIn('kanmind_http_requests_total{url_name="board-list-create",method="GET",status="200"}', body)
+        self.assertIn('kanmind_http_request_duration_seconds_bucket{url_name="board-list-create",method="GET",le="+Inf"}', body)
+
+    def test_only_allowed_addresses_or_the_token(self):
+        with self.settings(METRICS={'directory': None, 'token': 'scrape', 'allowed_ips': ['127.0.0.1']}):
+            self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.1.2.3').status_code, 403)
+            self.assertEqual(self.client.get(
+                '/metrics', REMOTE_ADDR='10.1.2.3', HTTP_AUTHORIZATION='Bearer wrong'
+            ).status_code, 403)
+            self.assertEqual(self.client.get(
+                '/metrics', REMOTE_ADDR='10.1.2.3', HTTP_AUTHORIZATION='Bearer scr\xe4pe'
+            ).status_code, 403)
+            self.assertEqual(self.client.get(
+                '/metrics', REMOTE_ADDR='10.1.2.3', HTTP_AUTHORIZATION='Bearer scrape'
+            ).status_code, 200)
+
+    def test_files_of_exited_processes_are_folded_into_the_archive(self):
+        with tempfile.TemporaryDirectory() as directory:
+            exited = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'], capture_output=True, text=True)
+            pid = int(exited.stdout)
+            key = json.dumps(['test', 'GET', '200'])
+            Path(directory, f'metrics-{pid}.json').write_text(json.dumps({
+                'pid': pid, 'metrics': {'kanmind_http_requests_total': {key: 5}, 'kanmind_http_requests_in_flight': {'[]': 3}},
+            }))
+
+            with self.settings(METRICS={'directory': directory}):
+                merged = REGISTRY.merged()
+                again = REGISTRY.merged()
+
+            self.assertFalse(Path(directory, f'metrics-{pid}.json').exists())
+            self.assertEqual(merged['kanmind_http_requests_total'][key], 5)
+            self.assertEqual(again['kanmind_http_requests_total'][key], 5)
+            # Gauges of exited processes are dropped
+            self.assertLess(merged['kanmind_http_requests_in_flight'].get('[]', 0), 3)
+
+
+class SlowQueryLogTests(KanbanTestCase):
+
+    def test_normalize_sql(self):
+        self.assertEqual(
+            normalize_sql("SELECT * FROM t WHERE a = 'x' AND b IN (%s, %s, %s) AND c > 10"),
+            "SELECT * FROM t WHERE a = ? AND b IN (...) AND c > ?",
+        )
+
+    def test_slow_statements_are_logged_with_plan_and_ranked(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'slow.log'
+            config = {'threshold_ms': 0, 'path': path, 'redact_params': True}
+            # The logger is attached to its file on first use
+            with mock.patch('core.querylog._logger', None), self.settings(SLOW_QUERY_LOG=config):
+                self.client_for(self.owner).get(f'/api/boards/{self.board.pk}/tasks/')
+                import core.querylog
+                for handler in core.querylog._logger.handlers:
+                    handler.close()
+                core.querylog._logger.handlers.clear()
+
+            entries = [json.loads(line) for line in path.read_text().splitlines()]
+            task_query = next(entry for entry in entries if 'FROM "kanban_app_task"' in entry['sql'])
+            self.assertEqual(task_query['view'], 'BoardTasksView')
+            self.assertTrue(task_query['plan'])
+            self.assertTrue(all(param == '?' for param in task_query['params']))
+
+            output = io.StringIO()
+            call_command('slow_queries', '--path', str(path), '--plans', stdout=output)
+            self.assertIn('#1', output.getvalue())
+            self.assertIn('plan:', output.getvalue())
+
+
+class ApiSettingsProfileTests(SimpleTestCase):
+
+    def test_api_profile_loads_without_drf_until_the_first_request(self):
+        script = (
+            "import sys, django; django.setup(); "
+            "from django.conf import settings; "
+            "assert 'django.contrib.admin' not in settings.INSTALLED_APPS; "
+            "print(sorted(name for name in ('rest_framework.views', 'rest_framework.serializers', "
+            "'rest_framework.renderers') if name in sys.modules))"
+        )
+        result = subprocess.run(
+            [sys.executable, '-c', script], cwd=settings.BASE_DIR, capture_output=True, text=True,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'core.settings_api'},
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), '[]')
+
+    def test_startup_benchmark(self):
+        output = io.StringIO()
+        call_command('startup_benchmark', '--profile', 'core.settings_api', '--runs', '1', '--json', stdout=output)
+        result = json.loads(output.getvalue())['core.settings_api']
+        self.assertEqual(result['status'], '401 Unauthorized')
+        self.assertAlmostEqual(result['ready'], result['setup'] + result['handler'] + result['first_request'])
+
+
+class ActivityLogTests(KanbanTestCase):
+
+    def test_changes_are_logged_with_their_actor(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task_id = self.client.post('/api/tasks/', {
+                'board': self.board.pk, 'title': 'A', 'status': 'to-do', 'priority': 'low',
+            }, format='json').data['id']
+            self.client.patch(f'/api/tasks/{task_id}/', {'status': 'done'}, format='json')
+            self.client.post(f'/api/tasks/{task_id}/comments/', {'content': 'Hi'}, format='json')
+        activity.flush()
+
+        entries = list(Activity.objects.filter(board=self.board).order_by('id'))
+        self.assertEqual([entry.verb for entry in entries], [
+            Activity.VERB_TASK_CREATED, Activity.VERB_TASK_UPDATED, Activity.VERB_COMMENT_ADDED,
+        ])
+        self.assertEqual({entry.actor_id for entry in entries}, {self.owner.pk})
+        self.assertEqual(entries[1].data['changes'], {'status': ['to-do', 'done']})
+
+    def test_events_of_rolled_back_transactions_are_dropped(self):
+        from django.db import transaction
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.create_task()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        activity.flush()
+        self.assertFalse(Activity.objects.filter(verb=Activity.VERB_TASK_CREATED).exists())
+
+    def test_endpoint_pages_newest_first_for_members_only(self):
+        now = timezone.now()
+        Activity.objects.bulk_create(
+            Activity(board=self.board, verb=Activity.VERB_TASK_CREATED, task_id=index, created_at=now + timedelta(seconds=index))
+            for index in range(5)
+        )
+
+        first = self.client_for(self.member).get(f'/api/boards/{self.board.pk}/activity/?page_size=3').json()
+        second = self.client_for(self.member).get(first['next']).json()
+
+        self.assertEqual([entry['task_id'] for entry in first['results']], [4, 3, 2])
+        self.assertEqual([entry['task_id'] for entry in second['results']], [1, 0])
+        self.assertEqual(self.client_for(self.outsider).get(f'/api/boards/{self.board.pk}/activity/').status_code, 403)
+
+
+class BoardMembersTests(KanbanTestCase):
+
+    def test_add_and_remove_by_email(self):
+        response = self.client.post(f'/api/boards/{self.board.pk}/members/', {
+            'add': ['outsider@example.com', 'nobody@example.com'],
+            'remove': ['member@example.com'],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['not_found'], ['nobody@example.com'])
+        self.assertEqual([member['id'] for member in response.data['members_data']], [self.outsider.pk])
+        self.assertEqual(list(self.board.members.values_list('id', flat=True)), [self.outsider.pk])
+
+    def test_validation_and_permission(self):
+        empty = self.client.post(f'/api/boards/{self.board.pk}/members/', {}, format='json')
+        both = self.client.post(f'/api/boards/{self.board.pk}/members/', {
+            'add': ['member@example.com'], 'remove': ['member@example.com'],
+        }, format='json')
+        outsider = self.client_for(self.outsider).post(f'/api/boards/{self.board.pk}/members/', {
+            'add': ['outsider@example.com'],
+        }, format='json')
+
+        self.assertEqual((empty.status_code, both.status_code, outsider.status_code), (400, 400, 403))
+
+
+class BoardTaskQueryTests(KanbanTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tasks = [
+            self.create_task(title=f'T{index}', status=status, assignee=assignee, due_date=due_date)
+            for index, (status, assignee, due_date) in enumerate([
+                ('to-do', self.owner, date(2025, 7, 3)),
+                ('review', self.member, date(2025, 7, 1)),
+                ('to-do', None, None),
+                ('done', self.owner, date(2025, 7, 2)),
+                ('to-do', self.member, date(2025, 7, 1)),
+            ])
+        ]
+
+    def titles(self, query):
+        response = self.client.get(f'/api/boards/{self.board.pk}/tasks/{query}')
+        self.assertEqual(response.status_code, 200, response.content)
+        return [task['title'] for task in response.json()['results']]
+
+    def test_filters(self):
+        self.assertEqual(self.titles('?status=to-do,review'), ['T0', 'T1', 'T2', 'T4'])
+        self.assertEqual(self.titles('?assignee=me'), ['T0', 'T3'])
+        self.assertEqual(self.titles(f'?assignee={self.member.pk}&status=to-do'), ['T4'])
+        self.assertEqual(self.titles('?assignee=none'), ['T2'])
+        self.assertEqual(self.titles('?due_after=2025-07-02&due_before=2025-07-03'), ['T0', 'T3'])
+
+    def test_ordering_puts_tasks_without_due_date_last(self):
+        self.assertEqual(self.titles('?ordering=due_date'), ['T1', 'T4', 'T3', 'T0', 'T2'])
+        self.assertEqual(self.titles('?ordering=-due_date'), ['T0', 'T3', 'T4', 'T1', 'T2'])
+
+    def test_cursor_pages_cover_every_task_once(self):
+        for ordering in ('id', '-id', 'due_date', '-due_date'):
+            url = f'/api/boards/{self.board.pk}/tasks/?ordering={ordering}&page_size=2&fields=title'
+            titles = []
+            while url:
+                data = self.client.get(url).json()
+                titles += [task['title'] for task in data['results']]
+                url = data['next']
+            self.assertEqual(titles, self.titles(f'?ordering={ordering}'), ordering)
+
+    def test_invalid_queries_are_rejected(self):
+        base = f'/api/boards/{self.board.pk}/tasks/'
+        for query in ('?colour=red', '?ordering=title', '?cursor=garbage', '?assignee=someone',
+                      '?due_after=2025-07-03&due_before=2025-07-01', '?page_size=0'):
+            self.assertEqual(self.client.get(base + query).status_code, 400, query)
+
+        cursor = self.client.get(base + '?page_size=1').json()['next'].split('cursor=')[1]
+        self.assertEqual(self.client.get(base + f'?ordering=due_date&cursor={cursor}').status_code, 400)
+
+    def test_outsiders_have_no_access(self):
+        response = self.client_for(self.outsider).get(f'/api/boards/{self.board.pk}/tasks/')
+        self.assertEqual(response.status_code, 403)
+
+
+class FastReaderTests(KanbanTestCase):
+
+    def test_readers_match_the_serializers(self):
+        nobody = User.objects.create_user(username='nobody@example.com', email='nobody@example.com')
+        task = self.create_task(assignee=self.member, reviewer=nobody, due_date=date(2025, 7, 1))
+        self.create_task(status='done')
+        for author in (self.owner, nobody):
+            Comment.objects.create(task=task, author=author, content='Hi')
+
+        tasks = Task.objects.order_by('id')
+        comments = Comment.objects.order_by('created_at', 'id')
+        self.assertEqual(json.dumps(serialize_tasks(tasks)), json.dumps(TaskSerializer(tasks, many=True).data))
+        self.assertEqual(json.dumps(serialize_comments(comments)), json.dumps(CommentSerializer(comments, many=True).data))
+
+    def test_comment_list(self):
+        task = self.create_task()
+        self.client.post(f'/api/tasks/{task.pk}/comments/', {'content': 'First'}, format='json')
+        self.client_for(self.member).post(f'/api/tasks/{task.pk}/comments/', {'content': 'Second'}, format='json')
+
+        comments = self.client.get(f'/api/tasks/{task.pk}/comments/').json()
+        self.assertEqual([(comment['author'], comment['content']) for comment in comments], [
+            ('Olivia Owner', 'First'), ('Max Member', 'Second'),
+        ])
+
+    def test_serializer_benchmark(self):
+        output = io.StringIO()
+        call_command('serializer_benchmark', '--tasks', '30', '--comments', '30', '--users', '5', '--runs', '1', stdout=output)
+        self.assertEqual(output.getvalue().count('identical output'), 2)
+        self.assertFalse(User.objects.filter(username__startswith='bench-').exists())
+
+
+class BoardSnapshotTests(KanbanTestCase):
+
+    def test_detail_is_served_from_the_snapshot_and_revalidated(self):
+        task = self.create_task(title='A', assignee=self.member)
+
+        first = self.client.get(f'/api/boards/{self.board.pk}/')
+        self.assertEqual(first.status_code, 200)
+        snapshot = BoardSnapshot.objects.get(board=self.board)
+        self.assertEqual(first.content.decode(), snapshot.data)
+        self.assertEqual(first['ETag'], f'"board-{self.board.pk}-v{snapshot.version}"')
+
+        not_modified = self.client.get(f'/api/boards/{self.board.pk}/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+        self.client.patch(f'/api/tasks/{task.pk}/', {'title': 'B'}, format='json')
+        changed = self.client.get(f'/api/boards/{self.board.pk}/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], first['ETag'])
+        self.assertEqual(changed.json()['tasks'][0]['title'], 'B')
+
+    def test_outsiders_get_no_snapshot(self):
+        self.client.get(f'/api/boards/{self.board.pk}/')
+        self.assertEqual(self.client_for(self.outsider).get(f'/api/boards/{self.board.pk}/').status_code, 403)
+
+    def test_stale_board_instance_moves_the_version_forward(self):
+        stale = Board.objects.get(pk=self.board.pk)
+        self.create_task()  # bumps the version in SQL
+        version = Board.objects.get(pk=self.board.pk).version
+
+        stale.title = 'Renamed'
+        stale.save()
+
+        self.assertEqual(stale.version, version + 1)
+        self.assertEqual(Board.objects.get(pk=self.board.pk).version, version + 1)
+
+    def test_rebuilds_are_coalesced_and_processed_by_the_worker(self):
+        task = self.create_task()
+        with self.captureOnCommitCallbacks(execute=True):
+            for title in ('B', 'C', 'D'):
+                self.client.patch(f'/api/tasks/{task.pk}/', {'title': title}, format='json')
+        self.assertEqual(Job.objects.filter(kind=Job.KIND_REBUILD_SNAPSHOT).count(), 1)
+
+        Job.objects.update(available_at=timezone.now())
+        call_command('process_jobs', '--once', stdout=io.StringIO())
+        board = Board.objects.get(pk=self.board.pk)
+        self.assertEqual(BoardSnapshot.objects.get(board=board).version, board.version)
+
+    def test_check_command(self):
+        self.create_task()
+        self.client.get(f'/api/boards/{self.board.pk}/')
+        output = io.StringIO()
+        call_command('check_board_snapshots', stdout=output)
+        self.assertIn('1 current', output.getvalue())
+
+        BoardSnapshot.objects.update(data='{}')
+        with self.assertRaises(CommandError):
+            call_command('check_board_snapshots', stdout=io.StringIO())
+        call_command('check_board_snapshots', '--fix', stdout=io.StringIO())
+        call_command('check_board_snapshots', stdout=output)
+        self.assertTrue(output.getvalue().rstrip().endswith('1 current, 0 outdated, 0 mismatch, 0 missing'))
+
+
+class CompressionTests(KanbanTestCase):
+
+    def setUp(self):
+        super().setUp()
+        for index in range(20):
+            self.create_task(title=f'Task {index}', description='Some description ' * 5)
+        self.url = f'/api/boards/{self.board.pk}/'
+
+    def test_gzip_for_clients_that_accept_it(self):
+        plain = self.client.get(self.url)
+        compressed = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertEqual(compressed['ETag'], f'W/{plain["ETag"]}')
+        self.assertIn('Accept-Encoding', compressed['Vary'])
+
+    def test_refused_and_small_responses_stay_plain(self):
+        refused = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip;q=0')
+        small = self.client.get('/api/summary/', HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertNotIn('Content-Encoding', refused)
+        self.assertNotIn('Content-Encoding', small)
+
+    def test_compressed_body_is_cached_per_etag(self):
+        self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        with mock.patch('core.compression.gzip.compress') as compress:
+            again = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        compress.assert_not_called()
+        self.assertEqual(again['Content-Encoding'], 'gzip')
+
+
+class SingleFlightTests(SimpleTestCase):
+
+    def test_concurrent_calls_share_one_computation(self):
+        flight = SingleFlight('test')
+        started, release = threading.Event(), threading.Event()
+        calls, results = [], []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {'value': 42}
+
+        leader = threading.Thread(target=lambda: results.append(flight.run('key', compute)))
+        leader.start()
+        started.wait(5)
+        followers = [threading.Thread(target=lambda: results.append(flight.run('key', compute))) for _ in range(3)]
+        for thread in followers:
+            thread.start()
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(flight.calls, {})
+
+    def test_errors_are_raised_and_nothing_is_kept(self):
+        flight = SingleFlight('test')
+        with self.assertRaises(ZeroDivisionError):
+            flight.run('key', lambda: 1 / 0)
+        self.assertEqual(flight.run('key', lambda: 'ok'), 'ok')
+
+    def test_disabled(self):
+        flight = SingleFlight('test')
+        with self.settings(COALESCING={'enabled': False}):
+            self.assertEqual(flight.run('key', lambda: 'ok'), 'ok')
+        self.assertEqual(flight.calls, {})
+
+
+class DigestTests(KanbanTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.day = date(2025, 7, 10)
+        self.output = io.StringIO()
+        for offset in (-2, 0, 2, 3):
+            self.create_task(title=f'Due {offset:+d}', assignee=self.member, due_date=self.day + timedelta(days=offset))
+        self.create_task(title='Done', assignee=self.member, status='done', due_date=self.day)
+        self.create_task(title='Both roles', assignee=self.owner, reviewer=self.owner, due_date=self.day)
+        self.create_task(title='Reviewing', reviewer=self.outsider, due_date=self.day + timedelta(days=1))
+
+    def backend(self):
+        return digests.ConsoleBackend(stream=self.output)
+
+    def test_digests_of_the_day(self):
+        run = digests.run_digests(self.day, self.backend())
+
+        self.assertEqual(run.digests, 3)
+        self.assertIsNotNone(run.finished_at)
+        member = Digest.objects.get(user=self.member)
+        # Due today to today + 2 (due_soon_days = 3 includes today); done tasks are left out
+        self.assertEqual([item['title'] for item in member.items], ['Due -2', 'Due +0', 'Due +2'])
+        self.assertEqual((member.overdue_count, member.due_soon_count), (1, 2))
+        self.assertEqual(Digest.objects.get(user=self.owner).items[0]['roles'], ['assignee', 'reviewer'])
+        self.assertFalse(Digest.objects.filter(delivered_at__isnull=True).exists())
+        self.assertEqual(self.output.getvalue().count('Subject: KanMind'), 3)
+
+    def test_interrupted_run_resumes_after_the_last_user(self):
+        write_batch = digests._write_batch
+        calls = []
+
+        def fail_second_batch(run, batch):
+            calls.append(batch)
+            if len(calls) == 2:
+                raise RuntimeError("Worker killed")
+            write_batch(run, batch)
+
+        with self.settings(DIGESTS={**settings.DIGESTS, 'batch_size': 1}):
+            with mock.patch('kanban_app.digests._write_batch', fail_second_batch):
+                with self.assertRaises(RuntimeError):
+                    digests.run_digests(self.day, self.backend())
+            self.assertEqual(Digest.objects.count(), 1)
+            self.assertIsNone(DigestRun.objects.get(date=self.day).finished_at)
+
+            run = digests.run_digests(self.day, self.backend())
+
+        self.assertEqual(run.digests, 3)
+        self.assertEqual(Digest.objects.count(), 3)
+        # Every digest was delivered exactly once
+        self.assertEqual(self.output.getvalue().count('Subject: KanMind'), 3)
+
+    def test_command_with_file_backend(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with self.settings(DIGESTS={**settings.DIGESTS, 'options': {'directory': directory}}):
+                call_command(
+                    'send_digests', '--date', self.day.isoformat(),
+                    '--backend', 'kanban_app.digests.FileBackend', stderr=io.StringIO(),
+                )
+                call_command('send_digests', '--date', self.day.isoformat(), '--restart',
+                             '--backend', 'kanban_app.digests.FileBackend', stderr=io.StringIO())
+            lines = Path(directory, f'digests-{self.day}.jsonl').read_text().splitlines()
+        self.assertEqual(len(lines), 6)
+        self.assertEqual({json.loads(line)['to'] for line in lines}, {
+            'owner@example.com', 'member@example.com', 'outsider@example.com',
+        })
+
+
+class FlowMetricsTests(KanbanTestCase):
+
+    def test_status_changes_are_recorded(self):
+        task = self.create_task(status='to-do')
+        self.client.patch(f'/api/tasks/{task.pk}/', {'status': 'in-progress'}, format='json')
+        self.client.patch(f'/api/tasks/{task.pk}/', {'title': 'Renamed'}, format='json')
+
+        changes = list(TaskStatusChange.objects.filter(task_id=task.pk).order_by('id').values_list('from_status', 'to_status'))
+        self.assertEqual(changes, [('', 'to-do'), ('to-do', 'in-progress')])
+
+    def test_repeated_saves_of_one_instance_record_each_change_once(self):
+        task = Task.objects.get(pk=self.create_task(status='to-do').pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            task.status = 'in-progress'
+            task.save()
+            task.title = 'Renamed'
+            task.save()
+            task.status = 'done'
+            task.save(update_fields=['status'])
+        activity.flush()
+
+        changes = list(TaskStatusChange.objects.filter(task_id=task.pk).order_by('id').values_list('from_status', 'to_status'))
+        self.assertEqual(changes, [('', 'to-do'), ('to-do', 'in-progress'), ('in-progress', 'done')])
+        updates = Activity.objects.filter(task_id=task.pk, verb=Activity.VERB_TASK_UPDATED).order_by('id')
+        self.assertEqual([entry.data['changes'] for entry in updates], [
+            {'status': ['to-do', 'in-progress']}, {'title': ['Task', 'Renamed']}, {'status': ['in-progress', 'done']},
+        ])
+
+    def test_daily_rollup_and_endpoint(self):
+        day = date(2025, 7, 1)
+        start = timezone.make_aware(timezone.datetime(2025, 7, 1, 8))
+        for task_id, history in ((1, ['', 'to-do', 'in-progress', 'done']), (2, ['', 'to-do', 'done', 'review'])):
+            TaskStatusChange.objects.bulk_create(
+                TaskStatusChange(board=self.board, task_id=task_id, from_status=before, to_status=after,
+                                 changed_at=start + timedelta(hours=index))
+                for index, (before, after) in enumerate(zip(history, history[1:]))
+            )
+
+        output = io.StringIO()
+        call_command('rollup_task_metrics', '--date', day.isoformat(), stdout=output)
+        self.assertIn('1 boards', output.getvalue())
+
+        metrics = self.client_for(self.member).get(
+            f'/api/boards/{self.board.pk}/metrics/?start=2025-06-30&end=2025-07-02'
+        ).json()
+        self.assertEqual(len(metrics), 1)
+        self.assertEqual(metrics[0]['date'], '2025-07-01')
+        self.assertEqual((metrics[0]['created'], metrics[0]['completed'], metrics[0]['reopened']), (2, 2, 1))
+        self.assertEqual(metrics[0]['entered'], {'to-do': 2, 'in-progress': 1, 'done': 2, 'review': 1})
+        # Lead times 2h and 1h, cycle time (in-progress -> done) 1h
+        self.assertEqual((metrics[0]['lead_time_p50'], metrics[0]['lead_time_p90']), (3600, 7200))
+        self.assertEqual(metrics[0]['cycle_time_p50'], 3600)
+
+        # Rerunning the day replaces its rows
+        rollup_day(day)
+        self.assertEqual(BoardDailyMetrics.objects.count(), 1)
+
+    def test_endpoint_validation_and_permission(self):
+        url = f'/api/boards/{self.board.pk}/metrics/'
+        self.assertEqual(self.client.get(url + '?start=2025-07-02&end=2025-07-01').status_code, 400)
+        self.assertEqual(self.client_for(self.outsider).get(url).status_code, 403)
+
+
+class BoardCloneTests(KanbanTestCase):
+
+    def test_clone_copies_members_tasks_and_comments(self):
+        tasks = [self.create_task(title=f'T{index}', assignee=self.member, due_date=date(2025, 7, 1)) for index in range(4)]
+        tasks[0].delete()
+        Comment.objects.create(task=tasks[3], author=self.member, content='On T3')
+        Comment.objects.create(task=tasks[1], author=self.owner, content='On T1')
+
+        response = self.client_for(self.member).post(f'/api/boards/{self.board.pk}/clone/', {
+            'title': 'Copy', 'include_comments': True,
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        clone = Board.objects.get(pk=response.data['id'])
+        self.assertEqual((clone.title, clone.owner_id), ('Copy', self.member.pk))
+        self.assertEqual(list(clone.members.values_list('id', flat=True)), [self.member.pk])
+        copies = Task.objects.filter(board=clone).order_by('id')
+        self.assertEqual([task.title for task in copies], ['T1', 'T2', 'T3'])
+        self.assertEqual({task.version for task in copies}, {1})
+        self.assertEqual(
+            sorted(Comment.objects.filter(task__board=clone).values_list('task__title', 'content')),
+            [('T1', 'On T1'), ('T3', 'On T3')],
+        )
+        self.assertEqual(TaskStatusChange.objects.filter(board=clone, from_status='').count(), 3)
+
+    def test_comments_follow_their_tasks_across_chunks(self):
+        tasks = [self.create_task(title=f'T{index}') for index in range(5)]
+        for task in reversed(tasks):
+            Comment.objects.create(task=task, author=self.owner, content=f'On {task.title}')
+
+        with mock.patch('kanban_app.cloning.CHUNK_SIZE', 2):
+            response = self.client.post(f'/api/boards/{self.board.pk}/clone/', {'include_comments': True}, format='json')
+
+        copies = Task.objects.filter(board_id=response.data['id'])
+        self.assertEqual({task.version for task in copies}, {1})
+        self.assertEqual(
+            sorted(Comment.objects.filter(task__in=copies).values_list('task__title', 'content')),
+            [(f'T{index}', f'On T{index}') for index in range(5)],
+        )
+
+    def test_reset_options(self):
+        self.create_task(status='done', assignee=self.member, due_date=date(2025, 7, 1))
+        Comment.objects.create(task=Task.objects.get(), author=self.owner, content='Hi')
+
+        response = self.client.post(f'/api/boards/{self.board.pk}/clone/', {
+            'reset_status': True, 'reset_due_dates': True, 'reset_assignees': True,
+        }, format='json')
+
+        copy = Task.objects.get(board_id=response.data['id'])
+        self.assertEqual((copy.status, copy.due_date, copy.assignee_id), ('to-do', None, None))
+        self.assertFalse(Comment.objects.filter(task=copy).exists())
+        self.assertEqual(response.data['title'], 'Board (copy)')
+
+    def test_done_copies_are_not_completed_on_the_clone_day(self):
+        self.create_task(title='Open', status='in-progress')
+        self.create_task(title='Finished', status='done')
+
+        response = self.client.post(f'/api/boards/{self.board.pk}/clone/', {}, format='json')
+        rollup_day(timezone.localdate())
+
+        history = TaskStatusChange.objects.filter(board_id=response.data['id'])
+        self.assertEqual(list(history.values_list('from_status', 'to_status')), [('', 'in-progress')])
+        metrics = BoardDailyMetrics.objects.get(board_id=response.data['id'])
+        self.assertEqual((metrics.created, metrics.completed, metrics.lead_time_p50), (1, 0, None))
+
+    def test_outsiders_cannot_clone(self):
+        response = self.client_for(self.outsider).post(f'/api/boards/{self.board.pk}/clone/', {}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class Sink:
+    """
+    Local webhook endpoint recording the received batches (like `manage.py webhook_sink`).
+    """
+
+    def __init__(self, status=204):
+        self.requests = []
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                sink.requests.append((self.path, dict(self.headers), body))
+                self.send_response(status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/hook'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@override_settings(WEBHOOKS={**settings.WEBHOOKS, 'settle': 0, 'allow_private_hosts': True})
+class WebhookTests(KanbanTestCase):
+
+    def subscribe(self, url, **data):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/boards/{self.board.pk}/webhooks/', {'url': url, **data}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.data
+
+    def deliver(self):
+        pool = webhooks.ConnectionPool(5)
+        try:
+            return webhooks.deliver_due(pool)
+        finally:
+            pool.close()
+
+    def test_events_are_only_stored_for_boards_with_webhooks(self):
+        self.create_task()
+        self.assertFalse(WebhookEvent.objects.exists())
+
+        self.subscribe('http://93.184.216.34/hook')
+        response = self.client.post('/api/tasks/', {
+            'board': self.board.pk, 'title': 'New', 'status': 'to-do', 'priority': 'low',
+            'assignee_id': self.member.pk, 'reviewer_id': self.owner.pk,
+        }, format='json')
+
+        event = WebhookEvent.objects.get()
+        self.assertEqual(event.event, 'task.created')
+        self.assertEqual(event.data['task']['id'], response.data['id'])
+        self.assertEqual((event.data['task']['assignee'], event.data['task']['reviewer']), (self.member.pk, self.owner.pk))
+
+    def test_board_flag_is_shared_by_all_processes(self):
+        key = webhooks._subscribed_key(self.board.pk)
+        self.assertFalse(webhooks.has_webhooks(self.board.pk))
+        self.assertIs(caches['shared'].get(key), False)
+        self.assertIsNone(caches['default'].get(key))
+
+        self.subscribe('http://93.184.216.34/hook')
+        self.assertIsNone(caches['shared'].get(key))
+        self.assertTrue(webhooks.has_webhooks(self.board.pk))
+
+    def test_delivery_to_a_sink(self):
+        sink = Sink()
+        self.addCleanup(sink.close)
+        subscription = self.subscribe(sink.url, events=['task.created', 'comment.created'])
+        task_id = self.client.post('/api/tasks/', {
+            'board': self.board.pk, 'title': 'New', 'status': 'to-do', 'priority': 'low',
+        }, format='json').data['id']
+        self.client.patch(f'/api/tasks/{task_id}/', {'title': 'Changed'}, format='json')  # not subscribed
+        self.client.post(f'/api/tasks/{task_id}/comments/', {'content': 'Hi'}, format='json')
+
+        self.assertEqual(self.deliver(), 2)
+        self.assertEqual(self.deliver(), 0)
+
+        path, headers, body = sink.requests[0]
+        batch = json.loads(body)
+        expected = 'sha256=' + hmac.new(subscription['secret'].encode(), body, hashlib.sha256).hexdigest()
+        self.assertEqual(headers['X-KanMind-Signature'], expected)
+        self.assertEqual([event['event'] for event in batch['events']], ['task.created', 'comment.created'])
+        self.assertEqual(batch['board'], self.board.pk)
+        self.assertEqual(WebhookSubscription.objects.get().last_event_id, batch['events'][-1]['id'])
+
+    def test_failing_endpoint_backs_off(self):
+        sink = Sink(status=503)
+        self.addCleanup(sink.close)
+        self.subscribe(sink.url)
+        self.create_task()
+
+        self.assertEqual(self.deliver(), 0)
+        subscription = WebhookSubscription.objects.get()
+        self.assertEqual((subscription.failures, subscription.last_error, subscription.last_event_id), (1, 'HTTP 503', 0))
+        self.assertGreater(subscription.retry_at, timezone.now())
+        # Not due again before the backoff
+        self.assertEqual(self.deliver(), 0)
+        self.assertEqual(len(sink.requests), 1)
+
+    def test_deliver_command(self):
+        sink = Sink()
+        self.addCleanup(sink.close)
+        self.subscribe(sink.url)
+        self.create_task()
+        output = io.StringIO()
+        call_command('deliver_webhooks', '--once', stdout=output)
+        self.assertIn('Delivered 1 events', output.getvalue())
+
+    def test_change_is_rolled_back_if_its_event_cannot_be_stored(self):
+        self.subscribe('http://93.184.216.34/hook')
+        task = self.create_task()
+
+        with mock.patch.object(WebhookEvent.objects, 'create', side_effect=DatabaseError("disk full")):
+            with self.assertRaises(DatabaseError):
+                self.client.post('/api/tasks/', {
+                    'board': self.board.pk, 'title': 'New', 'status': 'to-do', 'priority': 'low',
+                }, format='json')
+            with self.assertRaises(DatabaseError):
+                self.client.post(f'/api/tasks/{task.pk}/comments/', {'content': 'Hi'}, format='json')
+
+        self.assertFalse(Task.objects.filter(title='New').exists())
+        self.assertFalse(Comment.objects.exists())
+
+    def test_only_the_owner_manages_webhooks(self):
+        response = self.client_for(self.member).post(
+            f'/api/boards/{self.board.pk}/webhooks/', {'url': 'http://93.184.216.34/hook'}, format='json'
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.client.post(
+            f'/api/boards/{self.board.pk}/webhooks/', {'url': 'http://93.184.216.34/', 'events': ['nope']}, format='json'
+        ).status_code, 400)
+
+
+@override_settings(WEBHOOKS={**settings.WEBHOOKS, 'settle': 0})
+class WebhookAddressTests(KanbanTestCase):
+
+    def test_non_public_hosts_are_rejected(self):
+        url = f'/api/boards/{self.board.pk}/webhooks/'
+        for target in ('http://127.0.0.1:8000/', 'http://localhost/', 'http://10.0.0.5/', 'http://192.168.1.1/',
+                       'http://169.254.169.254/latest/meta-data/', 'http://[::1]/', 'http://[::ffff:127.0.0.1]/',
+                       'http://0.0.0.0/'):
+            response = self.client.post(url, {'url': target}, format='json')
+            self.assertEqual(response.status_code, 400, target)
+            self.assertIn('url', response.json())
+
+        webhook_id = self.client.post(url, {'url': 'https://93.184.216.34/hook'}, format='json').data['id']
+        response = self.client.patch(f'{url}{webhook_id}/', {'url': 'http://10.0.0.5/'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_only_http_and_https_urls(self):
+        response = self.client.post(
+            f'/api/boards/{self.board.pk}/webhooks/', {'url': 'ftp://93.184.216.34/hook'}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+        WebhookSubscription.objects.create(board=self.board, url='ftp://93.184.216.34/hook', secret='secret')
+        self.create_task()
+        pool = webhooks.ConnectionPool(5)
+        self.addCleanup(pool.close)
+        with mock.patch.object(pool, 'post') as post:
+            self.assertEqual(webhooks.deliver_due(pool), 0)
+        post.assert_not_called()
+        self.assertEqual(WebhookSubscription.objects.get().last_error, 'Unsupported URL scheme: ftp')
+
+    def test_worker_checks_the_address_again(self):
+        sink = Sink()
+        self.addCleanup(sink.close)
+        WebhookSubscription.objects.create(board=self.board, url=sink.url, secret='secret')
+        self.create_task()
+
+        pool = webhooks.ConnectionPool(5)
+        self.addCleanup(pool.close)
+        self.assertEqual(webhooks.deliver_due(pool), 0)
+        self.assertEqual(sink.requests, [])
+        self.assertIn('BlockedHostError', WebhookSubscription.objects.get().last_error)
+
+    def test_connection_goes_to_the_checked_address(self):
+        answers = iter(['93.184.216.34', '127.0.0.1'])
+
+        def getaddrinfo(host, port, *args, **kwargs):
+            return [(None, None, None, '', (next(answers), port))]
+
+        with mock.patch('kanban_app.webhooks.socket.getaddrinfo', getaddrinfo), \
+                mock.patch('kanban_app.webhooks.socket.create_connection', side_effect=ConnectionRefusedError) as connect:
+            with self.assertRaises(ConnectionRefusedError):
+                webhooks.ConnectionPool(1).post('http://rebinding.example/', b'{}', {})
+        self.assertEqual(connect.call_args[0][0], ('93.184.216.34', 80))
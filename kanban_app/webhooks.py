@@ -0,0 +1,332 @@
+"""
+Webhooks for task and comment changes, delivered through an outbox.
+
+The write path only adds one INSERT: signal receivers store a WebhookEvent
+in the transaction of the change, and only for boards that have webhooks
+(looked up in the shared cache, not the database). `python manage.py
+deliver_webhooks` sends the events per subscription in id order, as JSON
+batches over pooled keep-alive connections, and retries failed endpoints
+with an exponential backoff. `python manage.py webhook_sink` is a local
+endpoint to test against.
+
+Endpoints must resolve to public addresses only (no loopback, private,
+link-local, ... networks), checked when a webhook is saved and again for
+every new connection, which then connects to exactly the checked address.
+"""
+
+import hashlib
+import hmac
+import http.client
+import ipaddress
+import json
+import logging
+import random
+import socket
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+from kanban_app.models import WebhookEvent, WebhookSubscription
+
+
+logger = logging.getLogger(__name__)
+
+EVENTS = ['task.created', 'task.updated', 'task.deleted', 'comment.created', 'comment.deleted']
+
+# URL schemes events are sent over (URLField also accepts ftp/ftps)
+SCHEMES = ['http', 'https']
+
+DEFAULTS = {
+    # Events per POST
+    'batch_size': 100,
+    # Seconds to wait for an endpoint to respond
+    'timeout': 5.0,
+    # Retry delay after the n-th consecutive failure: base * 2 ** (n - 1), capped at max (seconds)
+    'backoff_base': 2.0,
+    'backoff_max': 600.0,
+    # Consecutive failures after which a subscription is deactivated
+    'max_failures': 20,
+    # Events are only sent once they are this old (seconds), so events of
+    # transactions that commit out of id order are not skipped by the cursor
+    'settle': 2.0,
+    # Days delivered events are kept in the outbox
+    'retention_days': 7,
+    # Seconds the "board has webhooks" flag is cached; saving or deleting a
+    # subscription clears it right away
+    'cache_timeout': 300,
+    # Allow endpoints on loopback/private addresses (e.g. `webhook_sink` on localhost)
+    'allow_private_hosts': False,
+}
+
+# Entry per board: whether it has active webhooks. Kept in the 'shared' cache,
+# so a new subscription is noticed by all processes right away
+KEY_PREFIX = 'webhooks'
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'WEBHOOKS', {})}
+
+
+def _subscribed_key(board_id):
+    return f'{KEY_PREFIX}:{board_id}'
+
+
+def has_webhooks(board_id):
+    """
+    True if the board has active webhooks; cached, so the write path
+    usually does not query for it.
+    """
+    subscribed = caches['shared'].get(_subscribed_key(board_id))
+    if subscribed is None:
+        subscribed = WebhookSubscription.objects.filter(board_id=board_id, is_active=True).exists()
+        caches['shared'].set(_subscribed_key(board_id), subscribed, get_config()['cache_timeout'])
+    return subscribed
+
+
+def invalidate_board(board_id):
+    caches['shared'].delete(_subscribed_key(board_id))
+
+
+def enqueue(board_id, event, **data):
+    """
+    Stores an event for the webhooks of `board_id` in the current transaction
+    (a single INSERT), if the board has any. Callers run inside the transaction
+    of the change (updates and deletes are atomic, the create views open one),
+    so a change is never committed without its event or the other way round.
+    """
+    if has_webhooks(board_id):
+        WebhookEvent.objects.create(board_id=board_id, event=event, data=data)
+
+
+def latest_event_id():
+    return WebhookEvent.objects.aggregate(latest=models.Max('id'))['latest'] or 0
+
+
+class BlockedHostError(OSError):
+    """
+    The endpoint resolves to an address webhooks must not be sent to.
+    """
+
+
+def _is_public(address):
+    ip = ipaddress.ip_address(address.split('%')[0])  # without an IPv6 zone
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def resolve_endpoint(host, port):
+    """
+    Resolves `host` and returns the address to connect to. Raises
+    BlockedHostError if any of its addresses is not public (unless
+    `allow_private_hosts`), or OSError if it cannot be resolved.
+    """
+    addresses = [info[4][0] for info in socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)]
+    if not get_config()['allow_private_hosts']:
+        blocked = [address for address in addresses if not _is_public(address)]
+        if blocked:
+            raise BlockedHostError(f"{host} resolves to a non-public address ({blocked[0]})")
+    return addresses[0]
+
+
+def _port(parts):
+    return parts.port or (443 if parts.scheme == 'https' else 80)
+
+
+def check_url(url):
+    """
+    Raises BlockedHostError/OSError if webhooks cannot be sent to `url` (see resolve_endpoint).
+    """
+    parts = urlsplit(url)
+    resolve_endpoint(parts.hostname, _port(parts))
+
+
+def sign(secret, body):
+    return 'sha256=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+class _PinnedConnectionMixin:
+    """
+    Connects to `address` (checked by resolve_endpoint) instead of resolving
+    the host again, so a DNS change after the check cannot redirect the
+    request. The host name is still used for the Host header and TLS.
+    """
+
+    def __init__(self, host, port, address, **kwargs):
+        super().__init__(host, port, **kwargs)
+        self.address = address
+        self._create_connection = self._connect_address
+
+    def _connect_address(self, host_port, *args, **kwargs):
+        return socket.create_connection((self.address, host_port[1]), *args, **kwargs)
+
+
+class PinnedHTTPConnection(_PinnedConnectionMixin, http.client.HTTPConnection):
+    pass
+
+
+class PinnedHTTPSConnection(_PinnedConnectionMixin, http.client.HTTPSConnection):
+    pass
+
+
+class ConnectionPool:
+    """
+    Keeps one keep-alive HTTP(S) connection per host for the worker, so
+    consecutive batches to the same endpoint reuse the connection. The host
+    is resolved and checked (resolve_endpoint) whenever a connection is opened.
+    """
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.connections = {}
+
+    def post(self, url, body, headers):
+        """
+        POSTs `body` and returns the status code. A connection that the
+        server has closed in the meantime is reopened once.
+        """
+        parts = urlsplit(url)
+        port = _port(parts)
+        key = (parts.scheme, parts.hostname, port)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+
+        for attempt in (1, 2):
+            connection = self.connections.get(key)
+            if connection is None:
+                address = resolve_endpoint(parts.hostname, port)
+                connection_class = PinnedHTTPSConnection if parts.scheme == 'https' else PinnedHTTPConnection
+                connection = self.connections[key] = connection_class(
+                    parts.hostname, port, address, timeout=self.timeout
+                )
+            try:
+                connection.request('POST', path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                if response.will_close:
+                    self.discard(key)
+                return response.status
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # Stale keep-alive connection; retry once with a fresh one
+                self.discard(key)
+                if attempt == 2:
+                    raise
+            except Exception:
+                self.discard(key)
+                raise
+
+    def discard(self, key):
+        connection = self.connections.pop(key, None)
+        if connection is not None:
+            connection.close()
+
+    def close(self):
+        for key in list(self.connections):
+            self.discard(key)
+
+
+def backoff(failures, config):
+    """
+    Seconds until the next attempt after `failures` consecutive failures (with jitter).
+    """
+    delay = min(config['backoff_base'] * 2 ** (failures - 1), config['backoff_max'])
+    return delay * random.uniform(0.8, 1.2)
+
+
+def claim_due_subscriptions(config):
+    """
+    Returns the active subscriptions that are due and reserves them for this
+    worker by moving `retry_at` forward with a conditional UPDATE (the same
+    pattern as the job queue), so two workers never send the same batch.
+    """
+    now = timezone.now()
+    lease = now + timedelta(seconds=config['timeout'] * 3)
+    claimed = []
+    due = WebhookSubscription.objects.filter(is_active=True, retry_at__lte=now).order_by('retry_at')
+    for subscription in due[:100]:
+        if WebhookSubscription.objects.filter(pk=subscription.pk, retry_at=subscription.retry_at).update(retry_at=lease):
+            claimed.append(subscription)
+    return claimed
+
+
+def pending_events(subscription, config):
+    settled = timezone.now() - timedelta(seconds=config['settle'])
+    events = WebhookEvent.objects.filter(
+        board_id=subscription.board_id, id__gt=subscription.last_event_id, created_at__lte=settled
+    )
+    if subscription.events:
+        events = events.filter(event__in=subscription.events)
+    return list(events.order_by('id')[:config['batch_size']])
+
+
+def deliver(subscription, pool, config):
+    """
+    Sends the next batch of events to one subscription and moves its cursor
+    or schedules a retry. Returns the number of delivered events.
+    """
+    events = pending_events(subscription, config)
+    fields = {'retry_at': timezone.now()}
+    if events:
+        body = json.dumps({
+            'board': subscription.board_id,
+            'events': [
+                {'id': event.pk, 'event': event.event, 'created_at': event.created_at, 'data': event.data}
+                for event in events
+            ],
+        }, cls=DjangoJSONEncoder).encode()
+        headers = {
+            'Content-Type': 'application/json',
+            'User-Agent': 'KanMind-Webhooks',
+            'X-KanMind-Signature': sign(subscription.secret, body),
+        }
+        scheme = urlsplit(subscription.url).scheme
+        if scheme not in SCHEMES:
+            # Never sent as a plain HTTP POST to the host of another scheme
+            error = f"Unsupported URL scheme: {scheme}"
+        else:
+            try:
+                status = pool.post(subscription.url, body, headers)
+                error = None if 200 <= status < 300 else f"HTTP {status}"
+            except (OSError, http.client.HTTPException) as exc:
+                error = f"{type(exc).__name__}: {exc}"
+
+        if error is None:
+            fields.update(last_event_id=events[-1].pk, failures=0, last_error='')
+        else:
+            failures = subscription.failures + 1
+            fields.update(
+                failures=failures, last_error=error,
+                retry_at=timezone.now() + timedelta(seconds=backoff(failures, config)),
+            )
+            if failures >= config['max_failures']:
+                fields['is_active'] = False
+                invalidate_board(subscription.board_id)
+            logger.warning("Webhook %s failed (%s), attempt %s", subscription.pk, error, failures)
+            events = []
+
+    WebhookSubscription.objects.filter(pk=subscription.pk).update(**fields)
+    return len(events)
+
+
+def deliver_due(pool):
+    """
+    One round of the worker: a batch for every due subscription.
+    Returns the number of delivered events.
+    """
+    config = get_config()
+    return sum(deliver(subscription, pool, config) for subscription in claim_due_subscriptions(config))
+
+
+def purge_delivered():
+    """
+    Removes outbox events older than the retention period. Returns their number.
+    """
+    cutoff = timezone.now() - timedelta(days=get_config()['retention_days'])
+    deleted, _ = WebhookEvent.objects.filter(created_at__lt=cutoff).delete()
+    return deleted